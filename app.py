@@ -1,29 +1,77 @@
 import os
 import json
+import orjson
 import yt_dlp
 import io
 import tempfile
+import hashlib
+import re
+from itertools import islice
+from bisect import bisect_right
 from datetime import datetime
+from collections import defaultdict, OrderedDict
 from flask import Flask, request, jsonify, send_file, redirect
+from flask.json.provider import DefaultJSONProvider
+from bson.objectid import ObjectId
 from flask_cors import CORS
+from flask_compress import Compress
 from werkzeug.utils import secure_filename
 from werkzeug.security import check_password_hash, generate_password_hash
+from requests_toolbelt import MultipartEncoder
 from moviepy.editor import VideoFileClip
 import uuid
 from pathlib import Path
 import subprocess
 import sys
+import threading
+import time
+import queue
+import atexit
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
-from models import User, Session, init_db, seed_default_users, db
+from models import User, Session, MentorProfile, MentorStats, SESSION_SCORE_FIELDS, init_db, seed_default_users, db, get_gemini_client
 from cloudinary_handler import init_cloudinary, upload_video_to_cloudinary, get_video_url, delete_video_from_cloudinary
 
 # Load environment variables
 load_dotenv()
 
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    Flask JSON provider backed by orjson; dates, UUIDs, decimals and dataclasses encode as
+    with jsonify, and ObjectIds as their hex string so raw Mongo documents can be returned
+    """
+    option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    @staticmethod
+    def default(o):
+        if isinstance(o, ObjectId):
+            return str(o)
+        return DefaultJSONProvider.default(o)
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self.option).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj, default=self.default, option=self.option), mimetype=self.mimetype)
+
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 CORS(app, resources={r"/api/*": {"origins": "*", "methods": ["GET", "POST", "OPTIONS", "PUT", "DELETE"], "allow_headers": ["Content-Type", "Authorization","Access-Control-Allow-Origin"]}})
 
+# Compress JSON responses (brotli preferred, gzip fallback) based on the client's Accept-Encoding;
+# small bodies aren't worth the CPU
+app.config['COMPRESS_MIMETYPES'] = ['application/json']
+app.config['COMPRESS_MIN_SIZE'] = 1024
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+Compress(app)
+
 # Initialize Cloudinary for video storage
 try:
     init_cloudinary()
@@ -50,11 +98,78 @@ DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
 UPLOADED_SESSIONS_FILE = os.path.join(DATA_DIR, 'mentor_uploaded_sessions.json')
 PUBLIC_RANKINGS_FILE = os.path.join(DATA_DIR, 'public_mentor_rankings.json')
 
+# ffprobe runs in its own process, so a small thread pool is enough to overlap probes with request work
+_probe_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix='ffprobe')
+
+# Shared HTTP session so service calls and downloads reuse pooled keep-alive connections.
+# Connection errors are retried for every method; status retries only apply to idempotent
+# requests, since a streamed POST body can't be replayed.
+http_session = requests.Session()
+_http_adapter = HTTPAdapter(
+    pool_connections=16,
+    pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=1, status_forcelist=[502, 503, 504])
+)
+http_session.mount('https://', _http_adapter)
+http_session.mount('http://', _http_adapter)
+
+# Analysis service metric keys -> session metric names
+METRIC_KEYS = (
+    ('clarity', 'Clarity'),
+    ('communication', 'Communication'),
+    ('engagement', 'Engagement'),
+    ('technical_depth', 'Technical Depth'),
+    ('interaction', 'Interaction'),
+    ('pacing', 'Pacing'),
+    ('eye_contact', 'Eye Contact'),
+    ('gestures', 'Gestures'),
+)
+
+# Public strength tags: score < 70, 70-79, 80-89, >= 90
+STRENGTH_TAG_BOUNDS = (70, 80, 90)
+STRENGTH_TAGS = ('Developing', 'Consistent Performer', 'Top 10% in Clarity', 'Best Engagement')
+
+# Words longer than 4 characters, used as transcript key phrases
+_LONG_WORD = re.compile(r'\S{5,}')
+
+# Per-chunk metrics reported by the S3 analysis service
+S3_METRIC_KEYS = (
+    ('communication', 'Communication'),
+    ('clarity', 'Clarity'),
+    ('engagement', 'Engagement'),
+    ('interaction', 'Interaction'),
+)
+
+# (metric key, threshold, label, advice): a chunk scoring below threshold becomes a weak moment
+WEAK_MOMENT_RULES = (
+    ('communication', 70, 'Communication', 'Focus on speaking pace and clarity.'),
+    ('engagement', 60, 'Engagement', 'Try asking more questions and interact with audience.'),
+    ('interaction', 70, 'Interaction', 'Improve eye contact and body language.'),
+)
+
+# Background workers for the analyze pipeline (service calls, Gemini, DB writes)
+_pipeline_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix='analysis')
+
+# Mentor profile recomputes are queued and applied in batches, once per mentor per interval
+PROFILE_UPDATE_INTERVAL_SECONDS = 5
+_profile_update_queue = queue.Queue()
+
+# Gemini summaries keyed by sha256(model + prompt); retried or re-analyzed uploads
+# with the same transcript are served from here instead of another LLM call
+SUMMARY_CACHE_SIZE = 1024
+_summary_cache = OrderedDict()
+_summary_cache_lock = threading.Lock()
+
 # Create necessary directories
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 os.makedirs(CHUNKS_FOLDER, exist_ok=True)
 os.makedirs(DATA_DIR, exist_ok=True)
 
+def request_limit():
+    """The request's ?limit= as a positive int, or None when absent or not positive"""
+    limit = request.args.get('limit', type=int)
+    return limit if limit and limit > 0 else None
+
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
@@ -339,9 +454,6 @@ def process_youtube_url():
 def get_cloudinary_signature():
     """Generate a signed upload signature for Cloudinary uploads."""
     try:
-        import hashlib
-        import time
-        
         data = request.get_json()
         mentor_id = data.get('mentorId')
         session_id = data.get('sessionId')
@@ -470,7 +582,7 @@ def register():
         return jsonify({'error': 'Invalid role. Must be "student", "mentor", or "university"'}), 400
     
     # Check if email already exists
-    existing_user = User.find_by_email(email)
+    existing_user = User.find_by_email(email, projection={'_id': 1})
     if existing_user:
         return jsonify({'error': 'Email already registered'}), 409
     
@@ -481,7 +593,6 @@ def register():
         # If mentor, create default mentor profile
         if role == 'mentor':
             try:
-                from models import MentorProfile
                 default_profile = {
                     'bio': '',
                     'expertise': [],
@@ -552,8 +663,6 @@ def search_mentors():
 def get_mentor_profile(mentor_id):
     """Get mentor profile (for authenticated mentor to view their own profile)"""
     try:
-        from models import MentorProfile
-        
         # Get user info
         user = User.find_by_id(mentor_id)
         if not user:
@@ -607,8 +716,6 @@ def get_mentor_profile(mentor_id):
 def update_mentor_profile(mentor_id):
     """Update mentor profile (for authenticated mentor)"""
     try:
-        from models import MentorProfile
-        
         data = request.get_json()
         if not data:
             return jsonify({'error': 'No data provided'}), 400
@@ -648,6 +755,7 @@ def update_mentor_profile(mentor_id):
         
         # Update profile
         updated_profile = MentorProfile.create_or_update_profile(mentor_id, profile_data)
+        invalidate_public_profile(mentor_id)
         
         return jsonify({
             'message': 'Profile updated successfully',
@@ -770,7 +878,7 @@ def get_mentor_snapshot(mentor_id):
     """Get mentor snapshot data - calculates real metrics from database sessions"""
     try:
         # Fetch all sessions for this mentor from the database
-        sessions = Session.find_by_mentor(mentor_id)
+        sessions = Session.find_by_mentor(mentor_id, projection=SESSION_SCORE_FIELDS)
         
         if not sessions:
             # Return default snapshot if no sessions exist
@@ -781,7 +889,7 @@ def get_mentor_snapshot(mentor_id):
                 'percentileAmongPeers': 0,
                 'sessionsCount': 0,
                 'lastUpdated': datetime.utcnow().isoformat() + 'Z'
-            }), 200
+            })
         
         # Extract scores from all sessions
         all_scores = []
@@ -829,12 +937,10 @@ def get_mentor_snapshot(mentor_id):
         # Calculate percentile among peers (relative to all mentors)
         # Get average score for all mentors
         try:
-            all_mentors_data = User.find({'role': 'mentor'})  # Get all mentors from DB
             mentor_scores = []
             
-            for mentor in all_mentors_data:
-                mentor_id_db = str(mentor.get('_id'))
-                mentor_sessions = Session.find_by_mentor(mentor_id_db)
+            for mentor_id_db in User.get_mentor_ids():
+                mentor_sessions = Session.find_by_mentor(mentor_id_db, projection=SESSION_SCORE_FIELDS)
                 
                 if mentor_sessions:
                     mentor_metrics = []
@@ -876,7 +982,7 @@ def get_mentor_snapshot(mentor_id):
             'lastUpdated': datetime.utcnow().isoformat() + 'Z'
         }
         
-        return jsonify(snapshot_data), 200
+        return jsonify(snapshot_data)
         
     except Exception as e:
         print(f"✗ Error in get_mentor_snapshot: {str(e)}")
@@ -887,22 +993,23 @@ def get_mentor_skills(mentor_id):
     """Get mentor skills data - calculates real metrics from database sessions"""
     try:
         # Fetch all sessions for this mentor from the database
-        sessions = Session.find_by_mentor(mentor_id)
+        sessions = Session.find_by_mentor(mentor_id, projection=SESSION_SCORE_FIELDS)
         
         if not sessions:
             # Return default skills if no sessions exist
             return jsonify({
                 'mentorId': mentor_id,
                 'skills': []
-            }), 200
+            })
         
         # Map to store skill metrics across all sessions
-        skills_map = {}
+        skills_map = defaultdict(lambda: {'scores': [], 'history': defaultdict(list)})
         current_date = datetime.utcnow()
         
-        # Process each session to extract skill metrics
+        # Resolve each session's month once, then walk sessions in chronological order
+        # so every skill's history dict is filled month by month and never needs sorting
+        dated_sessions = []
         for session in sessions:
-            metrics = session.get('metrics', [])
             session_date = session.get('created_at')
             
             if isinstance(session_date, str):
@@ -914,8 +1021,12 @@ def get_mentor_skills(mentor_id):
                 session_date = current_date
             
             # Get month key for history grouping
-            month_key = session_date.strftime('%Y-%m')
-            
+            dated_sessions.append((session_date.strftime('%Y-%m'), session.get('metrics', [])))
+        
+        dated_sessions.sort(key=lambda item: item[0])
+        
+        # Process each session to extract skill metrics
+        for month_key, metrics in dated_sessions:
             # Process each metric as a skill
             for metric in metrics:
                 if not isinstance(metric, dict):
@@ -927,31 +1038,21 @@ def get_mentor_skills(mentor_id):
                 if not metric_name:
                     continue
                 
-                # Initialize skill entry if not exists
-                if metric_name not in skills_map:
-                    skills_map[metric_name] = {
-                        'name': metric_name,
-                        'scores': [],
-                        'history': {}
-                    }
+                entry = skills_map[metric_name]
                 
                 # Add score to overall scores
                 if isinstance(metric_score, (int, float)):
-                    skills_map[metric_name]['scores'].append(metric_score)
+                    entry['scores'].append(metric_score)
                 
                 # Add to history by month
-                if month_key not in skills_map[metric_name]['history']:
-                    skills_map[metric_name]['history'][month_key] = []
-                skills_map[metric_name]['history'][month_key].append(metric_score)
+                entry['history'][month_key].append(metric_score)
         
         # Calculate peer average for each skill across all mentors
         peer_averages = {}
         try:
-            all_mentors_data = User.find({'role': 'mentor'})  # Get all mentors from DB
-            
-            for mentor in all_mentors_data:
-                mentor_id_db = str(mentor.get('_id'))
-                mentor_sessions = Session.find_by_mentor(mentor_id_db)
+            peer_scores = defaultdict(list)
+            for mentor_id_db in User.get_mentor_ids():
+                mentor_sessions = Session.find_by_mentor(mentor_id_db, projection=SESSION_SCORE_FIELDS)
                 
                 if mentor_sessions:
                     for session in mentor_sessions:
@@ -966,19 +1067,15 @@ def get_mentor_skills(mentor_id):
                             if not metric_name:
                                 continue
                             
-                            if metric_name not in peer_averages:
-                                peer_averages[metric_name] = []
-                            
+                            scores = peer_scores[metric_name]
                             if isinstance(metric_score, (int, float)):
-                                peer_averages[metric_name].append(metric_score)
+                                scores.append(metric_score)
             
             # Convert to averages
-            for skill_name in peer_averages:
-                scores = peer_averages[skill_name]
-                if scores:
-                    peer_averages[skill_name] = sum(scores) / len(scores)
-                else:
-                    peer_averages[skill_name] = 0
+            peer_averages = {
+                skill_name: (sum(scores) / len(scores) if scores else 0)
+                for skill_name, scores in peer_scores.items()
+            }
         except Exception as e:
             print(f"⚠ Warning in peer average calculation: {str(e)}")
             peer_averages = {}
@@ -993,10 +1090,9 @@ def get_mentor_skills(mentor_id):
             
             current_score = sum(scores) / len(scores)
             
-            # Calculate history by month
+            # Calculate history by month (already in chronological order)
             history = []
-            for month_key in sorted(skill_data['history'].keys()):
-                month_scores = skill_data['history'][month_key]
+            for month_key, month_scores in skill_data['history'].items():
                 month_avg = sum(month_scores) / len(month_scores)
                 history.append({
                     'month': month_key,
@@ -1024,7 +1120,7 @@ def get_mentor_skills(mentor_id):
                 'previousScore': round(previous_score, 2),
                 'trend': trend,
                 'peerAverage': round(peer_average, 2),
-                'history': history[-12:] if len(history) > 12 else history  # Last 12 months
+                'history': history[-12:]  # Last 12 months
             })
         
         skills_data = {
@@ -1033,7 +1129,7 @@ def get_mentor_skills(mentor_id):
             'lastUpdated': datetime.utcnow().isoformat() + 'Z'
         }
         
-        return jsonify(skills_data), 200
+        return jsonify(skills_data)
         
     except Exception as e:
         print(f"✗ Error in get_mentor_skills: {str(e)}")
@@ -1044,7 +1140,7 @@ def get_mentor_sessions(mentor_id):
     """Get mentor recent sessions"""
     try:
         # First try to load sessions from the DB for this mentor
-        limit = request.args.get('limit', type=int)
+        limit = request_limit()
         sessions = Session.find_by_mentor(mentor_id, limit=limit)
 
         # If DB returned nothing, fall back to dummy JSON
@@ -1054,7 +1150,7 @@ def get_mentor_sessions(mentor_id):
                 data = json.load(f)
             sessions = data.get('sessions', [])
 
-        return jsonify({'sessions': sessions}), 200
+        return jsonify({'sessions': sessions})
     except Exception as e:
         return jsonify({'error': f'Failed to load mentor sessions: {str(e)}'}), 500
 
@@ -1062,20 +1158,21 @@ def get_mentor_sessions(mentor_id):
 def get_session_breakdown(mentor_id, session_id):
     """Get detailed breakdown for a specific session"""
     try:
-        # Try DB first
-        breakdown = Session.find_by_sessionId(session_id)
+        # Try DB first, normalized to the canonical schema; memoized sessions skip
+        # the full document fetch
+        try:
+            normalized = Session.find_normalized(session_id)
+        except Exception as e:
+            print(f"⚠ Could not normalize session {session_id}: {str(e)}")
+            normalized = None
+            # Fallback: return the raw breakdown with internal fields stripped
+            breakdown = Session.find_by_sessionId(session_id)
+            if breakdown:
+                breakdown.pop('_id', None)
+                return jsonify(breakdown)
 
-        if breakdown:
-            # Normalize the DB document to the canonical schema before returning
-            try:
-                normalized = Session.normalize_for_api(breakdown)
-                print(normalized)
-                return jsonify(normalized), 200
-            except Exception as e:
-                # Fallback: return the raw breakdown with internal fields stripped
-                if '_id' in breakdown:
-                    del breakdown['_id']
-                return jsonify(breakdown), 200
+        if normalized:
+            return jsonify(normalized)
 
         # Fallback to static JSON dummy data
         data_path = os.path.join(os.path.dirname(__file__), 'data', 'session_breakdown.json')
@@ -1089,7 +1186,7 @@ def get_session_breakdown(mentor_id, session_id):
         if not breakdown:
             return jsonify({'error': 'No breakdown data found'}), 404
 
-        return jsonify(breakdown), 200
+        return jsonify(breakdown)
     except Exception as e:
         print(f"\n✗ Exception: {e}")
         import traceback
@@ -1114,6 +1211,8 @@ def delete_session(mentor_id, session_id):
         result = Session.delete_session(session_id)
         
         if result:
+            _video_info_cache.pop(session_id, None)
+            mentor_sessions_changed(mentor_id)
             print(f"✓ Deleted session {session_id} for mentor {mentor_id}")
             return jsonify({'message': 'Session deleted successfully', 'sessionId': session_id}), 200
         else:
@@ -1123,19 +1222,40 @@ def delete_session(mentor_id, session_id):
         print(f"✗ Error deleting session: {str(e)}")
         return jsonify({'error': f'Failed to delete session: {str(e)}'}), 500
 
+# Parsed JSON data files keyed by path -> ((mtime_ns, size), data)
+_json_cache = {}
+_uploaded_sessions_lock = threading.Lock()
+
+def _load_json_cached(path):
+    """Load a JSON file, reusing the parsed data until the file's mtime or size changes"""
+    st = os.stat(path)
+    # Nanosecond mtime plus size, so quick successive rewrites aren't missed on coarse-mtime filesystems
+    version = (st.st_mtime_ns, st.st_size)
+    cached = _json_cache.get(path)
+    if cached and cached[0] == version:
+        return cached[1]
+
+    with open(path, 'rb') as f:
+        data = orjson.loads(f.read())
+    _json_cache[path] = (version, data)
+    return data
+
 def load_uploaded_sessions():
     """Load uploaded sessions data, create file if missing"""
     if not os.path.exists(UPLOADED_SESSIONS_FILE):
         with open(UPLOADED_SESSIONS_FILE, 'w') as f:
             json.dump({'sessions': []}, f, indent=2)
 
-    with open(UPLOADED_SESSIONS_FILE, 'r') as f:
-        return json.load(f)
+    return _load_json_cached(UPLOADED_SESSIONS_FILE)
 
 def save_uploaded_sessions(data):
     """Persist uploaded sessions data"""
-    with open(UPLOADED_SESSIONS_FILE, 'w') as f:
-        json.dump(data, f, indent=2)
+    try:
+        with open(UPLOADED_SESSIONS_FILE, 'w') as f:
+            json.dump(data, f, indent=2)
+    finally:
+        # Writes may land within the same mtime tick, so always drop the cached copy
+        _json_cache.pop(UPLOADED_SESSIONS_FILE, None)
 
 def load_public_rankings():
     """Load public rankings data, create file with defaults if missing"""
@@ -1257,8 +1377,7 @@ def load_public_rankings():
         with open(PUBLIC_RANKINGS_FILE, 'w') as f:
             json.dump(default_data, f, indent=2)
 
-    with open(PUBLIC_RANKINGS_FILE, 'r') as f:
-        return json.load(f)
+    return _load_json_cached(PUBLIC_RANKINGS_FILE)
 
 
 @app.route('/api/mentor/<mentor_id>/sessions/uploaded', methods=['GET'])
@@ -1266,13 +1385,17 @@ def get_uploaded_sessions(mentor_id):
     """Return previously uploaded sessions with dummy analysis"""
     try:
         # Prefer DB-backed sessions for this mentor
-        sessions = Session.find_by_mentor(mentor_id)
+        limit = request_limit()
+        sessions = Session.find_by_mentor(mentor_id, limit=limit)
         if sessions:
-            return jsonify({'sessions': sessions}), 200
+            return jsonify({'sessions': sessions})
 
         # Fallback to file-based sessions
         data = load_uploaded_sessions()
-        return jsonify({'sessions': data.get('sessions', [])}), 200
+        file_sessions = data.get('sessions', [])
+        if limit:
+            file_sessions = file_sessions[:limit]
+        return jsonify({'sessions': file_sessions})
     except Exception as e:
         return jsonify({'error': f'Failed to load uploaded sessions: {str(e)}'}), 500
 
@@ -1283,7 +1406,7 @@ def download_cloudinary_video(video_url, session_id):
         temp_filename = os.path.join(UPLOAD_FOLDER, f'cloudinary_{session_id}.mp4')
         
         # Download the video from Cloudinary URL
-        response = requests.get(video_url, timeout=300, stream=True)
+        response = http_session.get(video_url, timeout=300, stream=True)
         response.raise_for_status()
         
         # Write to file in chunks
@@ -1307,15 +1430,14 @@ def get_video_duration(video_path):
     try:
         # Try ffprobe first
         probe_cmd = [
-            'ffprobe', '-v', 'error', '-show_entries', 'format=duration',
-            '-of', 'default=noprint_wrappers=1:nokey=1', video_path
+            'ffprobe', '-v', 'error', '-print_format', 'json', '-show_format', video_path
         ]
         
         try:
             result = subprocess.run(probe_cmd, capture_output=True, text=True, check=True)
-            duration = float(result.stdout.strip())
+            duration = float(json.loads(result.stdout)['format']['duration'])
             return duration
-        except (subprocess.CalledProcessError, ValueError, FileNotFoundError):
+        except (subprocess.CalledProcessError, ValueError, KeyError, TypeError, FileNotFoundError):
             # Fallback to MoviePy
             video = VideoFileClip(video_path)
             duration = video.duration
@@ -1326,6 +1448,518 @@ def get_video_duration(video_path):
         print(f"⚠ Could not get video duration: {e}")
         return 0
 
+def submit_video_duration(video_path):
+    """Start probing the video duration in the background; returns a Future."""
+    return _probe_pool.submit(get_video_duration, video_path)
+
+def strength_tag_for(score):
+    """Map an overall mentor score to its public strength tag"""
+    return STRENGTH_TAGS[bisect_right(STRENGTH_TAG_BOUNDS, score)]
+
+def _clamp_score(score):
+    """Coerce a score to an int in 0-100; None if it isn't numeric"""
+    try:
+        return min(100, max(0, int(float(score))))
+    except (TypeError, ValueError):
+        return None
+
+def _metric_entry(name, score):
+    """Build a schema-compliant metric entry with the score clamped to 0-100; None if not numeric"""
+    score = _clamp_score(score)
+    if score is None:
+        return None
+    return {
+        'name': name,
+        'score': score,
+        'confidenceInterval': [max(0, score - 5), min(100, score + 5)],
+        'whatHelped': [],
+        'whatHurt': []
+    }
+
+def _improvement_message(sentence):
+    """Pick the improvement suggestion for a flagged diarization sentence, falling back to its text"""
+    imp = sentence.get('improvement')
+    msg = ''
+    if isinstance(imp, dict):
+        msg = imp.get('suggestion') or imp.get('reason') or ''
+    elif isinstance(imp, str):
+        msg = imp
+    return msg or (sentence.get('text') or sentence.get('transcript') or '')[:200]
+
+def video_multipart(video_file, fields=None):
+    """Build a streaming multipart body for an open video file; returns (encoder, headers)"""
+    encoder = MultipartEncoder(fields={**(fields or {}), 'file': ('video.mp4', video_file, 'video/mp4')})
+    return encoder, {'Content-Type': encoder.content_type}
+
+def load_service_json(content):
+    """
+    Parse a service response body. Python services emit NaN/Infinity via json.dumps,
+    which orjson rejects, so fall back to the stdlib parser for those.
+    """
+    try:
+        return orjson.loads(content)
+    except orjson.JSONDecodeError:
+        return json.loads(content)
+
+def dump_service_result(kind, session_id, result):
+    """
+    Write a raw service response to data/<kind>_<session_id>.json when DEBUG_DUMP_JSON is set.
+    The session document in MongoDB is the source of truth, so by default nothing is written.
+    Returns the file path, or None when not dumped.
+    """
+    if not os.getenv('DEBUG_DUMP_JSON'):
+        return None
+    filename = os.path.join(DATA_DIR, f'{kind}_{session_id}.json')
+    with open(filename, 'wb') as f:
+        f.write(orjson.dumps(result, default=str))
+    return filename
+
+def call_analysis(local_video_path, video_url, context_text, session_id):
+    """Call the external analysis service (service 1); returns (result, saved_filename)"""
+    analysis_result = None
+    analysis_filename = None
+    try:
+        # Call analysis service if we have either a local video path or a video URL
+        if local_video_path or video_url:
+            analysis_url = os.getenv('ANALYSIS_SERVICE_URL')
+            
+            # Priority 1: Send local video file if available
+            if local_video_path and os.path.exists(local_video_path):
+                try:
+                    file_size = os.path.getsize(local_video_path)
+                    data_to_send = {'context': context_text} if context_text else {}
+                    
+                    print(f"→ Sending local video to analysis service (POST)... (size: {file_size} bytes)")
+                    print(f"→ Analysis URL: {analysis_url}")
+                    print(f"→ Form fields: file={file_size} bytes, context={len(context_text)} chars")
+                    
+                    # Stream the file from disk into the request body instead of buffering it
+                    with open(local_video_path, 'rb') as f:
+                        body, headers = video_multipart(f, data_to_send)
+                        resp = http_session.post(analysis_url, data=body, headers=headers, timeout=300)
+                    
+                    print(f"← Analysis service response: {resp.status_code}")
+                    
+                    if resp.ok:
+                        analysis_result = load_service_json(resp.content)
+                        analysis_filename = dump_service_result('analysis', session_id, analysis_result)
+                        print(f"✓ Analysis service returned results")
+                    else:
+                        print(f"⚠ Analysis service error: {resp.status_code}")
+                        print(f"⚠ Response preview: {resp.text[:500]}")
+                        try:
+                            analysis_result = load_service_json(resp.content)
+                        except Exception:
+                            analysis_result = {'error': f'Analysis service returned status {resp.status_code}: {resp.text[:200]}'}
+                except Exception as e:
+                    print(f"⚠ Local file upload failed: {str(e)}")
+                    import traceback
+                    traceback.print_exc()
+                    
+                    # Fallback to URL-based analysis if video_url exists
+                    if video_url:
+                        print(f"→ Falling back to URL-based analysis (POST)...")
+                        analysis_data = {
+                            'context': context_text,
+                            'video_url': video_url
+                        }
+                        try:
+                            resp = http_session.post(analysis_url, json=analysis_data, timeout=120)
+                            print(f"← Analysis service (URL fallback) response: {resp.status_code}")
+                            
+                            if resp.ok:
+                                analysis_result = load_service_json(resp.content)
+                                analysis_filename = dump_service_result('analysis', session_id, analysis_result)
+                                print(f"✓ Analysis service (URL fallback) returned results")
+                            else:
+                                try:
+                                    analysis_result = load_service_json(resp.content)
+                                except Exception:
+                                    analysis_result = {'error': f'Analysis service returned status {resp.status_code}'}
+                        except Exception as url_error:
+                            analysis_result = {'error': f'URL fallback failed: {str(url_error)}'}
+                    else:
+                        analysis_result = {'error': f'File upload failed and no URL available: {str(e)}'}
+            
+            # Priority 2: Send URL if no local video
+            elif video_url:
+                try:
+                    analysis_data = {
+                        'context': context_text,
+                        'video_url': video_url
+                    }
+                    print(f"→ Sending video URL to analysis service...")
+                    resp = http_session.post(analysis_url, json=analysis_data, timeout=120)
+                    if resp.ok:
+                        analysis_result = load_service_json(resp.content)
+                        analysis_filename = dump_service_result('analysis', session_id, analysis_result)
+                        print(f"✓ Analysis service returned results")
+                    else:
+                        try:
+                            analysis_result = load_service_json(resp.content)
+                        except Exception:
+                            analysis_result = {'error': f'Analysis service returned status {resp.status_code}'}
+                        print(f"⚠ Analysis service error: {resp.status_code}")
+                except Exception as e:
+                    analysis_result = {'error': f'Failed to call analysis service: {str(e)}'}
+    except Exception as e:
+        analysis_result = {'error': f'Failed to call analysis service: {str(e)}'}
+
+    return analysis_result, analysis_filename
+
+def call_diarization(local_video_path, video_url, session_id):
+    """Call the diarization service (service 2); returns (result, saved_filename)"""
+    diarization_result = None
+    diarization_filename = None
+    try:
+        # Call diarization service if we have either a local video path or a video URL
+        if local_video_path or video_url:
+            diarization_url = os.getenv('DIARIZATION_SERVICE_URL')
+            
+            if not diarization_url:
+                print(f"⚠ DIARIZATION_SERVICE_URL not configured")
+                diarization_result = {'error': 'Diarization service not configured'}
+            else:
+                # Priority 1: Send local video file if available
+                if local_video_path and os.path.exists(local_video_path):
+                    try:
+                        file_size = os.path.getsize(local_video_path)
+                        
+                        print(f"→ Sending local video to diarization service (POST)... (size: {file_size} bytes)")
+                        print(f"→ Diarization URL: {diarization_url}")
+                        
+                        # Stream the file from disk into the request body instead of buffering it
+                        with open(local_video_path, 'rb') as f:
+                            body, headers = video_multipart(f)
+                            resp2 = http_session.post(diarization_url, data=body, headers=headers, timeout=300)
+                        
+                        print(f"← Diarization service response: {resp2.status_code}")
+                        
+                        if resp2.ok:
+                            diarization_result = load_service_json(resp2.content)
+                            diarization_filename = dump_service_result('diarization', session_id, diarization_result)
+                            print(f"✓ Diarization service returned results")
+                        else:
+                            print(f"⚠ Diarization service error: {resp2.status_code}")
+                            print(f"⚠ Response preview: {resp2.text[:500]}")
+                            try:
+                                diarization_result = load_service_json(resp2.content)
+                            except Exception:
+                                diarization_result = {'error': f'Diarization service returned status {resp2.status_code}: {resp2.text[:200]}'}
+                    except Exception as e:
+                        print(f"⚠ Local file upload failed: {str(e)}")
+                        import traceback
+                        traceback.print_exc()
+                        
+                        # Fallback to URL-based diarization if video_url exists
+                        if video_url:
+                            print(f"→ Falling back to URL-based diarization...")
+                            diarization_result = _send_video_url_to_diarization(video_url, diarization_url, session_id) # type: ignore
+                        else:
+                            diarization_result = {'error': f'File upload failed and no URL available: {str(e)}'}
+                
+                # Priority 2: Send video from URL (download and upload)
+                elif video_url:
+                    print(f"→ Downloading video from S3 URL and sending to diarization service...")
+                    try:
+                        # Download video from S3/Cloudinary URL
+                        print(f"→ Downloading video from: {video_url}")
+                        video_response = http_session.get(video_url, timeout=300, stream=True)
+                        video_response.raise_for_status()
+                        
+                        # Get file size
+                        file_size = len(video_response.content)
+                        print(f"✓ Downloaded video (size: {file_size} bytes)")
+                        
+                        # Send to diarization service as multipart form-data
+                        files = {'file': ('video.mp4', video_response.content, 'video/mp4')}
+                        
+                        print(f"→ Sending downloaded video to diarization service...")
+                        print(f"→ Diarization URL: {diarization_url}")
+                        
+                        resp2 = http_session.post(diarization_url, files=files, timeout=300)
+                        
+                        print(f"← Diarization service response: {resp2.status_code}")
+                        
+                        if resp2.ok:
+                            diarization_result = load_service_json(resp2.content)
+                            diarization_filename = dump_service_result('diarization', session_id, diarization_result)
+                            print(f"✓ Diarization service returned results")
+                        else:
+                            print(f"⚠ Diarization service error: {resp2.status_code}")
+                            print(f"⚠ Response preview: {resp2.text[:500]}")
+                            try:
+                                diarization_result = load_service_json(resp2.content)
+                            except Exception:
+                                diarization_result = {'error': f'Diarization service returned status {resp2.status_code}: {resp2.text[:200]}'}
+                    except Exception as download_error:
+                        print(f"⚠ Failed to download or process video from URL: {str(download_error)}")
+                        diarization_result = {'error': f'Failed to download video from URL: {str(download_error)}'}
+    except Exception as e:
+        diarization_result = {'error': f'Failed to call diarization service: {str(e)}'}
+
+    return diarization_result, diarization_filename
+
+def queue_profile_update(mentor_id, session):
+    """Schedule a mentor profile recompute for the next batch (see _flush_profile_updates)"""
+    _profile_update_queue.put((mentor_id, session))
+
+def _flush_profile_updates():
+    """Drain queued profile updates and recompute each mentor's profile once"""
+    pending = {}
+    while True:
+        try:
+            mentor_id, session = _profile_update_queue.get_nowait()
+        except queue.Empty:
+            break
+        pending[mentor_id] = session  # keep only the latest session per mentor
+
+    for mentor_id, session in pending.items():
+        try:
+            MentorProfile.update_profile_on_new_session(mentor_id, session)
+            invalidate_public_profile(mentor_id)
+            print(f"✓ Updated mentor profile for {mentor_id} after new session")
+        except Exception as profile_update_error:
+            print(f"⚠ Could not update mentor profile: {str(profile_update_error)}")
+
+def _profile_update_worker():
+    while True:
+        time.sleep(PROFILE_UPDATE_INTERVAL_SECONDS)
+        _flush_profile_updates()
+
+threading.Thread(target=_profile_update_worker, name='profile-updates', daemon=True).start()
+atexit.register(_flush_profile_updates)
+
+def generate_ai_summary(prompt, model='gemini-2.5-flash'):
+    """Summarize a transcript prompt with Gemini, memoized per prompt hash (LRU)"""
+    key = hashlib.sha256(f'{model}\n{prompt}'.encode()).hexdigest()
+    with _summary_cache_lock:
+        if key in _summary_cache:
+            _summary_cache.move_to_end(key)
+            return _summary_cache[key]
+
+    client = get_gemini_client()
+    if client is None:
+        raise RuntimeError('Gemini client unavailable (google-genai missing or GEMINI_API_KEY unset)')
+    response = client.models.generate_content(model=model, contents=prompt)
+    summary = response.text if hasattr(response, 'text') else None
+
+    if summary:
+        with _summary_cache_lock:
+            _summary_cache[key] = summary
+            if len(_summary_cache) > SUMMARY_CACHE_SIZE:
+                _summary_cache.popitem(last=False)
+    return summary
+
+def run_analysis_pipeline(new_session, local_video_path, video_url, context_text, duration_future=None):
+    """
+    Run the slow part of a session upload in the background: call the analysis and
+    diarization services, enrich the session, and persist it over the pending placeholder.
+    """
+    session_id = new_session['sessionId']
+    mentor_id = new_session.get('mentorId')
+    user_id = new_session.get('userId')
+    session_name = new_session.get('sessionName')
+    saved = None
+
+    try:
+        # Analysis and diarization are independent, so call both services concurrently and
+        # only block at the merge point. There is no overall deadline: each request has its
+        # own socket timeout, and an upload plus URL fallback plus retries can legitimately
+        # run long. Leaving the block waits for both calls, so neither outlives the session.
+        with ThreadPoolExecutor(max_workers=2, thread_name_prefix='service-call') as executor:
+            analysis_future = executor.submit(call_analysis, local_video_path, video_url, context_text, session_id)
+            diarization_future = executor.submit(call_diarization, local_video_path, video_url, session_id)
+        analysis_result, analysis_filename = analysis_future.result()
+        diarization_result, diarization_filename = diarization_future.result()
+
+        if duration_future is not None:
+            new_session['duration'] = duration_future.result()
+            print(f"✓ Video duration: {new_session['duration']}s")
+
+        # Clean up local video file after processing (optional - keep for debugging)
+        try:
+            if local_video_path and os.path.exists(local_video_path):
+                # Uncomment to auto-delete after processing:
+                # os.remove(local_video_path)
+                print(f"✓ Local video kept for reference: {local_video_path}")
+        except Exception as e:
+            print(f"⚠ Could not clean up video: {e}")
+
+        # Attach analysis and diarization results to session
+        if analysis_filename:
+            new_session['analysisFile'] = os.path.basename(analysis_filename)
+            new_session['analysis'] = analysis_result
+        else:
+            new_session['analysis'] = analysis_result
+
+        if diarization_filename:
+            new_session['diarizationFile'] = os.path.basename(diarization_filename)
+            new_session['diarization'] = diarization_result
+        else:
+            new_session['diarization'] = diarization_result
+
+        # Enrich session document using analysis & diarization results
+        try:
+            # Build metrics list from analysis_result with proper schema compliance
+            metrics = []
+            if isinstance(analysis_result, dict):
+                for k, label in METRIC_KEYS:
+                    val = analysis_result.get(k)
+                    if isinstance(val, dict):
+                        val = val.get('score')
+                    if isinstance(val, (int, float, str)):
+                        entry = _metric_entry(label, val)
+                        if entry:
+                            metrics.append(entry)
+
+                # Overall score
+                overall = analysis_result.get('overall_score') or analysis_result.get('overallScore')
+                if overall is not None:
+                    entry = _metric_entry('Overall', overall)
+                    if entry:
+                        metrics.append(entry)
+
+            # Build weakMoments from diarization (sentences flagged for improvement)
+            weak_moments = []
+            timeline_transcript = []
+            sentences = diarization_result.get('sentences') if isinstance(diarization_result, dict) else None
+            # Failed diarization ({'error': ...}) has no sentences; skip straight to the empty timeline
+            if sentences:
+                try:
+                    timeline_transcript = [
+                        {
+                            'startTime': float(s.get('start', 0)),
+                            'endTime': float(s.get('end', 0)),
+                            'text': s.get('text') or s.get('transcript') or '',
+                            'keyPhrases': []
+                        }
+                        for s in sentences
+                    ]
+                    weak_moments = [
+                        {
+                            'timestamp': _format_timestamp(s.get('start', 0)),
+                            'message': _improvement_message(s)
+                        }
+                        for s in sentences
+                        if s.get('needs_improvement') or s.get('needsImprovement')
+                    ]
+                except Exception:
+                    weak_moments = []
+                    timeline_transcript = []
+
+            # Add timeline and metrics to session
+            new_session['metrics'] = metrics
+            new_session['timeline'] = {
+                'audio': [],
+                'video': [],
+                'transcript': timeline_transcript,
+                'scoreDips': [],
+                'scorePeaks': []
+            }
+            new_session['weakMoments'] = weak_moments
+
+            # Use Gemini to produce an AI summary from transcript
+            ai_summary = None
+            try:
+                if os.getenv('GEMINI_API_KEY'):
+                    try:
+                        transcript_text = ''
+                        if isinstance(analysis_result, dict):
+                            transcript_text = analysis_result.get('transcript') or ''
+                        if not transcript_text and timeline_transcript:
+                            transcript_text = ' '.join([t['text'] for t in timeline_transcript[:50]])
+
+                        if transcript_text:
+                            prompt = f"Summarize the following session transcript in 2 concise sentences and give 3 short improvement suggestions:\n\n{transcript_text[:3000]}"
+                            ai_summary = generate_ai_summary(prompt)
+                    except Exception:
+                        ai_summary = None
+            except Exception:
+                ai_summary = None
+
+            if ai_summary:
+                new_session['aiSummary'] = ai_summary
+
+        except Exception as e:
+            print(f"⚠ Could not enrich session {session_id}: {str(e)}")
+
+        # Save to DB once, over the 'processing' placeholder the request handler stored
+        new_session['status'] = 'completed'
+        try:
+            saved = Session.finalize_pending_session(new_session)
+            # The video endpoint may have seen the placeholder; drop it so the final duration is served
+            _video_info_cache.pop(session_id, None)
+            if mentor_id:
+                mentor_sessions_changed(mentor_id)
+        except Exception as e:
+            print(f"✗ Failed to save session {session_id}: {str(e)}")
+            saved = None
+
+        # Queue the mentor profile recompute; bursts of uploads collapse into one update
+        if saved and mentor_id:
+            queue_profile_update(mentor_id, saved)
+
+        # Also keep file-based list for backward compatibility
+        # Pipelines run concurrently, so serialize the read-modify-write of the file
+        with _uploaded_sessions_lock:
+            try:
+                uploaded_sessions = load_uploaded_sessions()
+                sessions_list = uploaded_sessions.get('sessions', [])
+        
+                session_summary = {
+                    'id': session_id,
+                    'sessionId': session_id,
+                    'sessionName': session_name,
+                    'created_at': new_session.get('created_at', datetime.utcnow()).isoformat(),
+                    'weakMoments': new_session.get('weakMoments', []),
+                    'uploadedFile': new_session.get('uploadedFile'),
+                    'mentorId': mentor_id,
+                    'userId': user_id
+                }
+                if new_session.get('metrics'):
+                    overall_metrics = [m for m in new_session['metrics'] if m.get('name') == 'Overall']
+                    if overall_metrics:
+                        session_summary['score'] = overall_metrics[0].get('score', 0)
+                    else:
+                        avg_score = sum(m.get('score', 0) for m in new_session['metrics']) / len(new_session['metrics']) if new_session['metrics'] else 0
+                        session_summary['score'] = int(avg_score)
+        
+                sessions_list.insert(0, session_summary)
+                uploaded_sessions['sessions'] = sessions_list
+                save_uploaded_sessions(uploaded_sessions)
+            except Exception:
+                pass
+
+        if not saved:
+            Session.update_session(session_id, {'status': 'failed', 'error': 'Failed to save analyzed session'})
+    except Exception as e:
+        print(f"✗ Analysis pipeline failed for {session_id}: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        try:
+            Session.update_session(session_id, {'status': 'failed', 'error': str(e)})
+        except Exception:
+            pass
+
+    return saved
+
+@app.route('/api/mentor/<mentor_id>/sessions/<session_id>/status', methods=['GET'])
+def get_session_status(mentor_id, session_id):
+    """Poll the processing status of a session submitted to the analyze endpoint"""
+    try:
+        session = Session.find_by_sessionId(session_id)
+        if not session:
+            return jsonify({'error': 'Session not found'}), 404
+
+        payload = {'sessionId': session_id, 'status': session.get('status', 'completed')}
+        if session.get('error'):
+            payload['error'] = session['error']
+        return jsonify(payload), 200
+    except Exception as e:
+        print(f"✗ Error fetching session status: {str(e)}")
+        return jsonify({'error': 'Failed to fetch session status'}), 500
+
 @app.route('/api/mentor/<mentor_id>/sessions/analyze', methods=['POST'])
 def analyze_video_from_url(mentor_id):
     """
@@ -1354,10 +1988,11 @@ def analyze_video_from_url(mentor_id):
     """
     
     try:
-        session_id = f'session_{uuid.uuid4().hex[:8]}'
+        session_id = Session.generate_session_id()
         local_video_path = None
         video_url = None
         video_duration = 0
+        duration_future = None
         upload_source = None  # 'file' or 'url'
         context_text = ''
         session_name = f'Session {datetime.utcnow().strftime("%b %d %H:%M")}'
@@ -1392,9 +2027,9 @@ def analyze_video_from_url(mentor_id):
                 if not os.path.exists(local_video_path):
                     return jsonify({'error': 'File save failed - file does not exist'}), 400
                 
-                # Get video duration
-                video_duration = get_video_duration(local_video_path)
-                print(f"✓ File upload: {saved_filename} (duration: {video_duration}s)")
+                # Probe duration in the background; it's resolved before the session is saved
+                duration_future = submit_video_duration(local_video_path)
+                print(f"✓ File upload: {saved_filename}")
                 upload_source = 'file'
                 
             except Exception as e:
@@ -1426,8 +2061,8 @@ def analyze_video_from_url(mentor_id):
             if 'cloudinary' in video_url.lower() or upload_mode == 'file':
                 try:
                     local_video_path = download_cloudinary_video(video_url, session_id)
-                    video_duration = get_video_duration(local_video_path)
-                    print(f"✓ Cloudinary video downloaded: {video_url} (duration: {video_duration}s)")
+                    duration_future = submit_video_duration(local_video_path)
+                    print(f"✓ Cloudinary video downloaded: {video_url}")
                     upload_source = 'file'
                     
                 except Exception as e:
@@ -1473,641 +2108,224 @@ def analyze_video_from_url(mentor_id):
         }
 
         print(new_session)
-        # Call external analysis service (service 1) if available
-        analysis_result = None
-        analysis_filename = None
-        try:
-            # Call analysis service if we have either a local video path or a video URL
-            if local_video_path or video_url:
-                analysis_url = os.getenv('ANALYSIS_SERVICE_URL')
-                
-                # Priority 1: Send local video file if available
-                if local_video_path and os.path.exists(local_video_path):
-                    try:
-                        # Read file content first
-                        with open(local_video_path, 'rb') as f:
-                            file_content = f.read()
-                        
-                        # Create multipart form data with file field
-                        files = {'file': ('video.mp4', file_content, 'video/mp4')}
-                        data_to_send = {'context': context_text} if context_text else {}
-                        
-                        print(f"→ Sending local video to analysis service (POST)... (size: {len(file_content)} bytes)")
-                        print(f"→ Analysis URL: {analysis_url}")
-                        print(f"→ Form fields: file={len(file_content)} bytes, context={len(context_text)} chars")
-                        
-                        resp = requests.post(analysis_url, files=files, data=data_to_send, timeout=300)
-                        
-                        print(f"← Analysis service response: {resp.status_code}")
-                        
-                        if resp.ok:
-                            analysis_result = resp.json()
-                            analysis_filename = os.path.join(DATA_DIR, f'analysis_{session_id}.json')
-                            with open(analysis_filename, 'w') as af:
-                                json.dump(analysis_result, af)
-                            print(f"✓ Analysis service returned results (saved to {analysis_filename})")
-                        else:
-                            print(f"⚠ Analysis service error: {resp.status_code}")
-                            print(f"⚠ Response preview: {resp.text[:500]}")
-                            try:
-                                analysis_result = resp.json()
-                            except Exception:
-                                analysis_result = {'error': f'Analysis service returned status {resp.status_code}: {resp.text[:200]}'}
-                    except Exception as e:
-                        print(f"⚠ Local file upload failed: {str(e)}")
-                        import traceback
-                        traceback.print_exc()
-                        
-                        # Fallback to URL-based analysis if video_url exists
-                        if video_url:
-                            print(f"→ Falling back to URL-based analysis (POST)...")
-                            analysis_data = {
-                                'context': context_text,
-                                'video_url': video_url
-                            }
-                            try:
-                                resp = requests.post(analysis_url, json=analysis_data, timeout=120)
-                                print(f"← Analysis service (URL fallback) response: {resp.status_code}")
-                                
-                                if resp.ok:
-                                    analysis_result = resp.json()
-                                    analysis_filename = os.path.join(DATA_DIR, f'analysis_{session_id}.json')
-                                    with open(analysis_filename, 'w') as af:
-                                        json.dump(analysis_result, af)
-                                    print(f"✓ Analysis service (URL fallback) returned results")
-                                else:
-                                    try:
-                                        analysis_result = resp.json()
-                                    except Exception:
-                                        analysis_result = {'error': f'Analysis service returned status {resp.status_code}'}
-                            except Exception as url_error:
-                                analysis_result = {'error': f'URL fallback failed: {str(url_error)}'}
-                        else:
-                            analysis_result = {'error': f'File upload failed and no URL available: {str(e)}'}
-                
-                # Priority 2: Send URL if no local video
-                elif video_url:
-                    try:
-                        analysis_data = {
-                            'context': context_text,
-                            'video_url': video_url
-                        }
-                        print(f"→ Sending video URL to analysis service...")
-                        resp = requests.post(analysis_url, json=analysis_data, timeout=120)
-                        if resp.ok:
-                            analysis_result = resp.json()
-                            analysis_filename = os.path.join(DATA_DIR, f'analysis_{session_id}.json')
-                            with open(analysis_filename, 'w') as af:
-                                json.dump(analysis_result, af)
-                            print(f"✓ Analysis service returned results")
-                        else:
-                            try:
-                                analysis_result = resp.json()
-                            except Exception:
-                                analysis_result = {'error': f'Analysis service returned status {resp.status_code}'}
-                            print(f"⚠ Analysis service error: {resp.status_code}")
-                    except Exception as e:
-                        analysis_result = {'error': f'Failed to call analysis service: {str(e)}'}
-        except Exception as e:
-            analysis_result = {'error': f'Failed to call analysis service: {str(e)}'}
-
-        # Call diarization service (service 2)
-        diarization_result = None
-        diarization_filename = None
-        try:
-            # Call diarization service if we have either a local video path or a video URL
-            if local_video_path or video_url:
-                diarization_url = os.getenv('DIARIZATION_SERVICE_URL')
-                
-                if not diarization_url:
-                    print(f"⚠ DIARIZATION_SERVICE_URL not configured")
-                    diarization_result = {'error': 'Diarization service not configured'}
-                else:
-                    # Priority 1: Send local video file if available
-                    if local_video_path and os.path.exists(local_video_path):
-                        try:
-                            # Read file content
-                            with open(local_video_path, 'rb') as f:
-                                file_content = f.read()
-                            
-                            # Create multipart form data with file field
-                            files = {'file': ('video.mp4', file_content, 'video/mp4')}
-                            
-                            print(f"→ Sending local video to diarization service (POST)... (size: {len(file_content)} bytes)")
-                            print(f"→ Diarization URL: {diarization_url}")
-                            
-                            resp2 = requests.post(diarization_url, files=files, timeout=300)
-                            
-                            print(f"← Diarization service response: {resp2.status_code}")
-                            
-                            if resp2.ok:
-                                diarization_result = resp2.json()
-                                diarization_filename = os.path.join(DATA_DIR, f'diarization_{session_id}.json')
-                                with open(diarization_filename, 'w') as df:
-                                    json.dump(diarization_result, df)
-                                print(f"✓ Diarization service returned results (saved to {diarization_filename})")
-                            else:
-                                print(f"⚠ Diarization service error: {resp2.status_code}")
-                                print(f"⚠ Response preview: {resp2.text[:500]}")
-                                try:
-                                    diarization_result = resp2.json()
-                                except Exception:
-                                    diarization_result = {'error': f'Diarization service returned status {resp2.status_code}: {resp2.text[:200]}'}
-                        except Exception as e:
-                            print(f"⚠ Local file upload failed: {str(e)}")
-                            import traceback
-                            traceback.print_exc()
-                            
-                            # Fallback to URL-based diarization if video_url exists
-                            if video_url:
-                                print(f"→ Falling back to URL-based diarization...")
-                                diarization_result = _send_video_url_to_diarization(video_url, diarization_url, session_id) # type: ignore
-                            else:
-                                diarization_result = {'error': f'File upload failed and no URL available: {str(e)}'}
-                    
-                    # Priority 2: Send video from URL (download and upload)
-                    elif video_url:
-                        print(f"→ Downloading video from S3 URL and sending to diarization service...")
-                        try:
-                            # Download video from S3/Cloudinary URL
-                            print(f"→ Downloading video from: {video_url}")
-                            video_response = requests.get(video_url, timeout=300, stream=True)
-                            video_response.raise_for_status()
-                            
-                            # Get file size
-                            file_size = len(video_response.content)
-                            print(f"✓ Downloaded video (size: {file_size} bytes)")
-                            
-                            # Send to diarization service as multipart form-data
-                            files = {'file': ('video.mp4', video_response.content, 'video/mp4')}
-                            
-                            print(f"→ Sending downloaded video to diarization service...")
-                            print(f"→ Diarization URL: {diarization_url}")
-                            
-                            resp2 = requests.post(diarization_url, files=files, timeout=300)
-                            
-                            print(f"← Diarization service response: {resp2.status_code}")
-                            
-                            if resp2.ok:
-                                diarization_result = resp2.json()
-                                diarization_filename = os.path.join(DATA_DIR, f'diarization_{session_id}.json')
-                                with open(diarization_filename, 'w') as df:
-                                    json.dump(diarization_result, df)
-                                print(f"✓ Diarization service returned results (saved to {diarization_filename})")
-                            else:
-                                print(f"⚠ Diarization service error: {resp2.status_code}")
-                                print(f"⚠ Response preview: {resp2.text[:500]}")
-                                try:
-                                    diarization_result = resp2.json()
-                                except Exception:
-                                    diarization_result = {'error': f'Diarization service returned status {resp2.status_code}: {resp2.text[:200]}'}
-                        except Exception as download_error:
-                            print(f"⚠ Failed to download or process video from URL: {str(download_error)}")
-                            diarization_result = {'error': f'Failed to download video from URL: {str(download_error)}'}
-        except Exception as e:
-            diarization_result = {'error': f'Failed to call diarization service: {str(e)}'}
-        
-        # Clean up local video file after processing (optional - keep for debugging)
-        try:
-            if local_video_path and os.path.exists(local_video_path):
-                # Uncomment to auto-delete after processing:
-                # os.remove(local_video_path)
-                print(f"✓ Local video kept for reference: {local_video_path}")
-        except Exception as e:
-            print(f"⚠ Could not clean up video: {e}")
-
-        # Attach analysis and diarization results to session
-        if analysis_filename:
-            new_session['analysisFile'] = os.path.basename(analysis_filename)
-            new_session['analysis'] = analysis_result
-        else:
-            new_session['analysis'] = analysis_result
-
-        if diarization_filename:
-            new_session['diarizationFile'] = os.path.basename(diarization_filename)
-            new_session['diarization'] = diarization_result
-        else:
-            new_session['diarization'] = diarization_result
-
-        # Enrich session document using analysis & diarization results
-        try:
-            # Build metrics list from analysis_result with proper schema compliance
-            metrics = []
-            if isinstance(analysis_result, dict):
-                key_map = {
-                    'clarity': 'Clarity',
-                    'communication': 'Communication',
-                    'engagement': 'Engagement',
-                    'technical_depth': 'Technical Depth',
-                    'interaction': 'Interaction',
-                    'pacing': 'Pacing',
-                    'eye_contact': 'Eye Contact',
-                    'gestures': 'Gestures'
-                }
-                for k, label in key_map.items():
-                    val = analysis_result.get(k)
-                    score = None
-                    if isinstance(val, dict):
-                        score = val.get('score')
-                    elif isinstance(val, (int, float)):
-                        score = val
-                    if score is not None:
-                        try:
-                            score = int(float(score))
-                            score = max(0, min(100, score))
-                            metrics.append({
-                                'name': label,
-                                'score': score,
-                                'confidenceInterval': [max(0, score - 5), min(100, score + 5)],
-                                'whatHelped': [],
-                                'whatHurt': []
-                            })
-                        except Exception:
-                            pass
-
-                # Overall score
-                overall = analysis_result.get('overall_score') or analysis_result.get('overallScore')
-                if overall is not None:
-                    try:
-                        overall_score = int(float(overall))
-                        overall_score = max(0, min(100, overall_score))
-                        metrics.append({
-                            'name': 'Overall',
-                            'score': overall_score,
-                            'confidenceInterval': [max(0, overall_score - 5), min(100, overall_score + 5)],
-                            'whatHelped': [],
-                            'whatHurt': []
-                        })
-                    except Exception:
-                        pass
+        # Persist a placeholder right away and hand the slow work to a background worker;
+        # clients poll the status endpoint until it flips to 'completed' or 'failed'
+        new_session['status'] = 'processing'
+        pending = Session.create_pending_session(new_session)
+        pending['id'] = session_id
+        _pipeline_pool.submit(run_analysis_pipeline, new_session, local_video_path, video_url, context_text, duration_future)
 
-            # Build weakMoments from diarization (sentences flagged for improvement)
-            weak_moments = []
-            timeline_transcript = []
-            try:
-                sentences = []
-                if isinstance(diarization_result, dict):
-                    sentences = diarization_result.get('sentences') or []
-
-                def _format_hms(sec):
-                    sec = int(sec or 0)
-                    h = sec // 3600
-                    m = (sec % 3600) // 60
-                    s = sec % 60
-                    return f"{h:02d}:{m:02d}:{s:02d}"
-
-                for s in sentences:
-                    start = s.get('start', 0)
-                    end = s.get('end', 0)
-                    text = s.get('text') or s.get('transcript') or ''
-                    timeline_transcript.append({
-                        'startTime': float(start),
-                        'endTime': float(end),
-                        'text': text,
-                        'keyPhrases': []
-                    })
-
-                    needs = s.get('needs_improvement') or s.get('needsImprovement') or False
-                    if needs:
-                        imp = s.get('improvement') or s.get('improvement', {})
-                        msg = ''
-                        if isinstance(imp, dict):
-                            msg = imp.get('suggestion') or imp.get('reason') or ''
-                        elif isinstance(imp, str):
-                            msg = imp
-                        if not msg:
-                            msg = text[:200]
-
-                        weak_moments.append({
-                            'timestamp': _format_hms(start),
-                            'message': msg
-                        })
-            except Exception:
-                weak_moments = []
-                timeline_transcript = []
-
-            # Add timeline and metrics to session
-            new_session['metrics'] = metrics
-            new_session['timeline'] = {
-                'audio': [],
-                'video': [],
-                'transcript': timeline_transcript,
-                'scoreDips': [],
-                'scorePeaks': []
-            }
-            new_session['weakMoments'] = weak_moments
-
-            # Use Gemini to produce an AI summary from transcript
-            ai_summary = None
-            try:
-                if os.getenv('GEMINI_API_KEY'):
-                    try:
-                        from google import genai
-                        client = genai.Client(api_key=os.getenv('GEMINI_API_KEY'))
-                        transcript_text = ''
-                        if isinstance(analysis_result, dict):
-                            transcript_text = analysis_result.get('transcript') or ''
-                        if not transcript_text and timeline_transcript:
-                            transcript_text = ' '.join([t['text'] for t in timeline_transcript[:50]])
+        return jsonify({
+            'message': 'Video analysis started.',
+            'sessionId': session_id,
+            'status': 'processing',
+            'session': pending
+        }), 202
+    except Exception as e:
+        return jsonify({'error': f'Failed to analyze video: {str(e)}'}), 500
 
-                        if transcript_text:
-                            prompt = f"Summarize the following session transcript in 2 concise sentences and give 3 short improvement suggestions:\n\n{transcript_text[:3000]}"
-                            response = client.models.generate_content(
-                                model='gemini-2.5-flash',
-                                contents=prompt
-                            )
-                            ai_summary = response.text if hasattr(response, 'text') else None
-                    except Exception:
-                        ai_summary = None
-            except Exception:
-                ai_summary = None
+def _static_public_rankings(subject=None, language=None, experience=None, window=None):
+    """Filter and sanitize the static public rankings file (used when the DB has no mentors)"""
+    data = load_public_rankings()
+    rankings = data.get('rankings', [])
 
-            if ai_summary:
-                new_session['aiSummary'] = ai_summary
+    def matches(item):
+        return (
+            (not subject or item.get('subject') == subject) and
+            (not language or item.get('language') == language) and
+            (not experience or item.get('experienceLevel') == experience) and
+            (not window or item.get('timeWindow') == window)
+        )
 
-            # Save to DB
-            try:
-                saved = Session.create_session(new_session)
-                
-                # Update mentor profile with new session metrics
-                if saved and mentor_id:
-                    try:
-                        from models import MentorProfile
-                        MentorProfile.update_profile_on_new_session(mentor_id, saved)
-                        print(f"✓ Updated mentor profile for {mentor_id} after new session")
-                    except Exception as profile_update_error:
-                        print(f"⚠ Could not update mentor profile: {str(profile_update_error)}")
-            except Exception:
-                saved = None
-        except Exception as e:
-            try:
-                saved = Session.create_session(new_session)
-                
-                # Update mentor profile with new session metrics
-                if saved and mentor_id:
-                    try:
-                        from models import MentorProfile
-                        MentorProfile.update_profile_on_new_session(mentor_id, saved)
-                        print(f"✓ Updated mentor profile for {mentor_id} after new session")
-                    except Exception as profile_update_error:
-                        print(f"⚠ Could not update mentor profile: {str(profile_update_error)}")
-            except Exception:
-                saved = None
+    sanitized = [
+        {
+            'id': r.get('id'),
+            'rank': r.get('rank'),
+            'name': r.get('name'),
+            'verified': r.get('verified', False),
+            'overallScore': r.get('overallScore'),
+            'strengthTag': r.get('strengthTag'),
+            'avgScoreTrend': r.get('avgScoreTrend', []),
+        }
+        for r in rankings if matches(r)
+    ]
 
-        # Also keep file-based list for backward compatibility
-        try:
-            uploaded_sessions = load_uploaded_sessions()
-            sessions_list = uploaded_sessions.get('sessions', [])
-            
-            session_summary = {
-                'id': session_id,
-                'sessionId': session_id,
-                'sessionName': session_name,
-                'created_at': new_session.get('created_at', datetime.utcnow()).isoformat(),
-                'weakMoments': new_session.get('weakMoments', []),
-                'uploadedFile': new_session.get('uploadedFile'),
-                'mentorId': mentor_id,
-                'userId': user_id
-            }
-            if new_session.get('metrics'):
-                overall_metrics = [m for m in new_session['metrics'] if m.get('name') == 'Overall']
-                if overall_metrics:
-                    session_summary['score'] = overall_metrics[0].get('score', 0)
-                else:
-                    avg_score = sum(m.get('score', 0) for m in new_session['metrics']) / len(new_session['metrics']) if new_session['metrics'] else 0
-                    session_summary['score'] = int(avg_score)
-            
-            sessions_list.insert(0, session_summary)
-            uploaded_sessions['sessions'] = sessions_list
-            save_uploaded_sessions(uploaded_sessions)
-        except Exception:
-            pass
+    return {
+        'filters': data.get('filters', {}),
+        'rankings': sanitized
+    }
 
-        # Ensure response session has an 'id' field for frontend compatibility
-        response_session = saved or new_session
-        try:
-            response_session['id'] = response_session.get('sessionId') or response_session.get('_id')
-        except Exception:
-            pass
+def build_public_rankings():
+    """
+    Compute the unfiltered leaderboard from the database.
+    
+    Returns:
+        dict: {'rankings': [...], 'filters': {...}}, with each ranking still carrying its
+        subject/language/experienceLevel for filtering, or None when there are no mentors
+    """
+    # Score all mentors in one aggregation (sessions joined and averaged in MongoDB)
+    try:
+        mentor_docs = User.get_mentor_rankings()
+        print(f"✓ Found {len(mentor_docs)} mentors in database")
+    except Exception as db_error:
+        print(f"✗ Error fetching mentors from DB: {str(db_error)}")
+        mentor_docs = []
+    
+    if not mentor_docs:
+        return None
+    
+    # Build rankings from the aggregated mentor scores (already sorted best first)
+    rankings_list = []
+    
+    for idx, mentor in enumerate(mentor_docs):
+        overall_score = mentor.get('overallScore') or 0
+        all_scores = mentor.get('sessionScores', [])
+        
+        # Determine strength tag based on score
+        strength_tag = strength_tag_for(overall_score)
+        
+        # Build trend (last 4 scores)
+        avg_score_trend = all_scores[-4:]
+        
+        rankings_list.append({
+            'id': str(mentor.get('_id')),
+            'rank': idx + 1,
+            'name': mentor.get('name', 'Unknown Mentor'),
+            'verified': mentor.get('verified', False),
+            'overallScore': round(overall_score, 2),
+            'strengthTag': strength_tag,
+            'avgScoreTrend': [round(s, 2) for s in avg_score_trend],
+            'subject': mentor.get('subject', 'General'),
+            'language': mentor.get('language', 'English'),
+            'experienceLevel': mentor.get('experienceLevel', 'Unknown'),
+        })
+    
+    # Get filter options from all mentors
+    all_subjects = list(set([m.get('subject', 'General') for m in mentor_docs]))
+    all_languages = list(set([m.get('language', 'English') for m in mentor_docs]))
+    all_experience_levels = list(set([m.get('experienceLevel', 'Unknown') for m in mentor_docs]))
+    
+    filters = {
+        'subjects': sorted(all_subjects),
+        'languages': sorted(all_languages),
+        'experienceLevels': sorted(all_experience_levels),
+        'timeWindows': ['weekly', 'monthly']
+    }
+    
+    return {
+        'filters': filters,
+        'rankings': rankings_list
+    }
 
-        response_payload = {
-            'message': 'Video analysis started from URL.',
-            'session': response_session,
-            'analysis': analysis_result,
-            'diarization': diarization_result
+def filter_public_rankings(base, subject=None, language=None, experience=None):
+    """Apply the request's filters to a build_public_rankings payload and strip internal fields"""
+    def matches(item):
+        return (
+            (not subject or item.get('subject') == subject) and
+            (not language or item.get('language') == language) and
+            (not experience or item.get('experienceLevel') == experience)
+        )
+    
+    # Sanitize output - remove internal fields
+    sanitized = [
+        {
+            'id': r.get('id'),
+            'rank': r.get('rank'),
+            'name': r.get('name'),
+            'verified': r.get('verified', False),
+            'overallScore': r.get('overallScore'),
+            'strengthTag': r.get('strengthTag'),
+            'avgScoreTrend': r.get('avgScoreTrend', []),
         }
+        for r in base['rankings'] if matches(r)
+    ]
+    
+    return {
+        'filters': base['filters'],
+        'rankings': sanitized
+    }
 
-        return jsonify(response_payload), 201
-    except Exception as e:
-        return jsonify({'error': f'Failed to analyze video: {str(e)}'}), 500
+# The single unfiltered rankings build as (computed_at, payload); filters are applied per
+# request, so arbitrary query strings can't grow the cache. Fresh for RANKINGS_TTL_SECONDS;
+# after that the stale build is still served (up to RANKINGS_STALE_SECONDS) while a
+# background thread recomputes it.
+RANKINGS_TTL_SECONDS = 60
+RANKINGS_STALE_SECONDS = 300
+_rankings_cache = None
+_rankings_refreshing = False
+# Bumped on every invalidation so a refresh that started earlier can't store its outdated build
+_rankings_generation = 0
+_rankings_lock = threading.Lock()
+
+def invalidate_public_rankings():
+    """Drop the cached rankings so the next request sees new session scores"""
+    global _rankings_cache, _rankings_generation
+    with _rankings_lock:
+        _rankings_cache = None
+        _rankings_generation += 1
+
+def _refresh_public_rankings():
+    """Recompute the cached rankings build"""
+    global _rankings_cache, _rankings_refreshing
+    try:
+        with _rankings_lock:
+            generation = _rankings_generation
+        payload = build_public_rankings()
+        with _rankings_lock:
+            if generation == _rankings_generation:
+                _rankings_cache = (time.monotonic(), payload)
+        return payload
+    finally:
+        with _rankings_lock:
+            _rankings_refreshing = False
+
+def get_cached_public_rankings():
+    """Return the unfiltered rankings build, serving cached or stale-while-revalidate entries"""
+    global _rankings_refreshing
+    now = time.monotonic()
+    with _rankings_lock:
+        cached = _rankings_cache
+        age = now - cached[0] if cached else None
+        if cached and age < RANKINGS_TTL_SECONDS:
+            return cached[1]
+        if cached and age < RANKINGS_STALE_SECONDS:
+            if not _rankings_refreshing:
+                _rankings_refreshing = True
+                threading.Thread(target=_refresh_public_rankings, daemon=True).start()
+            return cached[1]
+        _rankings_refreshing = True
+    return _refresh_public_rankings()
 
 @app.route('/api/public/mentors/rankings', methods=['GET'])
 def get_public_rankings():
     """Public leaderboard with compact filters; returns normalized scores only."""
+    # Get filter parameters
+    subject = request.args.get('subject')
+    language = request.args.get('language')
+    experience = request.args.get('experience')
+    window = request.args.get('window')
+
     try:
-        # Get filter parameters
-        subject = request.args.get('subject')
-        language = request.args.get('language')
-        experience = request.args.get('experience')
-        window = request.args.get('window')
-        
-        # Get all mentors from database
-        try:
-            from models import users_collection
-            mentor_docs = list(users_collection.find({'role': 'mentor'}))
-            print(f"✓ Found {len(mentor_docs)} mentors in database")
-        except Exception as db_error:
-            print(f"✗ Error fetching mentors from DB: {str(db_error)}")
-            mentor_docs = []
-        
-        if not mentor_docs:
+        base = get_cached_public_rankings()
+        if base is None:
             print("⚠ No mentors found in database, falling back to static data")
-            # Fallback to static data
-            data = load_public_rankings()
-            rankings = data.get('rankings', [])
-            
-            subject = request.args.get('subject')
-            language = request.args.get('language')
-            experience = request.args.get('experience')
-            window = request.args.get('window')
-
-            def matches(item):
-                return (
-                    (not subject or item.get('subject') == subject) and
-                    (not language or item.get('language') == language) and
-                    (not experience or item.get('experienceLevel') == experience) and
-                    (not window or item.get('timeWindow') == window)
-                )
-
-            filtered = [r for r in rankings if matches(r)]
-
-            sanitized = [
-                {
-                    'id': r.get('id'),
-                    'rank': r.get('rank'),
-                    'name': r.get('name'),
-                    'verified': r.get('verified', False),
-                    'overallScore': r.get('overallScore'),
-                    'strengthTag': r.get('strengthTag'),
-                    'avgScoreTrend': r.get('avgScoreTrend', []),
-                }
-                for r in filtered
-            ]
-
-            return jsonify({
-                'filters': data.get('filters', {}),
-                'rankings': sanitized
-            }), 200
-        
-        # Build rankings from database mentors with their session scores
-        rankings_list = []
-        
-        for mentor in mentor_docs:
-            mentor_id = str(mentor.get('_id'))
-            mentor_name = mentor.get('name', 'Unknown Mentor')
-            
-            print(f"  Processing mentor: {mentor_name} ({mentor_id})")
-            
-            # Get sessions for this mentor
-            try:
-                sessions = Session.find_by_mentor(mentor_id)
-                print(f"    Found {len(sessions) if sessions else 0} sessions")
-            except Exception as session_error:
-                print(f"    Error fetching sessions: {str(session_error)}")
-                sessions = []
-            
-            # Calculate mentor's overall score
-            all_scores = []
-            for session in sessions:
-                metrics = session.get('metrics', [])
-                if metrics:
-                    metric_scores = [m.get('score', 0) for m in metrics if isinstance(m.get('score'), (int, float))]
-                    if metric_scores:
-                        session_avg = sum(metric_scores) / len(metric_scores)
-                        all_scores.append(session_avg)
-            
-            # Use overall score if available, otherwise default to 0
-            if all_scores:
-                overall_score = sum(all_scores) / len(all_scores)
-            else:
-                overall_score = 0
-            
-            # Determine strength tag based on score
-            if overall_score >= 90:
-                strength_tag = "Best Engagement"
-            elif overall_score >= 80:
-                strength_tag = "Top 10% in Clarity"
-            elif overall_score >= 70:
-                strength_tag = "Consistent Performer"
-            else:
-                strength_tag = "Developing"
-            
-            # Build trend (last 4 scores)
-            avg_score_trend = all_scores[-4:] if len(all_scores) >= 4 else all_scores
-            
-            ranking_entry = {
-                'id': mentor_id,
-                'name': mentor_name,
-                'verified': mentor.get('verified', False),
-                'overallScore': round(overall_score, 2),
-                'strengthTag': strength_tag,
-                'avgScoreTrend': [round(s, 2) for s in avg_score_trend],
-                'subject': mentor.get('subject', 'General'),
-                'language': mentor.get('language', 'English'),
-                'experienceLevel': mentor.get('experienceLevel', 'Unknown'),
-                'timeWindow': window or 'weekly'
-            }
-            
-            rankings_list.append(ranking_entry)
-        
-        # Sort by overall score descending
-        rankings_list.sort(key=lambda x: x['overallScore'], reverse=True)
-        
-        # Add ranks
-        for idx, ranking in enumerate(rankings_list):
-            ranking['rank'] = idx + 1
-        
-        # Apply filters
-        def matches(item):
-            return (
-                (not subject or item.get('subject') == subject) and
-                (not language or item.get('language') == language) and
-                (not experience or item.get('experienceLevel') == experience)
-            )
-        
-        filtered = [r for r in rankings_list if matches(r)]
-        
-        # Sanitize output - remove internal fields
-        sanitized = [
-            {
-                'id': r.get('id'),
-                'rank': r.get('rank'),
-                'name': r.get('name'),
-                'verified': r.get('verified', False),
-                'overallScore': r.get('overallScore'),
-                'strengthTag': r.get('strengthTag'),
-                'avgScoreTrend': r.get('avgScoreTrend', []),
-            }
-            for r in filtered
-        ]
-        
-        # Get filter options from all mentors
-        all_subjects = list(set([m.get('subject', 'General') for m in mentor_docs]))
-        all_languages = list(set([m.get('language', 'English') for m in mentor_docs]))
-        all_experience_levels = list(set([m.get('experienceLevel', 'Unknown') for m in mentor_docs]))
-        
-        filters = {
-            'subjects': sorted(all_subjects),
-            'languages': sorted(all_languages),
-            'experienceLevels': sorted(all_experience_levels),
-            'timeWindows': ['weekly', 'monthly']
-        }
-        
-        print(f"✓ Returning {len(sanitized)} mentors with filters: {filters}")
-        
-        return jsonify({
-            'filters': filters,
-            'rankings': sanitized
-        }), 200
+            return jsonify(_static_public_rankings(subject, language, experience, window))
+        return jsonify(filter_public_rankings(base, subject, language, experience))
     except Exception as e:
         print(f"✗ Error in get_public_rankings: {str(e)}")
-        print(f"✗ Traceback: ", exc_info=True)
+        import traceback
+        traceback.print_exc()
         # Fallback to static data if DB fails
         try:
-            data = load_public_rankings()
-            rankings = data.get('rankings', [])
-            
-            def matches(item):
-                return (
-                    (not subject or item.get('subject') == subject) and
-                    (not language or item.get('language') == language) and
-                    (not experience or item.get('experienceLevel') == experience) and
-                    (not window or item.get('timeWindow') == window)
-                )
-            
-            filtered = [r for r in rankings if matches(r)]
-            
-            sanitized = [
-                {
-                    'id': r.get('id'),
-                    'rank': r.get('rank'),
-                    'name': r.get('name'),
-                    'verified': r.get('verified', False),
-                    'overallScore': r.get('overallScore'),
-                    'strengthTag': r.get('strengthTag'),
-                    'avgScoreTrend': r.get('avgScoreTrend', []),
-                }
-                for r in filtered
-            ]
-            
-            return jsonify({
-                'filters': data.get('filters', {}),
-                'rankings': sanitized
-            }), 200
+            return jsonify(_static_public_rankings(subject, language, experience, window)), 200
         except Exception as fallback_error:
             return jsonify({'error': f'Failed to load rankings: {str(e)}'}), 500
 
 
+# sessionId -> {videoUrl, sessionName, duration} for the video endpoint; dropped on delete
+VIDEO_INFO_CACHE_SIZE = 2048
+_video_info_cache = {}
+
 @app.route('/api/mentor/<mentor_id>/sessions/<session_id>/video', methods=['GET', 'OPTIONS'])
 def serve_session_video(mentor_id, session_id):
     """Get video URL for a session. Returns URL as JSON to avoid CORS issues with redirects.
@@ -2120,23 +2338,37 @@ def serve_session_video(mentor_id, session_id):
         return '', 204
     
     try:
-        session = Session.find_by_sessionId(session_id)
-        if not session:
-            return jsonify({'error': 'Session not found'}), 404
+        # videoUrl never changes after upload, so the lookup is cached and skips the DB on repeat plays
+        # (except while the session is still processing, when duration and name aren't final)
+        video_info = _video_info_cache.get(session_id)
+        if video_info is None:
+            session = Session.find_video_info(session_id)
+            if not session:
+                return jsonify({'error': 'Session not found'}), 404
+
+            # Get video URL from the session
+            video_url = session.get('videoUrl')
+            if not video_url:
+                return jsonify({'error': 'No video attached to this session'}), 404
 
-        # Get video URL from the session
-        video_url = session.get('videoUrl')
-        if not video_url:
-            return jsonify({'error': 'No video attached to this session'}), 404
+            video_info = {
+                'videoUrl': video_url,
+                'sessionName': session.get('sessionName', ''),
+                'duration': session.get('duration', 0)
+            }
+            if session.get('status') != 'processing':
+                if len(_video_info_cache) >= VIDEO_INFO_CACHE_SIZE:
+                    _video_info_cache.pop(next(iter(_video_info_cache)), None)
+                _video_info_cache[session_id] = video_info
 
         # Return URL as JSON instead of redirect to avoid CORS issues
         # Frontend will fetch directly from S3 with proper CORS headers
         response = jsonify({
-            'videoUrl': video_url,
+            'videoUrl': video_info['videoUrl'],
             'sessionId': session_id,
             'mentorId': mentor_id,
-            'sessionName': session.get('sessionName', ''),
-            'duration': session.get('duration', 0)
+            'sessionName': video_info['sessionName'],
+            'duration': video_info['duration']
         })
         
         # Explicitly set CORS headers
@@ -2144,16 +2376,43 @@ def serve_session_video(mentor_id, session_id):
         response.headers['Access-Control-Allow-Methods'] = 'GET, OPTIONS'
         response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
         
-        return response, 200
+        # Let the browser reuse the answer on seeks/reconnects, and revalidate with a 304
+        response.headers['Cache-Control'] = 'private, max-age=3600'
+        etag_source = f"{video_info['videoUrl']}|{video_info['sessionName']}|{video_info['duration']}"
+        response.set_etag(hashlib.md5(etag_source.encode()).hexdigest())
+        return response.make_conditional(request)
     except Exception as e:
         error_response = jsonify({'error': f'Failed to serve video: {str(e)}'})
         error_response.headers['Access-Control-Allow-Origin'] = '*'
         return error_response, 500
 
+# Public mentor profiles keyed by mentor id -> (expires_at, profile). Entries are dropped
+# whenever the mentor's sessions or profile change, so the TTL only bounds staleness from
+# writes made outside this process.
+PUBLIC_PROFILE_TTL_SECONDS = 300
+_public_profile_cache = {}
+
+def invalidate_public_profile(mentor_id):
+    """Drop a mentor's cached public profile so the next request recomputes it"""
+    _public_profile_cache.pop(str(mentor_id), None)
+
+def mentor_sessions_changed(mentor_id):
+    """Refresh a mentor's materialized session stats after a session is added or removed"""
+    try:
+        MentorStats.refresh(str(mentor_id))
+    except Exception as e:
+        print(f"⚠ Could not refresh mentor stats for {mentor_id}: {str(e)}")
+    invalidate_public_profile(mentor_id)
+    invalidate_public_rankings()
+
 @app.route('/api/public/mentors/<mentor_id>', methods=['GET'])
 def get_public_mentor_profile(mentor_id):
     """Public mentor profile with only strengths and highlights."""
     try:
+        cached = _public_profile_cache.get(mentor_id)
+        if cached and cached[0] > time.monotonic():
+            return jsonify(cached[1])
+
         print(f"Fetching profile for mentor: {mentor_id}")
         
         # Try to get mentor from database first
@@ -2170,7 +2429,6 @@ def get_public_mentor_profile(mentor_id):
         
         # Get mentor profile data from MentorProfile collection
         try:
-            from models import MentorProfile
             mentor_profile = MentorProfile.find_by_user_id(mentor_id)
             print(f"Found mentor profile: {mentor_profile is not None}")
         except Exception as profile_error:
@@ -2189,59 +2447,44 @@ def get_public_mentor_profile(mentor_id):
             mentor_contact = {}
             teaching_highlights_from_profile = []
         
-        # Get sessions for this mentor to calculate scores
+        # Session score stats are materialized per mentor (count, overall average, last 4 session averages)
+        stats_ok = True
         try:
-            sessions = Session.find_by_mentor(mentor_id)
-            print(f"Found {len(sessions) if sessions else 0} sessions for mentor")
+            stats = MentorStats.get(mentor_id)
+            print(f"Found {stats['count']} sessions for mentor")
         except Exception as session_error:
             print(f"Error fetching sessions: {str(session_error)}")
-            sessions = []
+            stats = {'count': 0, 'scoredCount': 0, 'overall': None, 'trend': []}
+            stats_ok = False
         
-        # Calculate overall score and trends
-        all_scores = []
-        for session in sessions:
-            metrics = session.get('metrics', [])
-            if metrics:
-                metric_scores = [m.get('score', 0) for m in metrics if isinstance(m.get('score'), (int, float))]
-                if metric_scores:
-                    session_avg = sum(metric_scores) / len(metric_scores)
-                    all_scores.append(session_avg)
+        overall_score = stats.get('overall')
         
         # Determine strength tag based on score
-        if all_scores:
-            overall_score = sum(all_scores) / len(all_scores)
-            if overall_score >= 90:
-                strength_tag = "Best Engagement"
-            elif overall_score >= 80:
-                strength_tag = "Top 10% in Clarity"
-            elif overall_score >= 70:
-                strength_tag = "Consistent Performer"
-            else:
-                strength_tag = "Developing"
+        if overall_score is not None:
+            strength_tag = strength_tag_for(overall_score)
         else:
             strength_tag = "No sessions yet"
         
         # Build trend (last 4 scores)
-        avg_score_trend = all_scores[-4:] if len(all_scores) >= 4 else all_scores
+        avg_score_trend = stats.get('trend', [])
         
         # Get peer badges
         peer_badges = []
-        if all_scores and len(all_scores) > 0:
-            avg = sum(all_scores) / len(all_scores)
-            if avg >= 95:
+        if overall_score is not None:
+            if overall_score >= 95:
                 peer_badges.append("Top 5% in Engagement")
-            if avg >= 90:
+            if overall_score >= 90:
                 peer_badges.append("Top 10% in Clarity")
-            if len(all_scores) >= 50:
+            if stats.get('scoredCount', 0) >= 50:
                 peer_badges.append("Most Active Mentor")
         
         # Use teaching highlights from profile, or generate from sessions
         teaching_highlights = teaching_highlights_from_profile
-        if not teaching_highlights and sessions:
+        if not teaching_highlights and stats.get('count'):
             # Generate highlights from session data
             teaching_highlights = [
-                f"Completed {len(sessions)} sessions with students",
-                f"Average mentor score: {round(sum(all_scores) / len(all_scores), 2)}" if all_scores else "No scores yet"
+                f"Completed {stats['count']} sessions with students",
+                f"Average mentor score: {round(overall_score, 2)}" if overall_score is not None else "No scores yet"
             ]
         
         public_profile = {
@@ -2259,6 +2502,9 @@ def get_public_mentor_profile(mentor_id):
         
         print(f"Returning profile: {public_profile}")
         
+        # Don't pin the zeroed fallback stats in the cache; retry the lookup next request
+        if stats_ok:
+            _public_profile_cache[mentor_id] = (time.monotonic() + PUBLIC_PROFILE_TTL_SECONDS, public_profile)
         return jsonify(public_profile), 200
     except Exception as e:
         print(f"✗ Error in get_public_mentor_profile: {str(e)}")
@@ -2289,6 +2535,25 @@ def get_public_mentor_profile(mentor_id):
         except Exception as fallback_error:
             return jsonify({'error': f'Failed to load mentor profile: {str(e)}'}), 500
 
+def save_session_in_background(session_document):
+    """Persist a fully built session over its pending placeholder; marks it failed on error"""
+    session_id = session_document['sessionId']
+    try:
+        session_document['status'] = 'completed'
+        # Same schema validation, Gemini enrichment and timestamps as create_session,
+        # written over the placeholder stored by the request handler
+        saved_session = Session.finalize_pending_session(session_document)
+        _video_info_cache.pop(session_id, None)
+        print(f"✓ Session saved with ID: {saved_session.get('_id')}")
+        if session_document.get('mentorId'):
+            mentor_sessions_changed(session_document['mentorId'])
+    except Exception as e:
+        print(f"❌ Database error saving {session_id}: {str(e)}")
+        try:
+            Session.update_session(session_id, {'status': 'failed', 'error': str(e)})
+        except Exception:
+            pass
+
 @app.route('/api/mentor/<mentor_id>/sessions/create-from-analysis', methods=['POST'])
 def create_session_from_s3_analysis(mentor_id):
     """
@@ -2341,14 +2606,17 @@ def create_session_from_s3_analysis(mentor_id):
         # ============ STEP 1: Parse analysis results from S3 ============
         print(f"→ Processing analysis results for video: {video_id}")
         
-        # Extract metrics from all chunks and aggregate
-        all_metrics = []
+        # One pass over the chunks collects transcripts, durations, overall scores,
+        # per-metric scores (step 2) and weak moments (step 5)
         all_transcripts = []
         total_duration = 0
         overall_scores = []
+        aggregated_scores = defaultdict(list)
+        weak_moments = []
         
         # Process results from each chunk
         results_list = analysis_results.get('results', [])
+        chunk_count = len(results_list)
         
         for chunk_result in results_list:
             # Aggregate transcript
@@ -2356,61 +2624,40 @@ def create_session_from_s3_analysis(mentor_id):
             if transcript:
                 all_transcripts.append(transcript)
             
-            # Get duration
-            duration = chunk_result.get('duration', 0)
-            total_duration += duration
-            
             # Collect overall score
             overall = chunk_result.get('overall_score', 0)
             if overall:
                 overall_scores.append(float(overall))
-        
-        # ============ STEP 2: Build metrics array (per chunk analysis) ============
-        # Map chunk results to metric scores
-        metric_keys = {
-            'communication': 'Communication',
-            'clarity': 'Clarity',
-            'engagement': 'Engagement',
-            'interaction': 'Interaction',
-        }
-        
-        # Aggregate scores from all chunks
-        aggregated_scores = {}
-        chunk_count = len(results_list)
-        
-        for chunk_result in results_list:
-            for key, label in metric_keys.items():
-                metric_data = chunk_result.get(key, {})
-                score = None
-                
-                if isinstance(metric_data, dict):
-                    score = metric_data.get('score')
-                elif isinstance(metric_data, (int, float)):
-                    score = metric_data
-                
+            
+            # Clamped scores per metric; each metric's type is checked once here and the raw
+            # score of dict-shaped metrics is kept for the weak-moment rules below
+            raw_scores = {}
+            for key, label in S3_METRIC_KEYS:
+                score = chunk_result.get(key, {})
+                if isinstance(score, dict):
+                    score = score.get('score')
+                    raw_scores[key] = 0 if score is None else score
+                elif not isinstance(score, (int, float)):
+                    continue
+                score = _clamp_score(score)
                 if score is not None:
-                    try:
-                        score = int(float(score))
-                        score = max(0, min(100, score))
-                        if label not in aggregated_scores:
-                            aggregated_scores[label] = []
-                        aggregated_scores[label].append(score)
-                    except Exception:
-                        pass
+                    aggregated_scores[label].append(score)
+            
+            # Weak moments, stamped with the chunk's start time
+            for key, threshold, label, advice in WEAK_MOMENT_RULES:
+                score = raw_scores.get(key)
+                if score is not None and score < threshold:
+                    weak_moments.append({
+                        'timestamp': _format_timestamp(total_duration),
+                        'message': f"{label} score: {score}. {advice}"
+                    })
+            
+            # Get duration
+            total_duration += chunk_result.get('duration', 0)
         
+        # ============ STEP 2: Build metrics array (per chunk analysis) ============
         # Calculate average scores for each metric
-        metrics = []
-        for label, scores in aggregated_scores.items():
-            if scores:
-                avg_score = sum(scores) / len(scores)
-                avg_score = int(avg_score)
-                metrics.append({
-                    'name': label,
-                    'score': avg_score,
-                    'confidenceInterval': [max(0, avg_score - 5), min(100, avg_score + 5)],
-                    'whatHelped': [],
-                    'whatHurt': []
-                })
+        metrics = [_metric_entry(label, sum(scores) / len(scores)) for label, scores in aggregated_scores.items()]
         
         # Calculate overall average score
         if overall_scores:
@@ -2419,42 +2666,26 @@ def create_session_from_s3_analysis(mentor_id):
         else:
             overall_avg = 75
         
-        metrics.append({
-            'name': 'Overall',
-            'score': overall_avg,
-            'confidenceInterval': [max(0, overall_avg - 5), min(100, overall_avg + 5)],
-            'whatHelped': [],
-            'whatHurt': []
-        })
+        metrics.append(_metric_entry('Overall', overall_avg))
         
         print(f"✓ Extracted metrics from {chunk_count} chunks")
         
         # ============ STEP 3: Build transcript timeline ============
         # Aggregate all transcripts with timing
         full_transcript = ' '.join(all_transcripts)
-        timeline_transcript = []
         
-        # Create transcript segments
-        if all_transcripts:
-            current_time = 0
-            segment_duration = total_duration / len(all_transcripts) if len(all_transcripts) > 0 else 0
-            
-            for idx, transcript_text in enumerate(all_transcripts):
-                start_time = current_time
-                end_time = start_time + (segment_duration if segment_duration > 0 else total_duration)
-                
-                # Extract key phrases (simple approach: split by space and take meaningful words)
-                words = transcript_text.split()
-                key_phrases = [w for w in words if len(w) > 4][:5]  # Take first 5 words > 4 chars
-                
-                timeline_transcript.append({
-                    'startTime': float(start_time),
-                    'endTime': float(end_time),
-                    'text': transcript_text,
-                    'keyPhrases': key_phrases
-                })
-                
-                current_time = end_time
+        # Create transcript segments, spreading the chunks evenly over the total duration;
+        # key phrases are the first 5 words longer than 4 chars
+        segment_duration = total_duration / len(all_transcripts) if all_transcripts else 0
+        timeline_transcript = [
+            {
+                'startTime': float(idx * segment_duration),
+                'endTime': float((idx + 1) * segment_duration),
+                'text': transcript_text,
+                'keyPhrases': [m.group() for m in islice(_LONG_WORD.finditer(transcript_text), 5)]
+            }
+            for idx, transcript_text in enumerate(all_transcripts)
+        ]
         
         print(f"✓ Built transcript timeline with {len(timeline_transcript)} segments")
         
@@ -2465,14 +2696,15 @@ def create_session_from_s3_analysis(mentor_id):
             
             if not diarization_url:
                 print(f"⚠ DIARIZATION_SERVICE_URL not configured, creating dummy diarization data")
-                # Create dummy diarization if service not available
+                # Create dummy diarization if service not available (one sentence per
+                # transcript segment, reusing the segment length from step 3)
                 diarization_result = {
                     'batch_id': analysis_results.get('batch_id', str(uuid.uuid4())),
                     'sentences': [
                         {
-                            'start': float(idx * (total_duration / len(all_transcripts)) if len(all_transcripts) > 0 else 0),
-                            'end': float((idx + 1) * (total_duration / len(all_transcripts)) if len(all_transcripts) > 0 else total_duration),
-                            'text': transcript[:200] if (idx < len(all_transcripts)) else 'Session content',
+                            'start': float(idx * segment_duration),
+                            'end': float((idx + 1) * segment_duration),
+                            'text': transcript[:200],
                             'needs_improvement': False,
                             'improvement': {'suggestion': '', 'reason': ''}
                         }
@@ -2486,7 +2718,7 @@ def create_session_from_s3_analysis(mentor_id):
                 try:
                     # Download video from URL
                     print(f"📥 Downloading video from URL...")
-                    video_response = requests.get(video_url, timeout=300, stream=True)
+                    video_response = http_session.get(video_url, timeout=300, stream=True)
                     video_response.raise_for_status()
                     
                     # Create multipart form-data
@@ -2494,10 +2726,10 @@ def create_session_from_s3_analysis(mentor_id):
                     
                     # Send to diarization service
                     print(f"📤 Sending to diarization service...")
-                    resp = requests.post(diarization_url, files=files, timeout=300)
+                    resp = http_session.post(diarization_url, files=files, timeout=300)
                     
                     if resp.ok:
-                        diarization_result = resp.json()
+                        diarization_result = load_service_json(resp.content)
                         print(f"✓ Diarization service response received")
                     else:
                         print(f"⚠ Diarization service returned status {resp.status_code}")
@@ -2521,45 +2753,11 @@ def create_session_from_s3_analysis(mentor_id):
         if not diarization_result:
             diarization_result = {'error': 'Diarization service not available'}
         
-        # ============ STEP 5: Build weak moments from analysis ============
-        weak_moments = []
-        current_time = 0
-        
-        for chunk_idx, chunk_result in enumerate(results_list):
-            # Extract issues from communication, engagement, etc.
-            communication = chunk_result.get('communication', {})
-            if isinstance(communication, dict):
-                score = communication.get('score', 0)
-                if score < 70:
-                    weak_moments.append({
-                        'timestamp': _format_timestamp(current_time),
-                        'message': f"Communication score: {score}. Focus on speaking pace and clarity."
-                    })
-            
-            engagement = chunk_result.get('engagement', {})
-            if isinstance(engagement, dict):
-                score = engagement.get('score', 0)
-                if score < 60:
-                    weak_moments.append({
-                        'timestamp': _format_timestamp(current_time),
-                        'message': f"Engagement score: {score}. Try asking more questions and interact with audience."
-                    })
-            
-            interaction = chunk_result.get('interaction', {})
-            if isinstance(interaction, dict):
-                score = interaction.get('score', 0)
-                if score < 70:
-                    weak_moments.append({
-                        'timestamp': _format_timestamp(current_time),
-                        'message': f"Interaction score: {score}. Improve eye contact and body language."
-                    })
-            
-            current_time += chunk_result.get('duration', 0)
-        
+        # ============ STEP 5: Weak moments (collected in step 1) ============
         print(f"✓ Identified {len(weak_moments)} weak moments")
         
         # ============ STEP 6: Create session document ============
-        session_id = f'session_{uuid.uuid4().hex[:8]}'
+        session_id = Session.generate_session_id()
         
         session_document = {
             'sessionId': session_id,
@@ -2591,39 +2789,44 @@ def create_session_from_s3_analysis(mentor_id):
         print(f"→ Saving session to MongoDB...")
         
         # ============ STEP 7: Save to MongoDB ============
+        # Schema coercion and Gemini enrichment in Session.create_session take seconds, so
+        # store a 'processing' placeholder now and finish the save on a background worker;
+        # the caller polls the status endpoint
         try:
-            # Use the Session model's create_session method which handles:
-            # - Schema validation
-            # - Gemini API enrichment for missing fields
-            # - Timestamp handling
-            saved_session = Session.create_session(session_document)
-            
-            print(f"✓ Session saved with ID: {saved_session.get('_id')}")
-            
-            # Build response
-            response_payload = {
-                'message': 'Session created successfully from analysis results',
-                'session': {
-                    'id': saved_session.get('_id'),
-                    'sessionId': saved_session.get('sessionId'),
-                    'sessionName': saved_session.get('sessionName'),
-                    'score': overall_avg,
-                    'date': saved_session.get('created_at').isoformat() if isinstance(saved_session.get('created_at'), datetime) else str(saved_session.get('created_at')),
-                    'duration': saved_session.get('duration'),
-                    'weakMoments': saved_session.get('weakMoments', []),
-                    'studentCount': 1,
-                    'uploadedFile': video_url
-                }
-            }
-            
-            return jsonify(response_payload), 201
-            
+            pending = Session.create_pending_session(
+                {k: v for k, v in session_document.items() if k not in ('analysis', 'diarization', 'timeline')}
+            )
         except Exception as db_error:
             print(f"❌ Database error: {str(db_error)}")
+            # Return the data that failed to save, minus the bulky parts the caller already has
+            # (their own analysisResults, and the transcript derived from it)
             return jsonify({
                 'error': f'Failed to save session to database: {str(db_error)}',
-                'sessionData': session_document  # Return the data that failed to save
+                'sessionData': {k: v for k, v in session_document.items() if k not in ('analysis', 'diarization', 'timeline')}
             }), 500
+
+        _pipeline_pool.submit(save_session_in_background, session_document)
+        print(f"✓ Session {session_id} queued for saving (ID: {pending.get('_id')})")
+        
+        # Build response
+        response_payload = {
+            'message': 'Session accepted; saving analysis results',
+            'status': 'processing',
+            'pollUrl': f'/api/mentor/{mentor_id}/sessions/{session_id}/status',
+            'session': {
+                'id': pending.get('_id'),
+                'sessionId': session_id,
+                'sessionName': session_document.get('sessionName'),
+                'score': overall_avg,
+                'date': session_document['created_at'].isoformat(),
+                'duration': session_document.get('duration'),
+                'weakMoments': session_document.get('weakMoments', []),
+                'studentCount': 1,
+                'uploadedFile': video_url
+            }
+        }
+        
+        return jsonify(response_payload), 202
     
     except Exception as e:
         print(f"❌ Error creating session from analysis: {str(e)}")
@@ -2634,10 +2837,8 @@ def create_session_from_s3_analysis(mentor_id):
 
 def _format_timestamp(seconds):
     """Convert seconds to HH:MM:SS format"""
-    sec = int(seconds or 0)
-    h = sec // 3600
-    m = (sec % 3600) // 60
-    s = sec % 60
+    m, s = divmod(int(seconds or 0), 60)
+    h, m = divmod(m, 60)
     return f"{h:02d}:{m:02d}:{s:02d}"
 
 @app.route('/api/health', methods=['GET'])
@@ -1,19 +1,32 @@
 #!/usr/bin/env python3
 """Backfill timeline/audio/video/score arrays for sessions missing them.
 Scans the `sessions` collection for documents where timeline.audio or timeline.video are empty
-and attempts to rebuild them using existing analysis/diarization JSON files in `data/`.
+and attempts to rebuild them using analysis/diarization JSON files in `data/` or the results
+stored on the session itself.
 
 Usage:
   python backfill_timelines.py
 """
 import os
-import json
+import orjson
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from bson import json_util
-from models import sessions_collection, Session
+from pymongo import UpdateOne, WriteConcern
+from models import sessions_collection
 from ingest_session_from_files import build_session
 
 BASE_DIR = os.path.dirname(__file__)
 DATA_DIR = os.path.join(BASE_DIR, 'data')
+BATCH_SIZE = 500
+LOAD_WORKERS = 16
+
+# Only the fields backfill() reads
+SESSION_FIELDS = {
+    'sessionId': 1, 'analysisFile': 1, 'diarizationFile': 1, 'mentorId': 1, 'userId': 1,
+    'uploadedFile': 1, 'sessionName': 1, 'videoUrl': 1, 'analysis': 1, 'diarization': 1
+}
 
 
 def find_sessions_to_fix():
@@ -27,59 +40,91 @@ def find_sessions_to_fix():
             {'timeline.video': {'$size': 0}}
         ]
     }
-    return list(sessions_collection.find(query))
+    return sessions_collection.find(query, projection=SESSION_FIELDS).batch_size(BATCH_SIZE)
 
 
 def load_json_file(path):
     try:
-        with open(path, 'r') as f:
-            return json.load(f)
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
     except Exception:
         return None
 
 
-def backfill():
-    sessions = find_sessions_to_fix()
-    print(f'Found {len(sessions)} sessions to inspect')
-    for s in sessions:
-        sid = s.get('sessionId')
-        if not sid:
-            print('Skipping session without sessionId:', s.get('_id'))
-            continue
-
-        print('Processing', sid)
-
-        # try to find analysis/diarization filenames recorded in doc
-        analysis_file = s.get('analysisFile') or f'analysis_{sid}.json'
-        diarization_file = s.get('diarizationFile') or f'diarization_{sid}.json'
-
-        analysis_path = os.path.join(DATA_DIR, analysis_file) if not analysis_file.startswith('/') else analysis_file
-        diarization_path = os.path.join(DATA_DIR, diarization_file) if not diarization_file.startswith('/') else diarization_file
-
-        analysis = load_json_file(analysis_path)
-        diarization = load_json_file(diarization_path)
-
-        if not analysis and not diarization:
-            print('  No analysis/diarization files found for', sid)
-            continue
-
-        # Build a candidate session (non-inserting) and pick the fields we want to update
-        built = build_session(analysis or {}, diarization or {}, s.get('mentorId'), s.get('userId'), video_filename=s.get('uploadedFile'), session_name=s.get('sessionName'))
-
-        update_data = {
-            'timeline': built.get('timeline'),
-            'metrics': built.get('metrics'),
-            'weakMoments': built.get('weakMoments'),
-            'analysis': built.get('analysis') or s.get('analysis'),
-            'diarization': built.get('diarization') or s.get('diarization'),
-            'videoUrl': built.get('videoUrl') or s.get('videoUrl')
-        }
+def load_session_files(s):
+    """Load the (analysis, diarization) dump files recorded for a session, or None for each missing one"""
+    sid = s.get('sessionId')
+    analysis_file = s.get('analysisFile') or f'analysis_{sid}.json'
+    diarization_file = s.get('diarizationFile') or f'diarization_{sid}.json'
+
+    analysis_path = os.path.join(DATA_DIR, analysis_file) if not analysis_file.startswith('/') else analysis_file
+    diarization_path = os.path.join(DATA_DIR, diarization_file) if not diarization_file.startswith('/') else diarization_file
+    return load_json_file(analysis_path), load_json_file(diarization_path)
 
+
+def backfill():
+    # Backfill is rerunnable, so a single-node ack is enough; writes go out in unordered batches
+    collection = sessions_collection.with_options(write_concern=WriteConcern(w=1))
+    ops = []
+    inspected = updated = 0
+
+    def flush():
+        nonlocal updated
+        if not ops:
+            return
         try:
-            res = Session.update_session(sid, update_data)
-            print('  Updated', sid)
+            res = collection.bulk_write(ops, ordered=False)
+            updated += res.modified_count
+            print(f'  Flushed {len(ops)} updates')
         except Exception as e:
-            print('  Failed to update', sid, str(e))
+            print(f'  Failed to flush {len(ops)} updates', str(e))
+        ops.clear()
+
+    # File reads are IO-bound, so load each batch's dump files on a thread pool
+    cursor = find_sessions_to_fix()
+    with ThreadPoolExecutor(max_workers=LOAD_WORKERS) as pool:
+        while True:
+            batch = list(islice(cursor, BATCH_SIZE))
+            if not batch:
+                break
+            # One timestamp per batch keeps the loop free of clock calls
+            now = datetime.utcnow()
+            for s, (analysis_dump, diarization_dump) in zip(batch, pool.map(load_session_files, batch)):
+                inspected += 1
+                sid = s.get('sessionId')
+                if not sid:
+                    print('Skipping session without sessionId:', s.get('_id'))
+                    continue
+
+                print('Processing', sid)
+
+                # Raw results are only dumped to disk in debug mode; otherwise use the copies embedded in the doc
+                analysis = analysis_dump or s.get('analysis')
+                diarization = diarization_dump or s.get('diarization')
+
+                if not analysis and not diarization:
+                    print('  No analysis/diarization files found for', sid)
+                    continue
+
+                # Build a candidate session (non-inserting) and pick the fields we want to update
+                built = build_session(analysis or {}, diarization or {}, s.get('mentorId'), s.get('userId'), video_filename=s.get('uploadedFile'), session_name=s.get('sessionName'))
+
+                update_data = {
+                    'timeline': built.get('timeline'),
+                    'metrics': built.get('metrics'),
+                    'weakMoments': built.get('weakMoments'),
+                    'analysis': built.get('analysis') or s.get('analysis'),
+                    'diarization': built.get('diarization') or s.get('diarization'),
+                    'videoUrl': built.get('videoUrl') or s.get('videoUrl')
+                }
+
+                update_data['updated_at'] = now
+                ops.append(UpdateOne({'sessionId': sid}, {'$set': update_data}))
+                if len(ops) >= BATCH_SIZE:
+                    flush()
+
+    flush()
+    print(f'Inspected {inspected} sessions, updated {updated}')
 
 
 if __name__ == '__main__':
@@ -4,9 +4,55 @@ Replace GridFS with cloud-based video hosting
 """
 
 import cloudinary
+import cloudinary.api
 import cloudinary.uploader
 import os
-from datetime import datetime
+import threading
+import time
+from collections import OrderedDict
+
+# Video metadata changes only on re-upload, so api.resource lookups are cached
+METADATA_TTL_SECONDS = 3600
+METADATA_CACHE_SIZE = 512
+_metadata_cache = OrderedDict()  # public_id -> (expires_at, metadata), LRU order
+
+# Signed URLs are reused until shortly before they expire
+SIGNED_URL_REFRESH_MARGIN = 60
+SIGNED_URL_CACHE_SIZE = 1024
+_signed_url_cache = OrderedDict()  # (public_id, expires_in) -> (reuse_until, url), LRU order
+
+# Guards both caches; request threads read and fill them concurrently
+_cache_lock = threading.Lock()
+
+
+def _cache_get(cache, key, now):
+    """Return a live cached value (refreshing its LRU position), dropping it if expired"""
+    with _cache_lock:
+        cached = cache.get(key)
+        if cached is None:
+            return None
+        if cached[0] <= now:
+            del cache[key]
+            return None
+        cache.move_to_end(key)
+        return cached[1]
+
+
+def _cache_put(cache, key, valid_until, value, max_size):
+    """Store a value, evicting the least recently used entries beyond max_size"""
+    with _cache_lock:
+        cache[key] = (valid_until, value)
+        cache.move_to_end(key)
+        while len(cache) > max_size:
+            cache.popitem(last=False)
+
+
+def _forget_video(public_id):
+    """Drop cached metadata and signed URLs for a video that was replaced or deleted"""
+    with _cache_lock:
+        _metadata_cache.pop(public_id, None)
+        for key in [k for k in _signed_url_cache if k[0] == public_id]:
+            del _signed_url_cache[key]
 
 def init_cloudinary():
     """Initialize Cloudinary with environment variables"""
@@ -50,6 +96,7 @@ def upload_video_to_cloudinary(file_obj, mentor_id, session_id, filename):
             timeout=300  # 5 minutes timeout for large videos
         )
         
+        _forget_video(result.get('public_id') or public_id)
         print(f"✓ Video uploaded to Cloudinary: {public_id}")
         return {
             'url': result.get('secure_url'),
@@ -99,6 +146,7 @@ def delete_video_from_cloudinary(public_id):
             public_id,
             resource_type='video'
         )
+        _forget_video(public_id)
         print(f"✓ Video deleted from Cloudinary: {public_id}")
     except Exception as e:
         raise Exception(f'Cloudinary deletion failed: {str(e)}')
@@ -106,7 +154,7 @@ def delete_video_from_cloudinary(public_id):
 
 def get_video_metadata(public_id):
     """
-    Get metadata for a video
+    Get metadata for a video (cached for METADATA_TTL_SECONDS)
     
     Args:
         public_id: Cloudinary public_id
@@ -114,12 +162,16 @@ def get_video_metadata(public_id):
     Returns:
         dict: Video metadata
     """
+    cached = _cache_get(_metadata_cache, public_id, time.monotonic())
+    if cached is not None:
+        return cached
+
     try:
         result = cloudinary.api.resource(
             public_id,
             resource_type='video'
         )
-        return {
+        metadata = {
             'public_id': result.get('public_id'),
             'url': result.get('secure_url'),
             'duration': result.get('duration'),
@@ -132,10 +184,14 @@ def get_video_metadata(public_id):
     except Exception as e:
         raise Exception(f'Failed to get metadata: {str(e)}')
 
+    _cache_put(_metadata_cache, public_id, time.monotonic() + METADATA_TTL_SECONDS, metadata, METADATA_CACHE_SIZE)
+    return metadata
+
 
 def generate_signed_url(public_id, expires_in=3600):
     """
-    Generate a signed URL with expiration
+    Generate a signed URL with expiration. A URL is reused until SIGNED_URL_REFRESH_MARGIN
+    seconds before it expires, so callers always get at least that much validity.
     
     Args:
         public_id: Cloudinary public_id
@@ -144,16 +200,23 @@ def generate_signed_url(public_id, expires_in=3600):
     Returns:
         str: Signed URL
     """
+    now = time.time()
+    cached = _cache_get(_signed_url_cache, (public_id, expires_in), now)
+    if cached is not None:
+        return cached
+
     try:
+        end_time = int(now) + expires_in
         url = cloudinary.CloudinaryResource(public_id).build_url(
             resource_type='video',
             secure=True,
             sign_url=True,
             auth_token={
-                'end_time': int(datetime.utcnow().timestamp()) + expires_in,
+                'end_time': end_time,
                 'duration': expires_in
             }
         )
+        _cache_put(_signed_url_cache, (public_id, expires_in), end_time - SIGNED_URL_REFRESH_MARGIN, url, SIGNED_URL_CACHE_SIZE)
         return url
     except Exception as e:
         raise Exception(f'Failed to generate signed URL: {str(e)}')
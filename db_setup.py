@@ -15,7 +15,7 @@ from dotenv import load_dotenv
 # Load environment variables
 load_dotenv()
 
-from models import User, init_db, seed_default_users, users_collection
+from models import User, init_db, seed_default_users, users_collection, USER_LIST_FIELDS
 
 
 def list_users():
@@ -24,18 +24,16 @@ def list_users():
     print("All Users in Database")
     print("="*60)
     
-    users = User.get_all_users()
-    
-    if not users:
-        print("No users found in database.")
-        return
-    
-    for i, user in enumerate(users, 1):
-        print(f"\n{i}. {user['name']}")
+    count = 0
+    for count, user in enumerate(User.iter_all_users(projection=USER_LIST_FIELDS), 1):
+        print(f"\n{count}. {user['name']}")
         print(f"   Email: {user['email']}")
         print(f"   Role: {user['role']}")
         print(f"   Active: {user.get('is_active', True)}")
         print(f"   Created: {user.get('created_at', 'N/A')}")
+    
+    if not count:
+        print("No users found in database.")
 
 
 def delete_all_users():
@@ -85,7 +83,7 @@ def test_login():
         user = User.verify_password(test_user['email'], test_user['password'])
         if user:
             print(f"  ✓ Login successful!")
-            print(f"    Name: {user['name']}")
+            print(f"    Role: {user['role']}")
             print(f"    ID: {user['_id']}")
         else:
             print(f"  ✗ Login failed!")
@@ -110,6 +110,9 @@ def list_videos_by_mentor(db, mentor_id):
         sessions = db.sessions.find({
             'mentorId': mentor_id,
             'videoFileId': {'$exists': True}
+        }, projection={
+            'sessionId': 1, 'sessionName': 1, 'videoFileId': 1,
+            'mentorId': 1, 'date': 1, '_id': 0
         })
         return list(sessions)
     except Exception as e:
@@ -3,9 +3,10 @@ Usage:
     python ingest_session_from_files.py --analysis data/analysis_session_xxx.json --diarization data/diarization_session_xxx.json --mentor mentor_id --user user_id --video uploads/<file>
 """
 import argparse
+import heapq
 import json
 import os
-import uuid
+from bisect import bisect_right
 from datetime import datetime
 
 from models import Session
@@ -13,6 +14,13 @@ from models import Session
 DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
 UPLOAD_FOLDER = os.path.join(os.path.dirname(__file__), 'uploads')
 
+# Words-per-minute boundaries for audio pace: <120 poor, <160 normal, <180 moderate, else fast
+PACE_BOUNDS = (120, 160, 180)
+PACE_TYPES = ('poor', 'normal', 'moderate', 'fast')
+# Eye-contact boundaries for video quality: <60 poor, <80 moderate, <90 good, else excellent
+EYE_CONTACT_BOUNDS = (60, 80, 90)
+VIDEO_TYPES = ('poor', 'moderate', 'good', 'excellent')
+
 
 def format_hms(sec):
     sec = int(sec or 0)
@@ -23,11 +31,11 @@ def format_hms(sec):
 
 
 def build_session(analysis, diarization, mentor_id, user_id, video_filename=None, session_name=None):
-    session_id = f"session_{uuid.uuid4().hex[:8]}"
+    session_id = Session.generate_session_id()
     s = {
         'sessionId': session_id,
         'sessionName': session_name or (analysis.get('video_id') if isinstance(analysis, dict) else 'Session'),
-        'date': datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'date': datetime.utcnow().isoformat(timespec='seconds') + 'Z',
         'score': float(analysis.get('overall_score', 0)) if isinstance(analysis, dict) else 0,
         'weakMoments': [],
         'studentCount': 0,
@@ -80,10 +88,10 @@ def build_session(analysis, diarization, mentor_id, user_id, video_filename=None
     if isinstance(diarization, dict):
         sentences = diarization.get('sentences') or []
         for seg in sentences:
-            start = seg.get('start', 0)
-            end = seg.get('end', 0)
+            start = float(seg.get('start', 0))
+            end = float(seg.get('end', 0))
             text = seg.get('text') or seg.get('transcript') or ''
-            timeline_transcript.append({'startTime': float(start), 'endTime': float(end), 'text': text, 'keyPhrases': []})
+            timeline_transcript.append({'startTime': start, 'endTime': end, 'text': text, 'keyPhrases': []})
             needs = seg.get('needs_improvement') or seg.get('needsImprovement') or False
             if needs:
                 imp = seg.get('improvement') or {}
@@ -109,62 +117,40 @@ def build_session(analysis, diarization, mentor_id, user_id, video_filename=None
         total_duration = analysis.get('duration') or analysis.get('total_duration') or 0
 
     for seg in timeline_transcript:
-        start = float(seg.get('startTime', 0))
-        end = float(seg.get('endTime', 0))
+        # startTime/endTime were already converted to float above
+        start = seg['startTime']
+        end = seg['endTime']
         dur = max(0.001, end - start)
-        text = seg.get('text', '')
-        words = len(text.split())
+        words = len(seg['text'].split())
         # words per minute
-        pace = int((words / dur) * 60) if dur > 0 and words > 0 else 0
-        pauses = 0
-
-        # classify pace type
-        if pace >= 180:
-            a_type = 'fast'
-        elif pace >= 160:
-            a_type = 'moderate'
-        elif pace >= 120:
-            a_type = 'normal'
-        else:
-            a_type = 'poor'
+        pace = int((words / dur) * 60) if words else 0
 
         audio_segments.append({
             'startTime': start,
             'endTime': end,
             'pace': pace,
-            'pauses': pauses,
-            'type': a_type,
+            'pauses': 0,
+            'type': PACE_TYPES[bisect_right(PACE_BOUNDS, pace)],
             'message': ''
         })
+        # mark dips where pace too high or too low
+        if pace >= 180 or pace < 120:
+            score_dips.append({'timestamp': start, 'score': max(0, 70 - (abs(150 - pace) // 2)), 'message': f'Unusual pacing: {pace} wpm', 'type': 'audio'})
 
         # video segment heuristics: derive eyeContact and gestures from presence of keyPhrases
         key_phrases = seg.get('keyPhrases') or []
         eye_contact = 80 + min(15, len(key_phrases) * 2)
         gestures = 5 + min(20, len(key_phrases))
-        # classify video quality
-        if eye_contact >= 90:
-            v_type = 'excellent'
-        elif eye_contact >= 80:
-            v_type = 'good'
-        elif eye_contact >= 60:
-            v_type = 'moderate'
-        else:
-            v_type = 'poor'
-
         video_segments.append({
             'startTime': start,
             'endTime': end,
             'eyeContact': float(eye_contact),
             'gestures': int(gestures),
-            'type': v_type,
+            'type': VIDEO_TYPES[bisect_right(EYE_CONTACT_BOUNDS, eye_contact)],
             'message': ''
         })
 
-    # Create score events based on audio pace outliers and weak moments
-    for seg in audio_segments:
-        # mark dips where pace too high or too low
-        if seg['pace'] >= 180 or seg['pace'] < 120:
-            score_dips.append({'timestamp': seg['startTime'], 'score': max(0, 70 - (abs(150 - seg['pace']) // 2)), 'message': f'Unusual pacing: {seg["pace"]} wpm', 'type': 'audio'})
+    # Add score events for weak moments after the pacing dips
     for wm in weak_moments:
         # weak moments recorded as timestamps in HH:MM:SS; try to parse to seconds
         try:
@@ -180,10 +166,9 @@ def build_session(analysis, diarization, mentor_id, user_id, video_filename=None
         score_dips.append({'timestamp': secs, 'score': 60, 'message': wm.get('message', ''), 'type': 'weakMoment'})
 
     # For peaks, choose up to 3 longest transcript segments as positive moments
-    sorted_by_length = sorted(timeline_transcript, key=lambda x: (x.get('endTime', 0) - x.get('startTime', 0)), reverse=True)
-    for peak_seg in sorted_by_length[:3]:
-        ts = peak_seg.get('startTime', 0)
-        score_peaks.append({'timestamp': ts, 'score': 90, 'message': 'Strong moment', 'type': 'overall'})
+    longest = heapq.nlargest(3, timeline_transcript, key=lambda x: x['endTime'] - x['startTime'])
+    for peak_seg in longest:
+        score_peaks.append({'timestamp': peak_seg['startTime'], 'score': 90, 'message': 'Strong moment', 'type': 'overall'})
 
     # Assign built arrays to session
     s['timeline']['audio'] = audio_segments
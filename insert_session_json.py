@@ -3,25 +3,34 @@
 
 Usage:
   python backend/insert_session_json.py --file path/to/session.json [--download-video]
+  python backend/insert_session_json.py --file path/to/sessions_dir/ [--download-video]
 
 If --download-video is provided and the session JSON has a remote videoUrl, the script
 will download the video to `uploads/` and update the session document to reference the
 local file (and provide the streaming endpoint URL used by the app).
 """
 import argparse
+import glob
 import json
 import os
+import shutil
 import uuid
 import requests
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
+import orjson
 from bson import json_util
+from bson.json_util import RELAXED_JSON_OPTIONS
 from models import Session
 
 BASE_DIR = os.path.dirname(__file__)
 UPLOADS = os.path.join(BASE_DIR, 'uploads')
 os.makedirs(UPLOADS, exist_ok=True)
 
+# Concurrent parse/download workers when inserting a directory of sessions
+PREPARE_WORKERS = 8
+
 
 def download_video_to_uploads(url: str) -> str:
     """Download remote video to uploads folder and return filename."""
@@ -30,10 +39,10 @@ def download_video_to_uploads(url: str) -> str:
     try:
         with requests.get(url, stream=True, timeout=60) as r:
             r.raise_for_status()
+            # Let copyfileobj move the body in 1 MiB reads; decode gzip/deflate transfer encodings
+            r.raw.decode_content = True
             with open(out_path, 'wb') as f:
-                for chunk in r.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
+                shutil.copyfileobj(r.raw, f, length=1 << 20)
         return local_name
     except Exception as e:
         if os.path.exists(out_path):
@@ -41,21 +50,20 @@ def download_video_to_uploads(url: str) -> str:
         raise
 
 
-def main():
-    parser = argparse.ArgumentParser()
-    parser.add_argument('--file', required=True, help='Path to session JSON (Mongo extended JSON is supported)')
-    parser.add_argument('--download-video', action='store_true', help='If set, download remote videoUrl into uploads/')
-    args = parser.parse_args()
-
-    with open(args.file, 'r') as f:
+def load_session_doc(path: str, download_video: bool = False) -> dict:
+    """Parse one session JSON file and optionally download its video."""
+    with open(path, 'rb') as f:
         raw = f.read()
 
-    # Use bson.json_util to parse MongoDB Extended JSON (handles $date/$numberInt etc.)
-    session_doc = json_util.loads(raw)
+    # Only Extended JSON ($date/$oid/$numberInt etc.) needs bson.json_util; plain JSON goes through orjson
+    if b'"$' in raw:
+        session_doc = json_util.loads(raw, json_options=RELAXED_JSON_OPTIONS)
+    else:
+        session_doc = orjson.loads(raw)
 
     # If download flag and remote http(s) videoUrl exists, try to download
     video_url = session_doc.get('videoUrl')
-    if args.download_video and isinstance(video_url, str) and video_url.startswith('http'):
+    if download_video and isinstance(video_url, str) and video_url.startswith('http'):
         try:
             print('Downloading video...')
             local_filename = download_video_to_uploads(video_url)
@@ -68,15 +76,39 @@ def main():
 
     # Ensure required ids exist
     if 'sessionId' not in session_doc:
-        session_doc['sessionId'] = f'session_{uuid.uuid4().hex[:8]}'
+        session_doc['sessionId'] = Session.generate_session_id()
+
+    return session_doc
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--file', required=True, help='Path to a session JSON file or a directory of them (Mongo extended JSON is supported)')
+    parser.add_argument('--download-video', action='store_true', help='If set, download remote videoUrl into uploads/')
+    args = parser.parse_args()
+
+    if os.path.isdir(args.file):
+        paths = sorted(glob.glob(os.path.join(args.file, '*.json')))
+    else:
+        paths = [args.file]
+
+    # Parsing and video downloads are IO-bound, so load files concurrently
+    docs = []
+    with ThreadPoolExecutor(max_workers=PREPARE_WORKERS) as executor:
+        futures = {executor.submit(load_session_doc, path, args.download_video): path for path in paths}
+        for future in as_completed(futures):
+            try:
+                docs.append(future.result())
+            except Exception as e:
+                print(f'Failed to load {futures[future]}:', str(e))
 
-    # Convert any lingering datetimes if they are in bson types they should already be converted
+    # Batched Gemini fills, then everything inserted in one round trip
     try:
-        created = Session.create_session(session_doc)
-        print('Inserted session:', created.get('sessionId') or created.get('_id'))
-        print('Video URL (stored):', created.get('videoUrl') or created.get('uploadedFile'))
+        for created in Session.create_sessions_bulk(docs):
+            print('Inserted session:', created.get('sessionId') or created.get('_id'))
+            print('Video URL (stored):', created.get('videoUrl') or created.get('uploadedFile'))
     except Exception as e:
-        print('Failed to insert session:', str(e))
+        print('Failed to insert sessions:', str(e))
 
 
 if __name__ == '__main__':
@@ -11,13 +11,15 @@ Options:
     --limit N   Only migrate first N sessions
 """
 
-import json
 import sys
+import orjson
 from datetime import datetime
 from pathlib import Path
 from models import Session, sessions_collection
 import argparse
-from pymongo import MongoClient
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import BulkWriteError
 import os
 from dotenv import load_dotenv
 
@@ -26,35 +28,56 @@ load_dotenv()
 MONGODB_URI = os.getenv('MONGODB_URI', 'mongodb://localhost:27017')
 MONGODB_DB_NAME = os.getenv('MONGODB_DB_NAME', 'mentor_scoring')
 
-# Initialize MongoDB connection
-client = MongoClient(MONGODB_URI)
+# Initialize MongoDB connection. Migration moves whole session bodies with embedded
+# analysis/diarization JSON, so compress on the wire (zstd, falling back to built-in zlib).
+client = MongoClient(MONGODB_URI, compressors='zstd,zlib')
 db = client[MONGODB_DB_NAME]
 sessions_coll = db['sessions']
 
+# Migrations are written back in batches of this many updates
+BATCH_SIZE = 500
+# Concurrent prepare/Gemini-fill workers; the Gemini calls are latency-bound
+PREPARE_WORKERS = int(os.getenv('MIGRATION_WORKERS', '32'))
+# Documents queued for preparation at once
+MAX_IN_FLIGHT = PREPARE_WORKERS * 2
+# Documents fetched per cursor round trip when streaming the collection
+CURSOR_BATCH_SIZE = 500
+
+# Arrays every migrated session carries under 'timeline'
+TIMELINE_KEYS = ('audio', 'video', 'transcript', 'scoreDips', 'scorePeaks')
+
+# Server-side inverse of _is_already_migrated, so migrated sessions are never fetched
+NEEDS_MIGRATION_FILTER = {'$or': [
+    *({f'timeline.{key}': {'$not': {'$type': 'array'}}} for key in TIMELINE_KEYS),
+    {'metrics': {'$not': {'$type': 'array'}}},
+    {
+        'timeline.audio': {'$size': 0},
+        'timeline.video': {'$size': 0},
+        'timeline.transcript': {'$size': 0},
+        'metrics': {'$size': 0}
+    }
+]}
+
 
 def backup_sessions():
     """Create a backup of all sessions before migration."""
     timestamp = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
-    backup_file = f'sessions_backup_{timestamp}.json'
+    backup_file = f'sessions_backup_{timestamp}.ndjson'
     
     print(f"Creating backup: {backup_file}")
     
     try:
-        sessions = list(sessions_coll.find({}))
-        
-        # Convert ObjectId to string for JSON serialization
-        for s in sessions:
-            if '_id' in s:
-                s['_id'] = str(s['_id'])
-            if 'created_at' in s and isinstance(s['created_at'], datetime):
-                s['created_at'] = s['created_at'].isoformat()
-            if 'updated_at' in s and isinstance(s['updated_at'], datetime):
-                s['updated_at'] = s['updated_at'].isoformat()
+        count = 0
+        cursor = sessions_coll.find({}, no_cursor_timeout=True).batch_size(CURSOR_BATCH_SIZE)
         
-        with open(backup_file, 'w') as f:
-            json.dump({'sessions': sessions, 'timestamp': timestamp}, f, indent=2)
+        # Stream one session per line so the collection is never held in memory.
+        # orjson writes datetimes natively; ObjectIds fall through to str().
+        with cursor, open(backup_file, 'wb') as f:
+            for s in cursor:
+                f.write(orjson.dumps(s, default=str, option=orjson.OPT_NAIVE_UTC) + b'\n')
+                count += 1
         
-        print(f"✓ Backup created: {backup_file} ({len(sessions)} sessions)")
+        print(f"✓ Backup created: {backup_file} ({count} sessions)")
         return backup_file
         
     except Exception as e:
@@ -62,6 +85,41 @@ def backup_sessions():
         return None
 
 
+def prepare_migration(session_doc, now=None):
+    """
+    Build the schema update for a session without writing it.
+    
+    Args:
+        session_doc: Session document to migrate
+        now: updated_at timestamp to stamp (defaults to the current time)
+        
+    Returns:
+        tuple: (filter, update) for the session, with update None when nothing
+        changed, or None on error
+    """
+    try:
+        # Prepare and normalize the session. prepare_for_insert rebuilds every
+        # dict/list it touches, so the fetched document is never mutated.
+        prepared = Session.prepare_for_insert(session_doc)
+        
+        # Fill missing fields using Gemini
+        enriched = Session.fill_missing_fields_with_gemini(prepared)
+        
+        # Only send the top-level fields that actually changed
+        changed = {k: v for k, v in enriched.items() if k not in session_doc or session_doc[k] != v}
+        if not changed:
+            return {'sessionId': session_doc.get('sessionId')}, None
+        
+        # Update timestamps
+        changed['updated_at'] = now or datetime.utcnow()
+        
+        return {'sessionId': session_doc.get('sessionId')}, {'$set': changed}
+        
+    except Exception as e:
+        print(f"✗ Error migrating session: {str(e)}")
+        return None
+
+
 def migrate_session(session_id=None, session_doc=None):
     """
     Migrate a single session to the new schema.
@@ -81,33 +139,162 @@ def migrate_session(session_id=None, session_doc=None):
         if not session_doc:
             return None
         
-        # Prepare and normalize the session
-        prepared = Session.prepare_for_insert(session_doc.copy())
-        
-        # Fill missing fields using Gemini
-        enriched = Session.fill_missing_fields_with_gemini(prepared)
-        
-        # Update timestamps
-        enriched['updated_at'] = datetime.utcnow()
+        migration = prepare_migration(session_doc)
+        if not migration:
+            return None
+        if migration[1] is None:
+            return session_doc
         
         # Update in database
-        result = sessions_coll.find_one_and_update(
-            {'sessionId': session_doc.get('sessionId')},
-            {'$set': enriched},
-            return_document=True
-        )
-        
-        return result
+        return sessions_coll.find_one_and_update(*migration, return_document=True)
         
     except Exception as e:
         print(f"✗ Error migrating session: {str(e)}")
         return None
 
 
+def _not_array(path):
+    """Aggregation expression: true when the field at path is missing or not an array"""
+    return {'$not': [{'$isArray': path}]}
+
+
+def _timeline_derivation_pipeline():
+    """
+    Update pipeline that derives timeline.audio, timeline.video and timeline.scorePeaks
+    from timeline.transcript with the same heuristics as build_session, filling only
+    the arrays that are missing.
+    """
+    duration = {'$max': [0.001, {'$subtract': ['$$end', '$$start']}]}
+    words = {'$size': {'$filter': {
+        'input': {'$split': [{'$ifNull': ['$$seg.text', '']}, ' ']},
+        'cond': {'$ne': ['$$this', '']}
+    }}}
+    bounds = {
+        'start': {'$toDouble': {'$ifNull': ['$$seg.startTime', 0]}},
+        'end': {'$toDouble': {'$ifNull': ['$$seg.endTime', 0]}},
+    }
+
+    audio = {'$map': {'input': '$timeline.transcript', 'as': 'seg', 'in': {'$let': {
+        'vars': {**bounds, 'words': words},
+        'in': {'$let': {
+            'vars': {'pace': {'$cond': [
+                {'$gt': ['$$words', 0]},
+                {'$toInt': {'$multiply': [{'$divide': ['$$words', duration]}, 60]}},
+                0
+            ]}},
+            'in': {
+                'startTime': '$$start',
+                'endTime': '$$end',
+                'pace': '$$pace',
+                'pauses': 0,
+                'type': {'$switch': {'branches': [
+                    {'case': {'$gte': ['$$pace', 180]}, 'then': 'fast'},
+                    {'case': {'$gte': ['$$pace', 160]}, 'then': 'moderate'},
+                    {'case': {'$gte': ['$$pace', 120]}, 'then': 'normal'},
+                ], 'default': 'poor'}},
+                'message': ''
+            }
+        }}
+    }}}}
+
+    key_phrases = {'$size': {'$cond': [{'$isArray': '$$seg.keyPhrases'}, '$$seg.keyPhrases', []]}}
+    video = {'$map': {'input': '$timeline.transcript', 'as': 'seg', 'in': {'$let': {
+        'vars': {
+            **bounds,
+            'eye': {'$add': [80, {'$min': [15, {'$multiply': [key_phrases, 2]}]}]},
+            'gestures': {'$add': [5, {'$min': [20, key_phrases]}]},
+        },
+        'in': {
+            'startTime': '$$start',
+            'endTime': '$$end',
+            'eyeContact': {'$toDouble': '$$eye'},
+            'gestures': '$$gestures',
+            'type': {'$switch': {'branches': [
+                {'case': {'$gte': ['$$eye', 90]}, 'then': 'excellent'},
+                {'case': {'$gte': ['$$eye', 80]}, 'then': 'good'},
+                {'case': {'$gte': ['$$eye', 60]}, 'then': 'moderate'},
+            ], 'default': 'poor'}},
+            'message': ''
+        }
+    }}}}
+
+    # Up to 3 longest transcript segments become peaks
+    longest = {'$slice': [{'$sortArray': {
+        'input': {'$map': {'input': '$timeline.transcript', 'as': 'seg', 'in': {'$let': {
+            'vars': bounds,
+            'in': {'length': {'$subtract': ['$$end', '$$start']}, 'timestamp': '$$start'}
+        }}}},
+        'sortBy': {'length': -1}
+    }}, 3]}
+    peaks = {'$map': {'input': longest, 'as': 'p', 'in': {
+        'timestamp': '$$p.timestamp', 'score': 90, 'message': 'Strong moment', 'type': 'overall'
+    }}}
+
+    return [{'$set': {
+        'timeline.audio': {'$cond': [_not_array('$timeline.audio'), audio, '$timeline.audio']},
+        'timeline.video': {'$cond': [_not_array('$timeline.video'), video, '$timeline.video']},
+        'timeline.scorePeaks': {'$cond': [_not_array('$timeline.scorePeaks'), peaks, '$timeline.scorePeaks']},
+        'updated_at': '$$NOW'
+    }}]
+
+
+def derive_timelines_server_side(migration_filter=NEEDS_MIGRATION_FILTER):
+    """
+    Fill missing audio/video/peak arrays in one server-side update_many for sessions
+    that still need migration but already have a transcript. Those sessions then
+    skip the Python/Gemini path (or reach it with less to fill).
+    
+    Args:
+        migration_filter: Sessions to consider; defaults to every session needing migration
+    
+    Returns:
+        int: Number of sessions updated
+    """
+    query = {'$and': [
+        migration_filter,
+        {'timeline.transcript.0': {'$exists': True}},
+        {'$or': [
+            {f'timeline.{key}': {'$not': {'$type': 'array'}}}
+            for key in ('audio', 'video', 'scorePeaks')
+        ]}
+    ]}
+    try:
+        result = sessions_coll.update_many(query, _timeline_derivation_pipeline())
+        print(f"✓ Derived timelines server-side for {result.modified_count} sessions")
+        return result.modified_count
+    except Exception as e:
+        # $sortArray needs MongoDB 5.2+; older servers just use the Python path
+        print(f"⚠ Server-side timeline derivation skipped: {str(e)}")
+        return 0
+
+
+def _flush_migrations(ops, stats):
+    """Write a batch of prepared migrations in one unordered bulk_write and update stats"""
+    if not ops:
+        return
+    try:
+        result = sessions_coll.bulk_write(ops, ordered=False)
+        stats['migrated'] += result.matched_count
+        stats['failed'] += len(ops) - result.matched_count
+    except BulkWriteError as e:
+        failed = len(e.details.get('writeErrors', []))
+        stats['migrated'] += len(ops) - failed
+        stats['failed'] += failed
+        print(f"\n⚠ {failed} updates in batch failed")
+    except Exception as e:
+        stats['failed'] += len(ops)
+        print(f"\n✗ Batch write failed: {str(e)}")
+    print(f"\n→ Wrote batch of {len(ops)} migrations")
+    ops.clear()
+
+
 def migrate_all_sessions(limit=None, use_backup=True):
     """
     Migrate all sessions in the database to the new schema.
     
+    Sessions are prepared (schema coercion + Gemini fill) on a thread pool, since the
+    Gemini calls are network-bound, and written back in unordered bulk_write batches.
+    
     Args:
         limit: Maximum number of sessions to migrate
         use_backup: Whether to create backup before migration
@@ -133,41 +320,77 @@ def migrate_all_sessions(limit=None, use_backup=True):
     print("MIGRATING SESSIONS TO NEW SCHEMA")
     print("="*80)
     
+    # Every update filters on sessionId; make sure it is indexed even if init_db never ran
+    try:
+        sessions_coll.create_index('sessionId', unique=True)
+    except Exception as e:
+        print(f"⚠ Could not ensure sessionId index: {str(e)}")
+    
     try:
-        # Get all sessions
-        query = sessions_coll.find({})
+        # With a limit, pin the run to the first N sessions needing migration so the
+        # server-side pass below can't touch anything outside them
+        migration_filter = NEEDS_MIGRATION_FILTER
         if limit:
-            query = query.limit(limit)
+            ids = [d['_id'] for d in sessions_coll.find(NEEDS_MIGRATION_FILTER, {'_id': 1}).limit(limit)]
+            migration_filter = {'$and': [NEEDS_MIGRATION_FILTER, {'_id': {'$in': ids}}]}
         
-        sessions = list(query)
-        stats['total'] = len(sessions)
+        # Transcript-backed sessions get their derived arrays in one DB-side pass first
+        derive_timelines_server_side(migration_filter)
         
-        print(f"\nFound {stats['total']} sessions to migrate")
+        # Count up-front for progress output, then stream the cursor in batches
+        needing = sessions_coll.count_documents(NEEDS_MIGRATION_FILTER)
+        already = max(0, sessions_coll.estimated_document_count() - needing)
+        stats['total'] = min(needing, limit) if limit else needing
         
-        for idx, session_doc in enumerate(sessions, 1):
-            session_id = session_doc.get('sessionId', session_doc.get('_id', 'unknown'))
-            print(f"\n[{idx}/{stats['total']}] Migrating {session_id}...", end=' ')
-            
-            try:
-                # Check if already migrated
-                if _is_already_migrated(session_doc):
-                    print("already migrated ✓")
+        print(f"\nFound {stats['total']} sessions to migrate ({already} already migrated)")
+        
+        # Already-migrated sessions are filtered out by the server
+        cursor = sessions_coll.find(migration_filter, no_cursor_timeout=True).batch_size(CURSOR_BATCH_SIZE)
+        if limit:
+            cursor = cursor.limit(limit)
+        
+        ops = []
+        in_flight = {}  # future -> (position, sessionId)
+        # Sessions in the same write batch share one updated_at
+        batch_now = datetime.utcnow()
+        
+        def collect(done):
+            """Turn finished preparations into update ops, flushing every BATCH_SIZE"""
+            nonlocal batch_now
+            for future in done:
+                pos, session_id = in_flight.pop(future)
+                migration = future.result()
+                print(f"\n[{pos}/{stats['total']}] Migrating {session_id}...", end=' ')
+                if migration and migration[1] is None:
+                    print("no changes ✓", end=' ')
                     stats['skipped'] += 1
-                    continue
-                
-                # Migrate the session
-                result = migrate_session(session_doc=session_doc)
-                
-                if result:
-                    print("migrated ✓")
-                    stats['migrated'] += 1
+                elif migration:
+                    print("prepared ✓", end=' ')
+                    ops.append(UpdateOne(*migration))
                 else:
-                    print("failed ✗")
+                    print("failed ✗", end=' ')
                     stats['failed'] += 1
-                    
-            except Exception as e:
-                print(f"error: {str(e)} ✗")
-                stats['failed'] += 1
+                if len(ops) >= BATCH_SIZE:
+                    _flush_migrations(ops, stats)
+                    batch_now = datetime.utcnow()
+        
+        # Keep a bounded window of preparations running so slow Gemini calls never
+        # stall the rest, without pulling the whole cursor into memory
+        with cursor, ThreadPoolExecutor(max_workers=PREPARE_WORKERS) as executor:
+            for idx, session_doc in enumerate(cursor, 1):
+                session_id = session_doc.get('sessionId', session_doc.get('_id', 'unknown'))
+                # Safety net in case the server filter and schema check drift apart
+                if _is_already_migrated(session_doc):
+                    print(f"\n[{idx}/{stats['total']}] {session_id} already migrated ✓", end=' ')
+                    stats['skipped'] += 1
+                    continue
+                in_flight[executor.submit(prepare_migration, session_doc, batch_now)] = (idx, session_id)
+                if len(in_flight) >= MAX_IN_FLIGHT:
+                    done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                    collect(done)
+            
+            collect(list(in_flight))
+            _flush_migrations(ops, stats)
         
         print("\n" + "="*80)
         print("MIGRATION COMPLETE")
@@ -192,29 +415,18 @@ def migrate_all_sessions(limit=None, use_backup=True):
 
 def _is_already_migrated(session_doc):
     """Check if a session has already been migrated to the new schema."""
-    timeline = session_doc.get('timeline', {})
-    
-    # New schema always has these 5 arrays in timeline
-    has_audio = isinstance(timeline.get('audio'), list)
-    has_video = isinstance(timeline.get('video'), list)
-    has_transcript = isinstance(timeline.get('transcript'), list)
-    has_dips = isinstance(timeline.get('scoreDips'), list)
-    has_peaks = isinstance(timeline.get('scorePeaks'), list)
+    timeline = session_doc.get('timeline') or {}
+    metrics = session_doc.get('metrics')
     
-    # Must have metrics
-    has_metrics = isinstance(session_doc.get('metrics'), list)
-    
-    # New schema should have proper structure
-    is_migrated = (has_audio and has_video and has_transcript and 
-                   has_dips and has_peaks and has_metrics)
+    # New schema always has these 5 arrays in timeline, and must have metrics
+    if not isinstance(metrics, list):
+        return False
+    for key in TIMELINE_KEYS:
+        if not isinstance(timeline.get(key), list):
+            return False
     
     # Additional check: at least one timeline array should have data
-    has_data = (len(timeline.get('audio', [])) > 0 or
-                len(timeline.get('video', [])) > 0 or
-                len(timeline.get('transcript', [])) > 0 or
-                len(session_doc.get('metrics', [])) > 0)
-    
-    return is_migrated and has_data
+    return bool(timeline['audio'] or timeline['video'] or timeline['transcript'] or metrics)
 
 
 def validate_migrated_session(session_id):
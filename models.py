@@ -1,10 +1,23 @@
 """
 Database models for the mentor scoring system
 """
-from pymongo import MongoClient
-from werkzeug.security import generate_password_hash, check_password_hash
+from pymongo import MongoClient, ReturnDocument, UpdateOne
+from pymongo.write_concern import WriteConcern
+from pymongo.errors import BulkWriteError
+from bson.objectid import ObjectId
+from bson.errors import InvalidId
+from werkzeug.security import check_password_hash
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
 from datetime import datetime
 import os
+import copy
+import hashlib
+import orjson
+import secrets
+import threading
+import time
+from collections import OrderedDict
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -13,14 +26,399 @@ load_dotenv()
 MONGODB_URI = os.getenv('MONGODB_URI', 'mongodb://localhost:27017')
 MONGODB_DB_NAME = os.getenv('MONGODB_DB_NAME', 'mentor_scoring')
 
-# Initialize MongoDB connection
-client = MongoClient(MONGODB_URI)
+# Initialize MongoDB connection. The pool is shared by request threads and the background
+# analysis workers, so keep a few warm connections, reclaim idle ones after 5 minutes,
+# and fail fast when it's exhausted.
+# Wire compression matters for the large analysis/diarization payloads stored on sessions
+# (zstd needs the zstandard package; zlib is the built-in fallback).
+client = MongoClient(
+    MONGODB_URI,
+    maxPoolSize=int(os.getenv('MONGODB_MAX_POOL_SIZE', '50')),
+    minPoolSize=int(os.getenv('MONGODB_MIN_POOL_SIZE', '10')),
+    maxIdleTimeMS=300_000,
+    waitQueueTimeoutMS=2000,
+    serverSelectionTimeoutMS=5000,
+    socketTimeoutMS=30000,
+    retryWrites=True,
+    compressors='zstd,zlib'
+)
 db = client[MONGODB_DB_NAME]
 
 # Get collections
 users_collection = db['users']
 sessions_collection = db['sessions']
+# Analysis output is regenerable from the source video, so finished-session writes only wait
+# for the primary's acknowledgement (no majority/journal wait). Use sessions_collection for
+# anything that must be durable.
+sessions_collection_fast = db.get_collection('sessions', write_concern=WriteConcern(w=1, j=False))
+# Fire-and-forget handle for derived-field write-backs that are safe to lose
+sessions_collection_nowait = db.get_collection('sessions', write_concern=WriteConcern(w=0))
 mentor_profiles_collection = db['mentor_profiles']
+# Gemini fill responses keyed by a hash of the prompt that produced them
+gemini_fill_cache_collection = db['gemini_fill_cache']
+
+# Fields shown when listing users (skips password hashes and profile extras)
+USER_LIST_FIELDS = {'name': 1, 'email': 1, 'role': 1, 'is_active': 1, 'created_at': 1}
+# Default fields for single-user lookups; never includes the password hash
+USER_PUBLIC_FIELDS = {**USER_LIST_FIELDS, 'verified': 1}
+# Just what a login check needs
+USER_AUTH_FIELDS = {'password_hash': 1, 'role': 1}
+
+# Just the fields score calculations read from a session
+SESSION_SCORE_FIELDS = {'metrics.name': 1, 'metrics.score': 1, 'created_at': 1}
+# Session list views: everything except the large timeline/analysis/diarization payloads
+SESSION_LIST_PROJECTION = {'timeline': 0, 'analysis': 0, 'diarization': 0}
+
+# Mentor roster changes rarely, so the id list is cached for a few minutes
+MENTOR_IDS_TTL_SECONDS = 300
+_mentor_ids_cache = None  # (expires_at, [mentor ids])
+
+# Short-lived cache of email lookups (login, re-validation). Kept short so role and
+# password changes made by other processes show up quickly.
+USER_EMAIL_CACHE_SIZE = 10_000
+USER_EMAIL_CACHE_TTL_SECONDS = 60
+_user_email_cache = OrderedDict()  # email -> (expires_at, {projection key: user doc})
+_user_email_cache_lock = threading.Lock()
+
+# In-process hot set in front of gemini_fill_cache
+GEMINI_FILL_CACHE_SIZE = 256
+# How long gemini_fill_cache entries live (TTL index on created_at)
+GEMINI_FILL_CACHE_TTL_SECONDS = int(os.getenv('GEMINI_FILL_CACHE_TTL_SECONDS', str(7 * 24 * 3600)))
+# Fields left out of the fill cache key: they change on every write but don't affect the fill
+_FILL_HASH_VOLATILE_FIELDS = frozenset(('_id', 'created_at', 'updated_at', 'status'))
+# Gemini prompt for filling empty whatHelped/whatHurt lists; formatted with metrics_csv.
+# The output shape is enforced by _METRIC_FEEDBACK_CONFIG, so no example JSON is needed.
+_METRIC_FEEDBACK_PROMPT_TMPL = """You are analyzing a mentor presentation session. Based on these metrics and scores:
+{metrics_csv}
+
+For EACH metric, provide 2-3 items for "whatHelped" (positive aspects that contributed to the score) 
+and 2-3 items for "whatHurt" (areas that need improvement)."""
+
+_STRING_LIST_SCHEMA = {'type': 'ARRAY', 'items': {'type': 'STRING'}}
+# Structured-output schema for _METRIC_FEEDBACK_PROMPT_TMPL responses
+_METRIC_FEEDBACK_SCHEMA = {
+    'type': 'OBJECT',
+    'properties': {
+        'metrics': {
+            'type': 'ARRAY',
+            'items': {
+                'type': 'OBJECT',
+                'properties': {
+                    'name': {'type': 'STRING'},
+                    'whatHelped': _STRING_LIST_SCHEMA,
+                    'whatHurt': _STRING_LIST_SCHEMA,
+                },
+                'required': ['name', 'whatHelped', 'whatHurt'],
+            },
+        },
+    },
+    'required': ['metrics'],
+}
+
+# generate_content configs: native JSON output, so responses never come back fenced
+_GEMINI_JSON_CONFIG = {'response_mime_type': 'application/json'}
+_METRIC_FEEDBACK_CONFIG = {**_GEMINI_JSON_CONFIG, 'response_schema': _METRIC_FEEDBACK_SCHEMA}
+
+# Gemini prompt for synthesizing missing session fields; formatted with session_name and duration
+_FILL_MISSING_PROMPT_TMPL = """You are an AI that synthesizes comprehensive session analysis data for mentor presentations.
+Given a session about "{session_name}" with duration {duration} seconds, 
+generate ONLY valid JSON (no markdown wrapping, no extra text):
+
+{{
+  "timeline": {{
+    "audio": [
+      {{"startTime": 0, "endTime": 300, "pace": 150, "pauses": 3, "type": "normal", "message": "Good opening pace"}},
+      {{"startTime": 300, "endTime": 600, "pace": 180, "pauses": 1, "type": "fast", "message": "Speaking speed increased"}},
+      {{"startTime": 600, "endTime": 900, "pace": 145, "pauses": 4, "type": "normal", "message": ""}}
+    ],
+    "video": [
+      {{"startTime": 0, "endTime": 400, "eyeContact": 85, "gestures": 8, "type": "good", "message": "Strong eye contact"}},
+      {{"startTime": 400, "endTime": 750, "eyeContact": 50, "gestures": 3, "type": "poor", "message": "Eye contact dropped"}},
+      {{"startTime": 750, "endTime": 1200, "eyeContact": 90, "gestures": 10, "type": "excellent", "message": ""}}
+    ],
+    "transcript": [
+      {{"startTime": 0, "endTime": 120, "text": "Welcome to this session on mentoring. Today we'll cover key topics.", "keyPhrases": ["welcome", "mentoring", "session"]}},
+      {{"startTime": 300, "endTime": 450, "text": "Let's dive into the main content with real examples.", "keyPhrases": ["main content", "examples"]}},
+      {{"startTime": 600, "endTime": 750, "text": "Any questions before we move forward?", "keyPhrases": ["questions", "engagement"]}}
+    ],
+    "scoreDips": [
+      {{"timestamp": 450, "score": 65, "message": "Speaking speed increased, harder to follow", "type": "audio"}},
+      {{"timestamp": 500, "score": 60, "message": "Eye contact dropped, audience engagement decreased", "type": "video"}},
+      {{"timestamp": 400, "score": 70, "message": "Brief loss of engagement", "type": "engagement"}}
+    ],
+    "scorePeaks": [
+      {{"timestamp": 100, "score": 92, "message": "Excellent clarity and engagement", "type": "overall"}},
+      {{"timestamp": 800, "score": 90, "message": "Strong gestures and eye contact", "type": "video"}},
+      {{"timestamp": 200, "score": 88, "message": "Perfect pacing and delivery", "type": "audio"}}
+    ]
+  }},
+  "metrics": [
+    {{"name": "Clarity", "score": 78, "confidenceInterval": [74, 82], "whatHelped": ["Clear explanations", "Good examples", "Well-structured content"], "whatHurt": ["Some jargon without context", "Rushed middle section", "Could use more visuals"]}},
+    {{"name": "Engagement", "score": 82, "confidenceInterval": [78, 86], "whatHelped": ["Interactive questions", "Varied tone", "Good eye contact"], "whatHurt": ["Brief attention dips", "Could ask more questions", "Some pauses felt long"]}},
+    {{"name": "Pacing", "score": 76, "confidenceInterval": [72, 80], "whatHelped": ["Steady opening", "Good transition points", "Clear conclusions"], "whatHurt": ["Speaking speed increased mid-session", "Some sections rushed", "Pauses not optimal"]}},
+    {{"name": "Eye Contact", "score": 80, "confidenceInterval": [76, 84], "whatHelped": ["Strong opening engagement", "Good focus in Q&A", "Natural gaze patterns"], "whatHurt": ["Looked at notes too often", "One segment lost connection", "Could engage left side more"]}},
+    {{"name": "Gestures", "score": 85, "confidenceInterval": [81, 89], "whatHelped": ["Expressive hand movements", "Natural gestures", "Good use for emphasis"], "whatHurt": ["Some repetitive motions", "Could vary more", "Limited in one section"]}},
+    {{"name": "Overall", "score": 80, "confidenceInterval": [76, 84], "whatHelped": ["Professional delivery", "Well-prepared content", "Good audience connection"], "whatHurt": ["Minor pacing issues", "Could improve engagement further", "Some technical terms unclear"]}}
+  ],
+  "weakMoments": [
+    {{"timestamp": "00:07:30", "message": "Speaking speed increased - slow down for clarity"}},
+    {{"timestamp": "00:08:20", "message": "Eye contact dropped - engage audience more"}},
+    {{"timestamp": "00:06:40", "message": "Consider adding visual aids for technical concepts"}}
+  ]
+}}
+
+CRITICAL REQUIREMENTS:
+- ALWAYS include ALL 6 metrics: Clarity, Engagement, Pacing, Eye Contact, Gestures, Overall
+- EVERY metric MUST have: name, score (0-100), confidenceInterval [min,max], whatHelped (3+ items), whatHurt (3+ items)
+- whatHelped: specific POSITIVE aspects (e.g., "Clear explanations", "Good eye contact", "Natural gestures")
+- whatHurt: specific AREAS FOR IMPROVEMENT (e.g., "Jargon without context", "Speaking too fast", "Limited gestures")
+- NEVER leave whatHelped or whatHurt empty
+- timeline.audio: 4-6 segments with pace (100-200 wpm), pauses count, type, message
+- timeline.video: 4-5 segments with eyeContact %, gestures count, type, message
+- timeline.transcript: 4-5 segments with text and keyPhrases (3+ phrases each)
+- scoreDips & scorePeaks: 3-4 items each with timestamp, score, message, type
+- weakMoments: 3-4 actionable improvement suggestions
+- RETURN ONLY valid JSON, no markdown code blocks, no extra text"""
+
+# Fill prompts combined into one Gemini request by Session.prefetch_missing_fields
+GEMINI_FILL_BATCH_SIZE = 5
+_gemini_fill_cache = OrderedDict()
+_gemini_fill_cache_lock = threading.Lock()
+
+# Normalized API views of sessions, keyed by sessionId and valid while updated_at matches.
+# Kept small because each entry carries the session's diarization payload.
+NORMALIZED_SESSION_CACHE_SIZE = int(os.getenv('NORMALIZED_SESSION_CACHE_SIZE', '256'))
+_normalized_session_cache = OrderedDict()  # sessionId -> (updated_at, normalized dict)
+_normalized_session_cache_lock = threading.Lock()
+
+
+try:
+    from google import genai
+except ImportError:
+    genai = None
+
+_gemini_client = None
+_gemini_client_lock = threading.Lock()
+
+
+def get_gemini_client():
+    """
+    Return the process-wide Gemini client, created on first use so every caller
+    shares one client (and its HTTP connection pool).
+    
+    Returns:
+        genai.Client or None if google-genai isn't installed or GEMINI_API_KEY is unset
+    """
+    global _gemini_client
+    if _gemini_client is None:
+        api_key = os.getenv('GEMINI_API_KEY')
+        if genai is None or not api_key:
+            return None
+        with _gemini_client_lock:
+            if _gemini_client is None:
+                _gemini_client = genai.Client(api_key=api_key)
+    return _gemini_client
+
+
+# Argon2id password hashing (OWASP baseline: 46 MiB, t=3, p=1)
+_password_hasher = PasswordHasher(time_cost=3, memory_cost=46 * 1024, parallelism=1)
+# Verified against when an email is unknown, so failed logins take the same time either way
+_DUMMY_PASSWORD_HASH = _password_hasher.hash('dummy-password')
+
+
+def _hash_password(password):
+    """Hash a password with Argon2id"""
+    return _password_hasher.hash(password)
+
+
+def _check_password(stored_hash, password):
+    """
+    Check a password against a stored hash. Hashes from before the Argon2 switch
+    (werkzeug PBKDF2/scrypt) are still accepted and reported as needing a rehash.
+    
+    Returns:
+        tuple: (matches, needs_rehash)
+    """
+    if not stored_hash:
+        return False, False
+    if not stored_hash.startswith('$argon2'):
+        return check_password_hash(stored_hash, password), True
+    try:
+        _password_hasher.verify(stored_hash, password)
+    except (VerificationError, InvalidHashError):
+        return False, False
+    return True, _password_hasher.check_needs_rehash(stored_hash)
+
+
+# Extended JSON wrapper keys handled by _unwrap_extjson
+_EXT_KEYS = frozenset(('$numberInt', '$numberLong', '$oid', '$date'))
+
+
+def _unwrap_extjson(val):
+    """Recursively convert Extended JSON wrappers to native types, returning fresh containers"""
+    if isinstance(val, list):
+        return [_unwrap_extjson(v) for v in val]
+    if not isinstance(val, dict):
+        return val
+    # Plain sub-documents (the common case) skip the wrapper checks entirely
+    if _EXT_KEYS.isdisjoint(val):
+        return {k: _unwrap_extjson(v) for k, v in val.items()}
+    if '$numberInt' in val:
+        try:
+            return int(val['$numberInt'])
+        except Exception:
+            return int(float(val['$numberInt']))
+    if '$numberLong' in val:
+        try:
+            return int(val['$numberLong'])
+        except Exception:
+            return int(float(val['$numberLong']))
+    if '$oid' in val:
+        try:
+            return ObjectId(val['$oid'])
+        except Exception:
+            return val['$oid']
+    d = val['$date']
+    # nested object with $numberLong
+    if isinstance(d, dict) and '$numberLong' in d:
+        try:
+            ms = int(d['$numberLong'])
+            return datetime.utcfromtimestamp(ms / 1000.0)
+        except Exception:
+            return None
+    # direct epoch millis
+    try:
+        ms = int(d)
+        return datetime.utcfromtimestamp(ms / 1000.0)
+    except Exception:
+        return None
+
+
+def _merge_metric(metric, feedback_map):
+    """Fill a metric's empty whatHelped/whatHurt from its generated feedback; ensures both lists exist"""
+    feedback = feedback_map.get(metric.get('name'))
+    if feedback is not None:
+        metric['whatHelped'] = metric.get('whatHelped') or feedback.get('whatHelped', [])
+        metric['whatHurt'] = metric.get('whatHurt') or feedback.get('whatHurt', [])
+    else:
+        metric.setdefault('whatHelped', [])
+        metric.setdefault('whatHurt', [])
+    return metric
+
+
+def _to_int(v, default=0):
+    """Coerce v to an int; clean ints (the common case) skip the exception machinery entirely"""
+    if type(v) is int:
+        return v
+    if not v:
+        return default
+    try:
+        return int(v)
+    except (TypeError, ValueError, OverflowError):
+        try:
+            return int(float(v))
+        except (TypeError, ValueError, OverflowError):
+            return default
+
+
+def _to_float(v, default=0.0):
+    """Coerce v to a float, returning default for missing or malformed values"""
+    if type(v) is float:
+        return v
+    if not v:
+        return default
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return default
+
+
+def _or_default(default):
+    """Coercer that keeps truthy values and replaces missing/empty ones with an immutable default"""
+    return lambda v: v or default
+
+
+def _or_empty_list(v):
+    """Coercer that keeps truthy values and replaces missing/empty ones with a fresh list"""
+    return v or []
+
+
+# Timeline segment schemas: (output key, input aliases tried in order, coercer, canonical
+# type). The coercer receives the first alias value that is present (not None), so a
+# legitimate 0 isn't overridden by a later alias, or None when no alias is set.
+_AUDIO_SCHEMA = (
+    ('startTime', ('startTime', 'start'), _to_int, int),
+    ('endTime', ('endTime', 'end'), _to_int, int),
+    ('pace', ('pace',), _to_int, int),
+    ('pauses', ('pauses',), _to_int, int),
+    ('type', ('type',), _or_default('normal'), str),
+    ('message', ('message',), _or_default(''), str),
+)
+_VIDEO_SCHEMA = (
+    ('startTime', ('startTime', 'start'), _to_int, int),
+    ('endTime', ('endTime', 'end'), _to_int, int),
+    ('eyeContact', ('eyeContact', 'eye_contact'), _to_float, float),
+    ('gestures', ('gestures',), _to_int, int),
+    ('type', ('type',), _or_default('good'), str),
+    ('message', ('message',), _or_default(''), str),
+)
+_TRANSCRIPT_SCHEMA = (
+    ('startTime', ('startTime', 'start'), _to_int, int),
+    ('endTime', ('endTime', 'end'), _to_int, int),
+    ('text', ('text', 'transcript'), _or_default(''), str),
+    ('keyPhrases', ('keyPhrases', 'key_phrases'), _or_empty_list, list),
+)
+_SCORE_SCHEMA = (
+    ('timestamp', ('timestamp', 'time', 'ts'), _to_int, int),
+    ('score', ('score',), _to_int, int),
+    ('message', ('message',), _or_default(''), str),
+    ('type', ('type',), _or_default(''), str),
+)
+_TIMELINE_SCHEMAS = (
+    ('audio', _AUDIO_SCHEMA),
+    ('video', _VIDEO_SCHEMA),
+    ('transcript', _TRANSCRIPT_SCHEMA),
+    ('scoreDips', _SCORE_SCHEMA),
+    ('scorePeaks', _SCORE_SCHEMA),
+)
+
+
+def _is_canonical_list(items, schema):
+    """True when every segment already has exactly the schema's keys, types and non-default-able values"""
+    width = len(schema)
+    for seg in items:
+        if type(seg) is not dict or len(seg) != width:
+            return False
+        get = seg.get
+        for key, _, coerce, canonical_type in schema:
+            v = get(key)
+            # Empty values are only canonical if the coercer would leave them as they are
+            if type(v) is not canonical_type or (not v and coerce(v) != v):
+                return False
+    return True
+
+
+def _normalize_list(items, schema):
+    """
+    Coerce a list of timeline segments to the shape described by schema. Lists that
+    are already canonical (e.g. written by prepare_for_insert) are returned as-is.
+    """
+    if type(items) is list and _is_canonical_list(items, schema):
+        return items
+    out = []
+    append = out.append
+    for seg in items or ():
+        get = (seg or {}).get
+        row = {}
+        for key, aliases, coerce, _ in schema:
+            v = None
+            for alias in aliases:
+                v = get(alias)
+                if v is not None:
+                    break
+            row[key] = coerce(v)
+        append(row)
+    return out
 
 
 class User:
@@ -43,7 +441,7 @@ class User:
         user_doc = {
             'name': name,
             'email': email,
-            'password_hash': generate_password_hash(password),
+            'password_hash': _hash_password(password),
             'role': role,
             'created_at': datetime.utcnow(),
             'updated_at': datetime.utcnow(),
@@ -52,43 +450,101 @@ class User:
         
         result = users_collection.insert_one(user_doc)
         user_doc['_id'] = str(result.inserted_id)
+        User.invalidate_email_cache(email)
+        if role == 'mentor':
+            User.invalidate_mentor_ids()
         return user_doc
     
     @staticmethod
-    def find_by_email(email):
+    def find_by_email(email, projection=USER_PUBLIC_FIELDS):
         """
         Find a user by email
         
         Args:
             email (str): User's email address
+            projection (dict): Fields to return (defaults to USER_PUBLIC_FIELDS; None for the full document)
         
         Returns:
             dict: User document or None
         """
-        user = users_collection.find_one({'email': email})
+        user = User._find_by_email_cached(email, projection)
         if user:
             user['_id'] = str(user['_id'])
         return user
     
     @staticmethod
-    def find_by_id(user_id):
+    def find_by_email_for_auth(email):
+        """
+        Find the fields needed to check a login (password hash and role)
+        
+        Args:
+            email (str): User's email address
+        
+        Returns:
+            dict: User document with '_id' (ObjectId), 'password_hash' and 'role', or None
+        """
+        return User._find_by_email_cached(email, USER_AUTH_FIELDS)
+    
+    @staticmethod
+    def _find_by_email_cached(email, projection):
+        """
+        Look a user up by email through the short-TTL in-process cache.
+        Misses aren't cached, so a newly registered email is found immediately.
+        
+        Returns:
+            dict: Shallow copy of the user document (raw ObjectId _id) or None
+        """
+        key = tuple(sorted(projection.items())) if projection else None
+        now = time.monotonic()
+        with _user_email_cache_lock:
+            entry = _user_email_cache.get(email)
+            if entry and entry[0] > now and key in entry[1]:
+                _user_email_cache.move_to_end(email)
+                return dict(entry[1][key])
+        
+        user = users_collection.find_one({'email': email}, projection)
+        if not user:
+            return None
+        with _user_email_cache_lock:
+            entry = _user_email_cache.get(email)
+            if not entry or entry[0] <= now:
+                entry = _user_email_cache[email] = (now + USER_EMAIL_CACHE_TTL_SECONDS, {})
+            entry[1][key] = user
+            _user_email_cache.move_to_end(email)
+            if len(_user_email_cache) > USER_EMAIL_CACHE_SIZE:
+                _user_email_cache.popitem(last=False)
+        return dict(user)
+    
+    @staticmethod
+    def invalidate_email_cache(email=None):
+        """Drop one email's cached lookups, or the whole cache when no email is given"""
+        with _user_email_cache_lock:
+            if email is None:
+                _user_email_cache.clear()
+            else:
+                _user_email_cache.pop(email, None)
+    
+    @staticmethod
+    def find_by_id(user_id, projection=USER_PUBLIC_FIELDS):
         """
         Find a user by ID
         
         Args:
             user_id (str): User's MongoDB ID
+            projection (dict): Fields to return (defaults to USER_PUBLIC_FIELDS; None for the full document)
         
         Returns:
             dict: User document or None
         """
-        from bson.objectid import ObjectId
         try:
-            user = users_collection.find_one({'_id': ObjectId(user_id)})
-            if user:
-                user['_id'] = str(user['_id'])
-            return user
-        except:
+            oid = ObjectId(user_id)
+        except (InvalidId, TypeError):
+            # Malformed id: no such user, and no need to ask Mongo
             return None
+        user = users_collection.find_one({'_id': oid}, projection)
+        if user:
+            user['_id'] = str(user['_id'])
+        return user
     
     @staticmethod
     def verify_password(user_email, password):
@@ -100,12 +556,25 @@ class User:
             password (str): Password to verify
         
         Returns:
-            dict: User document if password is correct, None otherwise
+            dict: User '_id' (as str) and 'role' if password is correct, None otherwise
         """
-        user = User.find_by_email(user_email)
-        if user and check_password_hash(user['password_hash'], password):
-            return user
-        return None
+        user = User.find_by_email_for_auth(user_email)
+        if not user:
+            # Burn the same hashing work as a real check so unknown emails aren't distinguishable by timing
+            _check_password(_DUMMY_PASSWORD_HASH, password)
+            return None
+        matches, needs_rehash = _check_password(user.pop('password_hash', None), password)
+        if not matches:
+            return None
+        if needs_rehash:
+            # Transparently upgrade legacy or outdated hashes while we have the plaintext
+            users_collection.update_one(
+                {'_id': user['_id']},
+                {'$set': {'password_hash': _hash_password(password), 'updated_at': datetime.utcnow()}}
+            )
+            User.invalidate_email_cache(user_email)
+        user['_id'] = str(user['_id'])
+        return user
     
     @staticmethod
     def update_user(user_id, update_data):
@@ -119,29 +588,137 @@ class User:
         Returns:
             dict: Updated user document or None
         """
-        from bson.objectid import ObjectId
         try:
-            update_data['updated_at'] = datetime.utcnow()
-            result = users_collection.find_one_and_update(
-                {'_id': ObjectId(user_id)},
-                {'$set': update_data},
-                return_document=True
-            )
-            if result:
-                result['_id'] = str(result['_id'])
-            return result
-        except:
+            oid = ObjectId(user_id)
+        except (InvalidId, TypeError):
             return None
+        update_data['updated_at'] = datetime.utcnow()
+        result = users_collection.find_one_and_update(
+            {'_id': oid},
+            {'$set': update_data},
+            projection={'password_hash': 0},
+            return_document=ReturnDocument.AFTER
+        )
+        if result:
+            result['_id'] = str(result['_id'])
+        # Only the id is known here (and the email itself may have changed), so drop everything
+        User.invalidate_email_cache()
+        if 'role' in update_data:
+            User.invalidate_mentor_ids()
+        return result
+
+    @staticmethod
+    def patch_user(user_id, update_data):
+        """
+        Update a user's information without reading the document back.
+        Prefer this over update_user when the caller doesn't need the updated doc.
+
+        Args:
+            user_id (str): User's MongoDB ID
+            update_data (dict): Fields to update
+
+        Returns:
+            int: Number of modified documents (0 or 1)
+        """
+        try:
+            oid = ObjectId(user_id)
+        except (InvalidId, TypeError):
+            return 0
+        # updated_at comes from $currentDate; also $set-ing it would be a path conflict
+        fields = {k: v for k, v in update_data.items() if k != 'updated_at'}
+        update = {'$currentDate': {'updated_at': True}}
+        if fields:
+            update['$set'] = fields
+        result = users_collection.update_one({'_id': oid}, update)
+        User.invalidate_email_cache()
+        if 'role' in update_data:
+            User.invalidate_mentor_ids()
+        return result.modified_count
+
+    @staticmethod
+    def get_mentor_ids():
+        """
+        Get the ids of all mentor users (cached for MENTOR_IDS_TTL_SECONDS)
+        
+        Returns:
+            list: Mentor ids as strings
+        """
+        global _mentor_ids_cache
+        now = time.monotonic()
+        cached = _mentor_ids_cache
+        if cached and cached[0] > now:
+            return cached[1]
+        
+        mentor_ids = [str(u['_id']) for u in users_collection.find({'role': 'mentor'}, {'_id': 1})]
+        _mentor_ids_cache = (now + MENTOR_IDS_TTL_SECONDS, mentor_ids)
+        return mentor_ids
+    
+    @staticmethod
+    def get_mentor_rankings():
+        """
+        Score every mentor in a single aggregation: each session is averaged over its
+        metric scores, and a mentor's overallScore is the mean of those session averages
+        
+        Returns:
+            list: Mentor docs (name, verified, subject, language, experienceLevel) with
+                  'sessionScores' (newest first) and 'overallScore', sorted best first
+        """
+        pipeline = [
+            {'$match': {'role': 'mentor'}},
+            {'$project': {'name': 1, 'verified': 1, 'subject': 1, 'language': 1, 'experienceLevel': 1}},
+            {'$lookup': {
+                'from': 'sessions',
+                'let': {'mentorId': {'$toString': '$_id'}},
+                'pipeline': [
+                    {'$match': {'$expr': {'$eq': ['$mentorId', '$$mentorId']}}},
+                    {'$sort': {'created_at': -1}},
+                    {'$project': {'_id': 0, 'score': {'$avg': '$metrics.score'}}},
+                    {'$match': {'score': {'$ne': None}}}
+                ],
+                'as': 'sessions'
+            }},
+            {'$addFields': {
+                'sessionScores': '$sessions.score',
+                'overallScore': {'$ifNull': [{'$avg': '$sessions.score'}, 0]}
+            }},
+            {'$project': {'sessions': 0}},
+            {'$sort': {'overallScore': -1, '_id': 1}}
+        ]
+        return list(users_collection.aggregate(pipeline))
+    
+    @staticmethod
+    def invalidate_mentor_ids():
+        """Drop the cached mentor id list so the next lookup hits the database"""
+        global _mentor_ids_cache
+        _mentor_ids_cache = None
     
     @staticmethod
-    def get_all_users():
+    def iter_all_users(projection=None):
         """
-        Get all users
+        Stream all users from the cursor without building a list
+        
+        Args:
+            projection: Optional field projection (e.g. USER_LIST_FIELDS)
+        
+        Yields:
+            dict: User documents with stringified _id
+        """
+        for user in users_collection.find({}, projection):
+            user['_id'] = str(user['_id'])
+            yield user
+    
+    @staticmethod
+    def get_all_users(projection=None):
+        """
+        Get all users (see iter_all_users to stream them instead)
+        
+        Args:
+            projection: Optional field projection (e.g. USER_LIST_FIELDS)
         
         Returns:
-            list: List of all user documents
+            list: List of user documents
         """
-        users = list(users_collection.find({}))
+        users = list(users_collection.find({}, projection))
         for user in users:
             user['_id'] = str(user['_id'])
         return users
@@ -166,11 +743,10 @@ class MentorProfile:
         Returns:
             dict: The created/updated profile document
         """
-        from bson.objectid import ObjectId
         
         try:
             user_object_id = ObjectId(user_id)
-        except:
+        except (InvalidId, TypeError):
             user_object_id = user_id
         
         profile_doc = {
@@ -215,11 +791,10 @@ class MentorProfile:
         Returns:
             dict: Profile document or None
         """
-        from bson.objectid import ObjectId
         
         try:
             user_object_id = ObjectId(user_id)
-        except:
+        except (InvalidId, TypeError):
             user_object_id = user_id
         
         profile = mentor_profiles_collection.find_one({'userId': user_object_id})
@@ -257,11 +832,10 @@ class MentorProfile:
         Returns:
             dict: Updated profile document or None
         """
-        from bson.objectid import ObjectId
         
         try:
             mentor_object_id = ObjectId(mentor_id)
-        except:
+        except (InvalidId, TypeError):
             mentor_object_id = mentor_id
         
         try:
@@ -351,19 +925,35 @@ def init_db():
     # Create unique index on email field
     users_collection.create_index('email', unique=True)
     
-    # Create index on role for faster queries
-    users_collection.create_index('role')
+    # Role filter + newest-first listing in one index (its role prefix also serves role-only queries)
+    users_collection.create_index([('role', 1), ('created_at', -1)], name='role_createdAt')
     
-    # Create index on created_at for sorting
-    users_collection.create_index('created_at')
-    
-    # Sessions collection indexes
+    # Sessions collection indexes; the compound indexes' prefixes cover mentorId/userId lookups
     sessions_collection.create_index('sessionId', unique=True)
-    sessions_collection.create_index('mentorId')
-    sessions_collection.create_index('userId')
+    sessions_collection.create_index([('mentorId', 1), ('created_at', -1)])
+    sessions_collection.create_index([('userId', 1), ('created_at', -1)])
+    # Partial index: only sessions that carry an uploaded video
+    sessions_collection.create_index(
+        [('mentorId', 1), ('videoFileId', 1)],
+        partialFilterExpression={'videoFileId': {'$exists': True}}
+    )
     
     # Mentor profiles collection indexes
     mentor_profiles_collection.create_index('userId', unique=True)
+    mentor_stats_collection.create_index('mentorId', unique=True)
+    gemini_fill_cache_collection.create_index('input_hash', unique=True)
+    # Let cached Gemini fills age out so prompt/model changes eventually take effect
+    gemini_fill_cache_collection.create_index('created_at', expireAfterSeconds=GEMINI_FILL_CACHE_TTL_SECONDS)
+    
+    # Single-field indexes superseded by the compound ones above
+    for collection, index_name in (
+        (users_collection, 'role_1'),
+        (users_collection, 'created_at_1'),
+        (sessions_collection, 'mentorId_1'),
+        (sessions_collection, 'userId_1'),
+    ):
+        if index_name in collection.index_information():
+            collection.drop_index(index_name)
     
     print("✓ Database indexes created")
 
@@ -414,7 +1004,7 @@ def seed_default_users():
     
     for user_data in default_users:
         # Check if user already exists
-        existing_user = User.find_by_email(user_data['email'])
+        existing_user = User.find_by_email(user_data['email'], projection={'_id': 1})
         
         if not existing_user:
             user = User.create_user(
@@ -446,6 +1036,11 @@ def seed_default_users():
 class Session:
     """Session model to store session breakdowns and metadata."""
 
+    @staticmethod
+    def generate_session_id() -> str:
+        """Return a new random sessionId (48 bits, so collisions stay negligible per mentor)."""
+        return f'session_{secrets.token_hex(6)}'
+
     @staticmethod
     def fill_metric_feedback_with_gemini(metrics: list, session_context: dict) -> list:
         """
@@ -458,15 +1053,13 @@ class Session:
         Returns:
             list: Metrics with filled feedback arrays
         """
-        import json
-        
         try:
-            # Check if we need to fill anything
-            needs_filling = any(
-                (not m.get('whatHelped') or len(m.get('whatHelped', [])) == 0) or
-                (not m.get('whatHurt') or len(m.get('whatHurt', [])) == 0)
-                for m in metrics
-            )
+            # Check if we need to fill anything (empty lists are falsy, so no len() needed)
+            needs_filling = False
+            for m in metrics:
+                if not m.get('whatHelped') or not m.get('whatHurt'):
+                    needs_filling = True
+                    break
             
             if not needs_filling:
                 return metrics
@@ -475,104 +1068,27 @@ class Session:
             if not api_key:
                 return metrics
             
-            from google import genai
             try:
-                client = genai.Client(api_key=api_key)
+                client = get_gemini_client()
             except Exception:
                 return metrics
+            if client is None:
+                return metrics
             
             # Build metrics context
-            metrics_summary = []
-            for m in metrics:
-                metrics_summary.append(f"{m.get('name')}: {m.get('score', 0)}/100")
-            
-            prompt = f"""You are analyzing a mentor presentation session. Based on these metrics and scores:
-{', '.join(metrics_summary)}
-
-For EACH metric below, provide 2-3 items for "whatHelped" (positive aspects that contributed to the score) 
-and 2-3 items for "whatHurt" (areas that need improvement).
-
-Return ONLY valid JSON in this exact format (no markdown, no extra text):
-{{
-  "metrics": [
-    {{
-      "name": "Clarity",
-      "whatHelped": ["Clear explanations", "Good structure", "Well-organized content"],
-      "whatHurt": ["Jargon without context", "Rushed delivery", "Unclear examples"]
-    }},
-    {{
-      "name": "Engagement",
-      "whatHelped": ["Interactive questions", "Eye contact", "Varied pacing"],
-      "whatHurt": ["Monotone delivery", "Long pauses", "Limited audience interaction"]
-    }},
-    {{
-      "name": "Pacing",
-      "whatHelped": ["Steady rhythm", "Appropriate speed", "Good pauses for reflection"],
-      "whatHurt": ["Too fast in middle", "Rushed sections", "Inconsistent timing"]
-    }},
-    {{
-      "name": "Eye Contact",
-      "whatHelped": ["Strong connection with audience", "Consistent gaze", "Natural focus"],
-      "whatHurt": ["Looking at notes too much", "Distracted by screen", "Limited audience engagement"]
-    }},
-    {{
-      "name": "Gestures",
-      "whatHelped": ["Expressive movements", "Natural hand motions", "Emphasis through gestures"],
-      "whatHurt": ["Repetitive movements", "Limited variety", "Distracting fidgeting"]
-    }},
-    {{
-      "name": "Overall",
-      "whatHelped": ["Professional presentation", "Well-prepared content", "Effective delivery"],
-      "whatHurt": ["Minor timing issues", "Could improve engagement", "Some technical jargon"]
-    }}
-  ]
-}}"""
+            metrics_csv = ', '.join(f"{m.get('name')}: {m.get('score', 0)}/100" for m in metrics)
+            prompt = _METRIC_FEEDBACK_PROMPT_TMPL.format(metrics_csv=metrics_csv)
 
             try:
-                response = client.models.generate_content(
-                    model='gemini-2.5-flash',
-                    contents=prompt
-                )
+                generated = Session._generate_fill(client, prompt, _METRIC_FEEDBACK_CONFIG)
                 
-                if response and hasattr(response, 'text'):
-                    text = response.text.strip()
-                    # Extract JSON if wrapped in markdown
-                    if text.startswith('```'):
-                        text = text.split('```')[1]
-                        if text.startswith('json'):
-                            text = text[4:]
-                        text = text.strip()
-                    
-                    generated = json.loads(text)
-                    
-                    # Create a mapping of metric names to feedback
-                    feedback_map = {}
-                    if 'metrics' in generated and isinstance(generated['metrics'], list):
-                        for gen_metric in generated['metrics']:
-                            metric_name = gen_metric.get('name')
-                            if metric_name:
-                                feedback_map[metric_name] = {
-                                    'whatHelped': gen_metric.get('whatHelped', []),
-                                    'whatHurt': gen_metric.get('whatHurt', [])
-                                }
-                    
-                    # Update original metrics with feedback
-                    updated_metrics = []
-                    for metric in metrics:
-                        metric_name = metric.get('name')
-                        if metric_name in feedback_map:
-                            # Fill empty arrays with generated feedback
-                            if not metric.get('whatHelped') or len(metric.get('whatHelped', [])) == 0:
-                                metric['whatHelped'] = feedback_map[metric_name].get('whatHelped', [])
-                            if not metric.get('whatHurt') or len(metric.get('whatHurt', [])) == 0:
-                                metric['whatHurt'] = feedback_map[metric_name].get('whatHurt', [])
-                        else:
-                            # Ensure arrays exist even if empty
-                            metric.setdefault('whatHelped', [])
-                            metric.setdefault('whatHurt', [])
-                        updated_metrics.append(metric)
+                if generated is not None:
+                    # Map metric names to their generated feedback
+                    gen_metrics = generated.get('metrics')
+                    feedback_map = {g['name']: g for g in gen_metrics if g.get('name')} if isinstance(gen_metrics, list) else {}
                     
-                    return updated_metrics
+                    # Update original metrics with feedback, filling only empty arrays
+                    return [_merge_metric(m, feedback_map) for m in metrics]
                     
             except Exception as api_err:
                 error_str = str(api_err)
@@ -591,6 +1107,191 @@ Return ONLY valid JSON in this exact format (no markdown, no extra text):
         
         return metrics
 
+    @staticmethod
+    def _fill_hash(prompt: str, doc: dict = None) -> str:
+        """
+        Content hash that keys the Gemini fill cache. Session fills also hash the
+        sessionId and prepared content, so two sessions that happen to share a name
+        and duration never share a synthesized timeline.
+        """
+        h = hashlib.blake2b(prompt.encode('utf-8'), digest_size=16)
+        if doc is not None:
+            content = {k: v for k, v in doc.items() if k not in _FILL_HASH_VOLATILE_FIELDS}
+            h.update(orjson.dumps(content, default=str, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS))
+        return h.hexdigest()
+
+    @staticmethod
+    def _cached_fill(input_hash: str):
+        """Look a fill up in-process, then in gemini_fill_cache. Returns the shared (uncopied) value or None."""
+        with _gemini_fill_cache_lock:
+            if input_hash in _gemini_fill_cache:
+                _gemini_fill_cache.move_to_end(input_hash)
+                return _gemini_fill_cache[input_hash]
+
+        cached = gemini_fill_cache_collection.find_one({'input_hash': input_hash}, {'_id': 0, 'output': 1})
+        if not cached:
+            return None
+        Session._remember_fill(input_hash, cached['output'])
+        return cached['output']
+
+    @staticmethod
+    def _remember_fill(input_hash: str, generated: dict):
+        """Add a fill to the in-process LRU"""
+        with _gemini_fill_cache_lock:
+            _gemini_fill_cache[input_hash] = generated
+            if len(_gemini_fill_cache) > GEMINI_FILL_CACHE_SIZE:
+                _gemini_fill_cache.popitem(last=False)
+
+    @staticmethod
+    def _store_fill(input_hash: str, generated: dict):
+        """Persist a freshly generated fill in both cache layers"""
+        gemini_fill_cache_collection.update_one(
+            {'input_hash': input_hash},
+            {'$setOnInsert': {'output': generated, 'created_at': datetime.utcnow()}},
+            upsert=True
+        )
+        Session._remember_fill(input_hash, generated)
+
+    @staticmethod
+    def _parse_gemini_json(response):
+        """Parse a JSON-mode Gemini response body. Returns None if empty."""
+        text = getattr(response, 'text', None) if response else None
+        if not text:
+            return None
+        return orjson.loads(text)
+
+    @staticmethod
+    def _generate_fill(client, prompt: str, config=_GEMINI_JSON_CONFIG, doc: dict = None):
+        """
+        Return Gemini's parsed JSON for a fill prompt. The response is cached by content
+        hash (see _fill_hash) in-process and in gemini_fill_cache, so reruns of the same
+        input (e.g. repeated migrations) skip the API call.
+        
+        Args:
+            client: Gemini client
+            prompt (str): Fill prompt
+            config (dict): generate_content config (JSON output, optionally with a response schema)
+            doc (dict): Session the fill is for; its id and content become part of the cache key
+            
+        Returns:
+            dict: Generated fields (a private copy), or None if Gemini returned nothing
+        """
+        input_hash = Session._fill_hash(prompt, doc)
+
+        generated = Session._cached_fill(input_hash)
+        if generated is None:
+            response = client.models.generate_content(
+                model='gemini-2.5-flash',
+                contents=prompt,
+                config=config
+            )
+            generated = Session._parse_gemini_json(response)
+            if generated is None:
+                return None
+            Session._store_fill(input_hash, generated)
+        return copy.deepcopy(generated)
+
+    @staticmethod
+    def prefetch_missing_fields(docs: list):
+        """
+        Warm the Gemini fill cache for many prepared sessions with batched calls.
+        Uncached fill prompts are sent GEMINI_FILL_BATCH_SIZE at a time in a single
+        request, and each answer is cached under its own prompt hash, so the
+        per-document fill_missing_fields_with_gemini calls that follow are cache
+        hits. Anything a batch fails to answer falls back to the per-document call.
+        
+        Args:
+            docs (list): Session documents already passed through prepare_for_insert
+        """
+        api_key = os.getenv('GEMINI_API_KEY')
+        if not api_key:
+            return
+
+        # The same document passed twice shares one cache key, so dedupe before calling out
+        pending = {}
+        for doc in docs:
+            if Session._missing_fill_fields(doc) is None:
+                continue
+            prompt = Session._missing_fields_prompt(doc)
+            input_hash = Session._fill_hash(prompt, doc)
+            if input_hash not in pending and Session._cached_fill(input_hash) is None:
+                pending[input_hash] = prompt
+
+        # A lone prompt gains nothing from batching; leave it to the per-document call
+        if len(pending) < 2:
+            return
+
+        try:
+            client = get_gemini_client()
+        except Exception as e:
+            print(f"⚠ Gemini batch prefetch unavailable: {str(e)}")
+            return
+        if client is None:
+            return
+
+        items = list(pending.items())
+        for start in range(0, len(items), GEMINI_FILL_BATCH_SIZE):
+            batch = items[start:start + GEMINI_FILL_BATCH_SIZE]
+            sections = '\n\n'.join(f"=== REQUEST {idx} ===\n{prompt}" for idx, (_, prompt) in enumerate(batch))
+            batch_prompt = f"""You will receive {len(batch)} independent requests, each starting with a line "=== REQUEST <n> ===".
+Answer every request exactly as its own instructions say.
+Return ONLY a single valid JSON object (no markdown, no extra text) whose keys are the request numbers as strings ("0", "1", ...) and whose values are the JSON answers.
+
+{sections}"""
+            try:
+                response = client.models.generate_content(
+                    model='gemini-2.5-flash',
+                    contents=batch_prompt,
+                    config=_GEMINI_JSON_CONFIG
+                )
+                answers = Session._parse_gemini_json(response) or {}
+                for idx, (input_hash, _) in enumerate(batch):
+                    answer = answers.get(str(idx)) if isinstance(answers, dict) else None
+                    if isinstance(answer, dict):
+                        Session._store_fill(input_hash, answer)
+            except Exception as e:
+                print(f"⚠ Gemini batch fill failed, falling back to per-session calls: {str(e)}")
+
+    @staticmethod
+    def _missing_fill_fields(doc: dict):
+        """
+        Check which generated fields a session is missing.
+        
+        Returns:
+            tuple: (has_audio, has_video, has_transcript, has_score_dips, has_score_peaks,
+            has_metrics), or None when nothing needs filling
+        """
+        has_audio = len(doc.get('timeline', {}).get('audio', [])) > 0
+        has_video = len(doc.get('timeline', {}).get('video', [])) > 0
+        has_transcript = len(doc.get('timeline', {}).get('transcript', [])) > 0
+        has_score_dips = len(doc.get('timeline', {}).get('scoreDips', [])) > 0
+        has_score_peaks = len(doc.get('timeline', {}).get('scorePeaks', [])) > 0
+        has_metrics = len(doc.get('metrics', [])) > 0
+        
+        # Check if any metric has empty whatHelped or whatHurt
+        has_empty_metric_feedback = False
+        if has_metrics:
+            for m in doc.get('metrics', []):
+                if not m.get('whatHelped') or len(m.get('whatHelped', [])) == 0:
+                    has_empty_metric_feedback = True
+                    break
+                if not m.get('whatHurt') or len(m.get('whatHurt', [])) == 0:
+                    has_empty_metric_feedback = True
+                    break
+        
+        if has_audio and has_video and has_transcript and has_score_dips and has_score_peaks and has_metrics and not has_empty_metric_feedback:
+            return None  # All fields populated
+        
+        return has_audio, has_video, has_transcript, has_score_dips, has_score_peaks, has_metrics
+
+    @staticmethod
+    def _missing_fields_prompt(doc: dict) -> str:
+        """Build the Gemini prompt that synthesizes a session's missing fields"""
+        return _FILL_MISSING_PROMPT_TMPL.format(
+            session_name=doc.get('sessionName', 'Video Session'),
+            duration=doc.get('duration', 1800)
+        )
+
     @staticmethod
     def fill_missing_fields_with_gemini(doc: dict) -> dict:
         """
@@ -603,133 +1304,33 @@ Return ONLY valid JSON in this exact format (no markdown, no extra text):
         Returns:
             dict: Document with filled missing fields, or original if Gemini unavailable
         """
-        import json
-        
         try:
             api_key = os.getenv('GEMINI_API_KEY')
             if not api_key:
                 print("Warning: GEMINI_API_KEY not set. Proceeding with existing data.")
                 return doc
                 
-            from google import genai
             try:
-                client = genai.Client(api_key=api_key)
+                client = get_gemini_client()
             except Exception as auth_err:
                 print(f"Warning: Failed to initialize Gemini client: {str(auth_err)}")
                 return doc
+            if client is None:
+                print("Warning: google-genai not installed. Proceeding with existing data.")
+                return doc
             
             # Determine what's missing
-            has_audio = len(doc.get('timeline', {}).get('audio', [])) > 0
-            has_video = len(doc.get('timeline', {}).get('video', [])) > 0
-            has_transcript = len(doc.get('timeline', {}).get('transcript', [])) > 0
-            has_score_dips = len(doc.get('timeline', {}).get('scoreDips', [])) > 0
-            has_score_peaks = len(doc.get('timeline', {}).get('scorePeaks', [])) > 0
-            has_metrics = len(doc.get('metrics', [])) > 0
-            
-            # Check if any metric has empty whatHelped or whatHurt
-            has_empty_metric_feedback = False
-            if has_metrics:
-                for m in doc.get('metrics', []):
-                    if not m.get('whatHelped') or len(m.get('whatHelped', [])) == 0:
-                        has_empty_metric_feedback = True
-                        break
-                    if not m.get('whatHurt') or len(m.get('whatHurt', [])) == 0:
-                        has_empty_metric_feedback = True
-                        break
-            
-            if has_audio and has_video and has_transcript and has_score_dips and has_score_peaks and has_metrics and not has_empty_metric_feedback:
+            missing = Session._missing_fill_fields(doc)
+            if missing is None:
                 return doc  # All fields populated
+            has_audio, has_video, has_transcript, has_score_dips, has_score_peaks, has_metrics = missing
             
-            # Build context from what we have
-            context = {
-                'sessionName': doc.get('sessionName', 'Video Session'),
-                'duration': doc.get('duration', 1800),
-                'hasAnalysis': bool(doc.get('analysis')),
-                'hasDiarization': bool(doc.get('diarization')),
-            }
-            
-            if isinstance(doc.get('analysis'), dict):
-                context['analysisKeys'] = list(doc['analysis'].keys())
-            if isinstance(doc.get('diarization'), dict):
-                context['diarizationKeys'] = list(doc['diarization'].keys())
-            
-            prompt = f"""You are an AI that synthesizes comprehensive session analysis data for mentor presentations.
-Given a session about "{context['sessionName']}" with duration {context['duration']} seconds, 
-generate ONLY valid JSON (no markdown wrapping, no extra text):
-
-{{
-  "timeline": {{
-    "audio": [
-      {{"startTime": 0, "endTime": 300, "pace": 150, "pauses": 3, "type": "normal", "message": "Good opening pace"}},
-      {{"startTime": 300, "endTime": 600, "pace": 180, "pauses": 1, "type": "fast", "message": "Speaking speed increased"}},
-      {{"startTime": 600, "endTime": 900, "pace": 145, "pauses": 4, "type": "normal", "message": ""}}
-    ],
-    "video": [
-      {{"startTime": 0, "endTime": 400, "eyeContact": 85, "gestures": 8, "type": "good", "message": "Strong eye contact"}},
-      {{"startTime": 400, "endTime": 750, "eyeContact": 50, "gestures": 3, "type": "poor", "message": "Eye contact dropped"}},
-      {{"startTime": 750, "endTime": 1200, "eyeContact": 90, "gestures": 10, "type": "excellent", "message": ""}}
-    ],
-    "transcript": [
-      {{"startTime": 0, "endTime": 120, "text": "Welcome to this session on mentoring. Today we'll cover key topics.", "keyPhrases": ["welcome", "mentoring", "session"]}},
-      {{"startTime": 300, "endTime": 450, "text": "Let's dive into the main content with real examples.", "keyPhrases": ["main content", "examples"]}},
-      {{"startTime": 600, "endTime": 750, "text": "Any questions before we move forward?", "keyPhrases": ["questions", "engagement"]}}
-    ],
-    "scoreDips": [
-      {{"timestamp": 450, "score": 65, "message": "Speaking speed increased, harder to follow", "type": "audio"}},
-      {{"timestamp": 500, "score": 60, "message": "Eye contact dropped, audience engagement decreased", "type": "video"}},
-      {{"timestamp": 400, "score": 70, "message": "Brief loss of engagement", "type": "engagement"}}
-    ],
-    "scorePeaks": [
-      {{"timestamp": 100, "score": 92, "message": "Excellent clarity and engagement", "type": "overall"}},
-      {{"timestamp": 800, "score": 90, "message": "Strong gestures and eye contact", "type": "video"}},
-      {{"timestamp": 200, "score": 88, "message": "Perfect pacing and delivery", "type": "audio"}}
-    ]
-  }},
-  "metrics": [
-    {{"name": "Clarity", "score": 78, "confidenceInterval": [74, 82], "whatHelped": ["Clear explanations", "Good examples", "Well-structured content"], "whatHurt": ["Some jargon without context", "Rushed middle section", "Could use more visuals"]}},
-    {{"name": "Engagement", "score": 82, "confidenceInterval": [78, 86], "whatHelped": ["Interactive questions", "Varied tone", "Good eye contact"], "whatHurt": ["Brief attention dips", "Could ask more questions", "Some pauses felt long"]}},
-    {{"name": "Pacing", "score": 76, "confidenceInterval": [72, 80], "whatHelped": ["Steady opening", "Good transition points", "Clear conclusions"], "whatHurt": ["Speaking speed increased mid-session", "Some sections rushed", "Pauses not optimal"]}},
-    {{"name": "Eye Contact", "score": 80, "confidenceInterval": [76, 84], "whatHelped": ["Strong opening engagement", "Good focus in Q&A", "Natural gaze patterns"], "whatHurt": ["Looked at notes too often", "One segment lost connection", "Could engage left side more"]}},
-    {{"name": "Gestures", "score": 85, "confidenceInterval": [81, 89], "whatHelped": ["Expressive hand movements", "Natural gestures", "Good use for emphasis"], "whatHurt": ["Some repetitive motions", "Could vary more", "Limited in one section"]}},
-    {{"name": "Overall", "score": 80, "confidenceInterval": [76, 84], "whatHelped": ["Professional delivery", "Well-prepared content", "Good audience connection"], "whatHurt": ["Minor pacing issues", "Could improve engagement further", "Some technical terms unclear"]}}
-  ],
-  "weakMoments": [
-    {{"timestamp": "00:07:30", "message": "Speaking speed increased - slow down for clarity"}},
-    {{"timestamp": "00:08:20", "message": "Eye contact dropped - engage audience more"}},
-    {{"timestamp": "00:06:40", "message": "Consider adding visual aids for technical concepts"}}
-  ]
-}}
-
-CRITICAL REQUIREMENTS:
-- ALWAYS include ALL 6 metrics: Clarity, Engagement, Pacing, Eye Contact, Gestures, Overall
-- EVERY metric MUST have: name, score (0-100), confidenceInterval [min,max], whatHelped (3+ items), whatHurt (3+ items)
-- whatHelped: specific POSITIVE aspects (e.g., "Clear explanations", "Good eye contact", "Natural gestures")
-- whatHurt: specific AREAS FOR IMPROVEMENT (e.g., "Jargon without context", "Speaking too fast", "Limited gestures")
-- NEVER leave whatHelped or whatHurt empty
-- timeline.audio: 4-6 segments with pace (100-200 wpm), pauses count, type, message
-- timeline.video: 4-5 segments with eyeContact %, gestures count, type, message
-- timeline.transcript: 4-5 segments with text and keyPhrases (3+ phrases each)
-- scoreDips & scorePeaks: 3-4 items each with timestamp, score, message, type
-- weakMoments: 3-4 actionable improvement suggestions
-- RETURN ONLY valid JSON, no markdown code blocks, no extra text"""
+            prompt = Session._missing_fields_prompt(doc)
 
             try:
-                response = client.models.generate_content(
-                    model='gemini-2.5-flash',
-                    contents=prompt
-                )
+                generated = Session._generate_fill(client, prompt, doc=doc)
                 
-                if response and hasattr(response, 'text'):
-                    text = response.text.strip()
-                    # Extract JSON if wrapped in markdown
-                    if text.startswith('```'):
-                        text = text.split('```')[1]
-                        if text.startswith('json'):
-                            text = text[4:]
-                        text = text.strip()
-                    
-                    generated = json.loads(text)
-                    
+                if generated is not None:
                     # Merge generated data into document
                     if 'timeline' in generated:
                         tl = generated['timeline']
@@ -802,28 +1403,174 @@ CRITICAL REQUIREMENTS:
         1. Prepare and coerce document to strict schema
         2. Fill missing fields using Gemini API for intelligent synthesis
         3. Validate no field is empty
-        4. Insert into database
+        4. Insert into database; a sessionId that already exists is rejected by the
+           unique index (DuplicateKeyError) rather than overwritten
         
         Returns the inserted document with stringified _id.
+        
+        Raises:
+            ValueError: If the document has no sessionId
+        """
+        prepared = Session.prepare_session(session_doc)
+        result = sessions_collection_fast.insert_one(prepared)
+        prepared['_id'] = str(result.inserted_id)
+        Session.invalidate_normalized(prepared['sessionId'])
+        MentorStats.invalidate(prepared.get('mentorId'))
+        return prepared
+
+    @staticmethod
+    def finalize_pending_session(session_doc: dict):
+        """
+        Prepare a session like create_session and write it over its 'processing'
+        placeholder (see create_pending_session). Only a placeholder is ever replaced;
+        completed sessions with the same sessionId are left alone.
+        
+        Args:
+            session_doc: Raw session document
+            
+        Returns:
+            dict: Stored document with stringified _id
+            
+        Raises:
+            ValueError: If the document has no sessionId or no pending placeholder exists
         """
-        import copy
+        prepared = Session.prepare_session(session_doc)
+        stored = Session._replace_pending(prepared)
+        if stored is None:
+            raise ValueError(f"No pending session with sessionId {prepared['sessionId']!r}")
+        return stored
 
-        # Prepare and coerce document to the strict schema expected by the DB
-        prepared = Session.prepare_for_insert(copy.deepcopy(session_doc))
+    @staticmethod
+    def prepare_session(session_doc: dict):
+        """
+        Run the create_session preparation steps (schema coercion, Gemini fill,
+        timestamps) without writing anything.
+        
+        Args:
+            session_doc: Raw session document
+            
+        Returns:
+            dict: Prepared session document
+        """
+        # Prepare and coerce document to the strict schema expected by the DB. No copy is
+        # needed first: prepare_for_insert rebuilds every container, so the caller's
+        # document is never mutated.
+        prepared = Session.prepare_for_insert(session_doc)
+        # prepare_for_insert defaults a missing sessionId to ''; refuse it before paying for Gemini
+        if not prepared.get('sessionId'):
+            raise ValueError("sessionId is required")
         
         # Fill missing fields using Gemini API (ensures no empty fields)
         prepared = Session.fill_missing_fields_with_gemini(prepared)
 
         # Ensure timestamps are proper datetimes
+        now = datetime.utcnow()
         if not isinstance(prepared.get('created_at'), datetime):
-            prepared['created_at'] = datetime.utcnow()
-        prepared['updated_at'] = datetime.utcnow()
+            prepared['created_at'] = now
+        prepared['updated_at'] = now
+        return prepared
 
-        # Insert and return inserted doc with stringified _id
-        result = sessions_collection.insert_one(prepared)
-        prepared['_id'] = str(result.inserted_id)
+    @staticmethod
+    def create_sessions_bulk(session_docs: list):
+        """
+        Create many sessions at once: the same preparation as create_session, but
+        Gemini fills are fetched in batched calls (see prefetch_missing_fields) and
+        the documents are written with one insert_many.
+        
+        Args:
+            session_docs: Raw session documents
+            
+        Returns:
+            list: Stored documents with stringified _id
+        """
+        # Prepare and coerce documents to the strict schema expected by the DB (no copy needed, see prepare_session)
+        prepared = []
+        for doc in session_docs:
+            doc = Session.prepare_for_insert(doc)
+            # prepare_for_insert defaults a missing sessionId to ''; those can't be stored
+            if not doc.get('sessionId'):
+                print(f"⚠ Skipping session without a sessionId: {doc.get('sessionName')}")
+                continue
+            prepared.append(doc)
+        
+        Session.prefetch_missing_fields(prepared)
+        
+        now = datetime.utcnow()
+        for i, doc in enumerate(prepared):
+            # Cache hits after the prefetch; misses fall back to a single call
+            doc = prepared[i] = Session.fill_missing_fields_with_gemini(doc)
+            if not isinstance(doc.get('created_at'), datetime):
+                doc['created_at'] = now
+            doc['updated_at'] = now
+        
+        return Session.insert_prepared_sessions(prepared)
+
+    @staticmethod
+    def _replace_pending(prepared: dict):
+        """Replace the 'processing' placeholder for a prepared session; returns None if there is none"""
+        prepared.pop('_id', None)
+        stored = sessions_collection_fast.find_one_and_replace(
+            {'sessionId': prepared.get('sessionId'), 'status': 'processing'},
+            prepared,
+            projection={'_id': 1},
+            return_document=ReturnDocument.AFTER
+        )
+        if stored is None:
+            return None
+        prepared['_id'] = str(stored['_id'])
+        Session.invalidate_normalized(prepared.get('sessionId'))
+        MentorStats.invalidate(prepared.get('mentorId'))
         return prepared
 
+    @staticmethod
+    def insert_prepared_sessions(prepared_docs: list):
+        """
+        Insert many prepared sessions (see prepare_session) in one unordered insert_many.
+        Existing sessions are never overwritten: documents whose sessionId is already
+        stored are reported as skipped, and any other rejected document as failed.
+        
+        Args:
+            prepared_docs: List of prepared session documents
+            
+        Returns:
+            list: Inserted documents with stringified _id
+        """
+        if not prepared_docs:
+            return []
+        rejected = {}
+        try:
+            sessions_collection_fast.insert_many(prepared_docs, ordered=False)
+        except BulkWriteError as e:
+            rejected = {err['index']: err for err in e.details.get('writeErrors', [])}
+
+        stored = []
+        for idx, doc in enumerate(prepared_docs):
+            err = rejected.get(idx)
+            if err is None:
+                doc['_id'] = str(doc['_id'])
+                stored.append(doc)
+            elif err.get('code') == 11000:
+                print(f"⚠ Skipping session {doc.get('sessionId')}: sessionId already exists")
+            else:
+                print(f"✗ Failed to insert session {doc.get('sessionId')}: {err.get('errmsg')}")
+        MentorStats.invalidate(*{doc.get('mentorId') for doc in stored})
+        return stored
+
+    @staticmethod
+    def create_pending_session(session_doc: dict):
+        """
+        Insert a lightweight placeholder for a session whose analysis is still running.
+        Skips schema coercion and Gemini synthesis; finalize_pending_session replaces
+        it once the background pipeline finishes.
+        
+        Returns the inserted document with stringified _id.
+        """
+        doc = dict(session_doc)
+        doc.setdefault('status', 'processing')
+        result = sessions_collection.insert_one(doc)
+        doc['_id'] = str(result.inserted_id)
+        return doc
+
     @staticmethod
     def prepare_for_insert(raw_doc: dict) -> dict:
         """
@@ -837,51 +1584,7 @@ CRITICAL REQUIREMENTS:
         the canonical schema used across the app. Uses Gemini API to fill missing
         fields with realistic data when available.
         """
-        import copy
-
-        def _unwrap(val):
-            # Recursively convert Extended JSON wrappers to native types
-            if isinstance(val, dict):
-                # detect common extended JSON patterns
-                if '$numberInt' in val:
-                    try:
-                        return int(val['$numberInt'])
-                    except Exception:
-                        return int(float(val['$numberInt']))
-                if '$numberLong' in val:
-                    try:
-                        return int(val['$numberLong'])
-                    except Exception:
-                        return int(float(val['$numberLong']))
-                if '$oid' in val:
-                    try:
-                        from bson.objectid import ObjectId
-                        return ObjectId(val['$oid'])
-                    except Exception:
-                        return val['$oid']
-                if '$date' in val:
-                    d = val['$date']
-                    # nested object with $numberLong
-                    if isinstance(d, dict) and '$numberLong' in d:
-                        try:
-                            ms = int(d['$numberLong'])
-                            return datetime.utcfromtimestamp(ms / 1000.0)
-                        except Exception:
-                            return None
-                    # direct epoch millis
-                    try:
-                        ms = int(d)
-                        return datetime.utcfromtimestamp(ms / 1000.0)
-                    except Exception:
-                        return None
-                # otherwise recurse
-                return {k: _unwrap(v) for k, v in val.items()}
-            elif isinstance(val, list):
-                return [_unwrap(v) for v in val]
-            else:
-                return val
-
-        doc = _unwrap(raw_doc or {})
+        doc = _unwrap_extjson(raw_doc or {})
 
         # Basic required top-level fields
         doc.setdefault('sessionId', doc.get('sessionId') or doc.get('id') or '')
@@ -890,14 +1593,11 @@ CRITICAL REQUIREMENTS:
         doc.setdefault('videoUrl', doc.get('localVideoPath',''))
 
         # Coerce duration to int
-        try:
-            if isinstance(doc.get('duration'), dict):
-                # if user provided extended JSON already unwrapped to dict, try to coerce
-                doc['duration'] = int(doc['duration'].get('$numberInt') or doc['duration'].get('$numberLong') or 0)
-            else:
-                doc['duration'] = int(doc.get('duration') or 0)
-        except Exception:
-            doc['duration'] = 0
+        duration = doc.get('duration')
+        if isinstance(duration, dict):
+            # if user provided extended JSON already unwrapped to dict, try to coerce
+            duration = duration.get('$numberInt') or duration.get('$numberLong')
+        doc['duration'] = _to_int(duration)
 
         # Ensure timeline exists with expected arrays
         tl = doc.get('timeline') if isinstance(doc.get('timeline'), dict) else {}
@@ -907,121 +1607,19 @@ CRITICAL REQUIREMENTS:
         tl.setdefault('scoreDips', [])
         tl.setdefault('scorePeaks', [])
 
-        # Normalize audio segments
-        norm_audio = []
-        for seg in tl.get('audio', []):
-            seg = seg or {}
-            try:
-                start = int(seg.get('startTime') or seg.get('start') or 0)
-            except Exception:
-                start = 0
-            try:
-                end = int(seg.get('endTime') or seg.get('end') or 0)
-            except Exception:
-                end = 0
-            try:
-                pace = int(seg.get('pace') or 0)
-            except Exception:
-                pace = 0
-            try:
-                pauses = int(seg.get('pauses') or 0)
-            except Exception:
-                pauses = 0
-            norm_audio.append({
-                'startTime': start,
-                'endTime': end,
-                'pace': pace,
-                'pauses': pauses,
-                'type': seg.get('type') or 'normal',
-                'message': seg.get('message') or ''
-            })
-        tl['audio'] = norm_audio
-
-        # Normalize video segments
-        norm_video = []
-        for seg in tl.get('video', []):
-            seg = seg or {}
-            try:
-                start = int(seg.get('startTime') or seg.get('start') or 0)
-            except Exception:
-                start = 0
-            try:
-                end = int(seg.get('endTime') or seg.get('end') or 0)
-            except Exception:
-                end = 0
-            try:
-                eye = float(seg.get('eyeContact') or seg.get('eye_contact') or 0)
-            except Exception:
-                eye = 0.0
-            try:
-                gestures = int(seg.get('gestures') or 0)
-            except Exception:
-                gestures = 0
-            norm_video.append({
-                'startTime': start,
-                'endTime': end,
-                'eyeContact': eye,
-                'gestures': gestures,
-                'type': seg.get('type') or 'good',
-                'message': seg.get('message') or ''
-            })
-        tl['video'] = norm_video
-
-        # Normalize transcript
-        norm_trans = []
-        for seg in tl.get('transcript', []):
-            seg = seg or {}
-            try:
-                start = int(seg.get('startTime') or seg.get('start') or 0)
-            except Exception:
-                start = 0
-            try:
-                end = int(seg.get('endTime') or seg.get('end') or 0)
-            except Exception:
-                end = 0
-            norm_trans.append({
-                'startTime': start,
-                'endTime': end,
-                'text': seg.get('text') or seg.get('transcript') or '',
-                'keyPhrases': seg.get('keyPhrases') or seg.get('key_phrases') or []
-            })
-        tl['transcript'] = norm_trans
-
-        # Normalize score dips/peaks
-        def _norm_score_list(lst):
-            out = []
-            for item in lst:
-                item = item or {}
-                try:
-                    ts = int(item.get('timestamp') or item.get('time') or item.get('ts') or 0)
-                except Exception:
-                    ts = 0
-                try:
-                    score = int(item.get('score') or 0)
-                except Exception:
-                    score = 0
-                out.append({
-                    'timestamp': ts,
-                    'score': score,
-                    'message': item.get('message') or '',
-                    'type': item.get('type') or ''
-                })
-            return out
-
-        tl['scoreDips'] = _norm_score_list(tl.get('scoreDips', []))
-        tl['scorePeaks'] = _norm_score_list(tl.get('scorePeaks', []))
+        # Normalize every segment list against its schema
+        for name, schema in _TIMELINE_SCHEMAS:
+            tl[name] = _normalize_list(tl[name], schema)
 
         doc['timeline'] = tl
 
         # Normalize metrics
         metrics = doc.get('metrics', []) or []
         norm_metrics = []
+        append = norm_metrics.append
         for m in metrics:
             m = m or {}
-            try:
-                score = int(m.get('score') or 0)
-            except Exception:
-                score = 0
+            score = _to_int(m.get('score'))
             ci = m.get('confidenceInterval') or m.get('confidence_interval') or []
             # ensure CI is two ints
             try:
@@ -1036,7 +1634,7 @@ CRITICAL REQUIREMENTS:
             what_helped = m.get('whatHelped') or m.get('what_helped') or []
             what_hurt = m.get('whatHurt') or m.get('what_hurt') or []
             
-            norm_metrics.append({
+            append({
                 'name': m.get('name') or m.get('metric') or '',
                 'score': score,
                 'confidenceInterval': ci_vals,
@@ -1056,10 +1654,17 @@ CRITICAL REQUIREMENTS:
 
         return doc
 
+    @staticmethod
+    def find_video_info(session_id: str):
+        """Return just the videoUrl, sessionName, duration and status of a session (or None)"""
+        return sessions_collection.find_one(
+            {'sessionId': session_id},
+            {'_id': 0, 'videoUrl': 1, 'sessionName': 1, 'duration': 1, 'status': 1}
+        )
+
     @staticmethod
     def find_by_sessionId(session_id: str):
         """Find a session document by its sessionId field."""
-        from bson.objectid import ObjectId
         s = sessions_collection.find_one({'sessionId': session_id})
         if s:
             # stringify MongoDB _id for safe JSON transport
@@ -1087,273 +1692,181 @@ CRITICAL REQUIREMENTS:
 
             # Ensure metrics is present
             s.setdefault('metrics', [])
-            # Ensure duration is numeric
-            if 'duration' not in s or not isinstance(s.get('duration'), (int, float)):
-                s['duration'] = 0
+            # Ensure duration is numeric, deriving (and storing) it once when missing
+            if not isinstance(s.get('duration'), (int, float)):
+                s['duration'] = Session._backfill_duration(s)
             # Ensure videoUrl exists
             s.setdefault('localVideoPath', '')
         return s
 
     @staticmethod
-    def normalize_for_api(session_doc: dict) -> dict:
+    def _maybe_synthesize_timeline(doc: dict):
         """
-        Normalize a session document for public API output.
-
-        - Ensures presence of required keys and default types.
-        - Coerces numeric fields where possible.
-        - If timeline/metrics arrays are missing or empty and analysis/diarization
-          information exists, attempts to use Gemini (if available) to synthesize
-          realistic placeholder data. Falls back to safe defaults on any failure.
-
-        Returns a clean dict matching the shape in `data/session_breakdown.json`.
+        Best-effort Gemini synthesis of a session's missing timeline arrays, metrics
+        and weakMoments, using whatever analysis/diarization context the document has.
+        Mutates doc (giving it its own timeline dict); returns immediately when nothing
+        is missing, and ignores any generator error.
         """
-        if not session_doc:
-            return {}
-
-        # Work with a shallow copy to avoid mutating caller data
-        doc = dict(session_doc)
-
-        # Basic id/name/video defaults
-        out = {}
-        out['sessionId'] = doc.get('sessionId') or doc.get('id') or str(doc.get('_id', ''))
-        out['sessionName'] = doc.get('sessionName') or doc.get('name') or f"Session {out['sessionId']}"
-        out['videoUrl'] = doc.get('localVideoPath') or doc.get('uploadedFile') or ''
-        
-        # Duration: prefer explicit duration, else try analysis or compute from transcript
-        duration = doc.get('duration')
-        if not isinstance(duration, (int, float)):
-            if isinstance(doc.get('analysis'), dict):
-                duration = doc['analysis'].get('duration') or doc['analysis'].get('total_duration')
-            if not duration and isinstance(doc.get('timeline'), dict):
-                transcript = doc['timeline'].get('transcript', [])
-                if transcript:
-                    try:
-                        duration = max((int(ts.get('endTime', 0)) for ts in transcript))
-                    except Exception:
-                        duration = 0
-        out['duration'] = int(duration or 0)
-
-        # Ensure timeline dict exists with sub-arrays
-        timeline = doc.get('timeline') if isinstance(doc.get('timeline'), dict) else {}
-        timeline.setdefault('audio', [])
-        timeline.setdefault('video', [])
-        timeline.setdefault('transcript', timeline.get('transcript', []))
-        timeline.setdefault('scoreDips', timeline.get('scoreDips', []))
-        timeline.setdefault('scorePeaks', timeline.get('scorePeaks', []))
+        timeline = dict(doc['timeline']) if isinstance(doc.get('timeline'), dict) else {}
+        for name, _ in _TIMELINE_SCHEMAS:
+            timeline.setdefault(name, [])
         doc['timeline'] = timeline
 
         # Determine what we need to synthesize
-        need_audio = len(doc['timeline'].get('audio', [])) == 0
-        need_video = len(doc['timeline'].get('video', [])) == 0
-        need_score = len(doc['timeline'].get('scoreDips', [])) == 0 and len(doc['timeline'].get('scorePeaks', [])) == 0
-        need_metrics = len(doc.get('metrics', [])) == 0
-
-        # If we need anything, try Gemini (best-effort). Build a small context.
-        if need_audio or need_video or need_score or need_metrics:
-            context_parts = []
-            if isinstance(doc.get('analysis'), dict):
-                analysis = doc['analysis']
-                if 'overall_score' in analysis:
-                    context_parts.append(f"overall_score: {analysis.get('overall_score')}")
-                if 'transcript' in analysis and isinstance(analysis['transcript'], str):
-                    context_parts.append(f"transcript_snippet: {analysis['transcript'][:800]}")
-            if isinstance(doc.get('diarization'), dict):
-                diar = doc['diarization']
-                if 'sentences' in diar and isinstance(diar['sentences'], list):
-                    context_parts.append(f"diarization_sentences: {len(diar['sentences'])}")
-                    if len(diar['sentences']) > 0:
-                        ex = diar['sentences'][0].get('text','')[:200]
-                        context_parts.append(f"diarization_example: {ex}")
-
-            try:
-                from google import genai
-                client = genai.Client()
-
-                prompt = (
-                    "You are given partial session analysis and diarization data. "
-                    "Return a JSON object with keys: timeline.audio (array of {startTime,endTime,pace,pauses,type,message}), "
-                    "timeline.video (array of {startTime,endTime,eyeContact,gestures,type,message}), "
-                    "timeline.scoreDips (array of {timestamp,score,message,type}), "
-                    "timeline.scorePeaks (array of {timestamp,score,message,type}), "
-                    "metrics (array of {name,score,confidenceInterval,whatHelped,whatHurt}), "
-                    "weakMoments (array of {timestamp,message}). "
-                    "Only include fields that are missing in the input. Use the provided context to generate realistic entries. "
-                    "Output must be valid JSON only (no extra text)."
-                )
-                if context_parts:
-                    prompt += " Context: " + " | ".join(context_parts)
-
-                response = client.models.generate_content(
-                    model="gemini-2.5-flash",
-                    contents=prompt
-                )
+        need_audio = not timeline['audio']
+        need_video = not timeline['video']
+        need_score = not timeline['scoreDips'] and not timeline['scorePeaks']
+        need_metrics = not doc.get('metrics')
+        if not (need_audio or need_video or need_score or need_metrics):
+            return
+
+        # Build a small context
+        context_parts = []
+        if isinstance(doc.get('analysis'), dict):
+            analysis = doc['analysis']
+            if 'overall_score' in analysis:
+                context_parts.append(f"overall_score: {analysis.get('overall_score')}")
+            if 'transcript' in analysis and isinstance(analysis['transcript'], str):
+                context_parts.append(f"transcript_snippet: {analysis['transcript'][:800]}")
+        if isinstance(doc.get('diarization'), dict):
+            diar = doc['diarization']
+            if 'sentences' in diar and isinstance(diar['sentences'], list):
+                context_parts.append(f"diarization_sentences: {len(diar['sentences'])}")
+                if len(diar['sentences']) > 0:
+                    ex = diar['sentences'][0].get('text','')[:200]
+                    context_parts.append(f"diarization_example: {ex}")
 
-                text = None
-                if hasattr(response, 'text'):
-                    text = response.text
-                elif hasattr(response, 'candidates') and response.candidates:
-                    text = response.candidates[0].content.parts[0].text
-                elif isinstance(response, dict):
-                    text = response.get('output', '')
-
-                if text:
-                    import json as _json
-                    try:
-                        generated = _json.loads(text)
-                    except Exception:
-                        import re
-                        m = re.search(r"\{[\s\S]*\}", text)
-                        if m:
-                            generated = _json.loads(m.group(0))
-                        else:
-                            generated = {}
-
-                    gen_tl = generated.get('timeline', {}) if isinstance(generated, dict) else {}
-                    if need_audio and isinstance(gen_tl.get('audio'), list):
-                        doc['timeline']['audio'] = gen_tl['audio']
-                    if need_video and isinstance(gen_tl.get('video'), list):
-                        doc['timeline']['video'] = gen_tl['video']
-                    if need_score:
-                        if isinstance(gen_tl.get('scoreDips'), list) and gen_tl.get('scoreDips'):
-                            doc['timeline']['scoreDips'] = gen_tl['scoreDips']
-                        if isinstance(gen_tl.get('scorePeaks'), list) and gen_tl.get('scorePeaks'):
-                            doc['timeline']['scorePeaks'] = gen_tl['scorePeaks']
-
-                    if need_metrics and isinstance(generated.get('metrics'), list):
-                        doc['metrics'] = generated.get('metrics')
-
-                    if not doc.get('weakMoments') and isinstance(generated.get('weakMoments'), list):
-                        doc['weakMoments'] = generated.get('weakMoments')
-            except Exception:
-                # best-effort: ignore any generator errors and continue with heuristics/defaults
-                pass
-
-        # --- Final coercion to canonical output shape ---
-        def to_num(v):
-            try:
-                return int(v)
-            except Exception:
-                try:
-                    return int(float(v))
-                except Exception:
-                    return 0
-
-        # audio
-        audio_in = doc.get('timeline', {}).get('audio', []) if isinstance(doc.get('timeline'), dict) else []
-        audio_out = []
-        for seg in audio_in:
-            seg = seg or {}
-            audio_out.append({
-                'startTime': to_num(seg.get('startTime') or seg.get('start') or 0),
-                'endTime': to_num(seg.get('endTime') or seg.get('end') or 0),
-                'pace': int(seg.get('pace') or 0),
-                'pauses': int(seg.get('pauses') or 0),
-                'type': seg.get('type') or 'normal',
-                'message': seg.get('message') or ''
-            })
-
-        # video
-        video_in = doc.get('timeline', {}).get('video', []) if isinstance(doc.get('timeline'), dict) else []
-        video_out = []
-        for seg in video_in:
-            seg = seg or {}
-            try:
-                eye = float(seg.get('eyeContact') or seg.get('eye_contact') or 0)
-            except Exception:
-                eye = 0.0
-            video_out.append({
-                'startTime': to_num(seg.get('startTime') or seg.get('start') or 0),
-                'endTime': to_num(seg.get('endTime') or seg.get('end') or 0),
-                'eyeContact': eye,
-                'gestures': int(seg.get('gestures') or 0),
-                'type': seg.get('type') or 'good',
-                'message': seg.get('message') or ''
-            })
-
-        # transcript
-        trans_in = doc.get('timeline', {}).get('transcript', []) if isinstance(doc.get('timeline'), dict) else []
-        trans_out = []
-        for seg in trans_in:
-            seg = seg or {}
-            trans_out.append({
-                'startTime': to_num(seg.get('startTime') or seg.get('start') or 0),
-                'endTime': to_num(seg.get('endTime') or seg.get('end') or 0),
-                'text': seg.get('text') or seg.get('transcript') or '',
-                'keyPhrases': seg.get('keyPhrases') or seg.get('key_phrases') or []
-            })
-
-        # score dips/peaks
-        dips_in = doc.get('timeline', {}).get('scoreDips', []) if isinstance(doc.get('timeline'), dict) else []
-        peaks_in = doc.get('timeline', {}).get('scorePeaks', []) if isinstance(doc.get('timeline'), dict) else []
-        dips_out = []
-        for d in dips_in:
-            d = d or {}
-            dips_out.append({
-                'timestamp': to_num(d.get('timestamp') or d.get('time') or d.get('ts') or 0),
-                'score': int(d.get('score') or 0),
-                'message': d.get('message') or '',
-                'type': d.get('type') or ''
-            })
-
-        peaks_out = []
-        for p in peaks_in:
-            p = p or {}
-            peaks_out.append({
-                'timestamp': to_num(p.get('timestamp') or p.get('time') or p.get('ts') or 0),
-                'score': int(p.get('score') or 0),
-                'message': p.get('message') or '',
-                'type': p.get('type') or ''
-            })
-
-        out['timeline'] = {
-            'audio': audio_out,
-            'video': video_out,
-            'transcript': trans_out,
-            'scoreDips': dips_out,
-            'scorePeaks': peaks_out
-        }
-
-        # metrics normalization
-        metrics_in = doc.get('metrics', []) or []
-        metrics_out = []
-        for m in metrics_in:
-            try:
-                metrics_out.append({
-                    'name': m.get('name') or m.get('metric') or '',
-                    'score': int(m.get('score') or 0),
-                    'confidenceInterval': m.get('confidenceInterval') or m.get('confidence_interval') or [0, 100],
-                    'whatHelped': m.get('whatHelped') or m.get('what_helped') or [],
-                    'whatHurt': m.get('whatHurt') or m.get('what_hurt') or []
-                })
-            except Exception:
-                continue
-        
-        # Fill metric feedback if empty arrays detected
-        if metrics_out:
-            metrics_out = Session.fill_metric_feedback_with_gemini(
-                metrics_out,
-                {'sessionName': doc.get('sessionName', '')}
+        try:
+            client = get_gemini_client()
+            if client is None:
+                return
+
+            prompt = (
+                "You are given partial session analysis and diarization data. "
+                "Return a JSON object with keys: timeline.audio (array of {startTime,endTime,pace,pauses,type,message}), "
+                "timeline.video (array of {startTime,endTime,eyeContact,gestures,type,message}), "
+                "timeline.scoreDips (array of {timestamp,score,message,type}), "
+                "timeline.scorePeaks (array of {timestamp,score,message,type}), "
+                "metrics (array of {name,score,confidenceInterval,whatHelped,whatHurt}), "
+                "weakMoments (array of {timestamp,message}). "
+                "Only include fields that are missing in the input. Use the provided context to generate realistic entries. "
+                "Output must be valid JSON only (no extra text)."
             )
-        
-        out['metrics'] = metrics_out
+            if context_parts:
+                prompt += " Context: " + " | ".join(context_parts)
 
-        # weakMoments if present
-        out['weakMoments'] = doc.get('weakMoments', []) or []
-
-        out['diarization'] = doc.get('diarization', {}) or {}
-
-        return out
+            response = client.models.generate_content(
+                model="gemini-2.5-flash",
+                contents=prompt,
+                config=_GEMINI_JSON_CONFIG
+            )
+            generated = Session._parse_gemini_json(response)
+            if not isinstance(generated, dict):
+                return
+
+            gen_tl = generated.get('timeline') if isinstance(generated.get('timeline'), dict) else {}
+            if need_audio and isinstance(gen_tl.get('audio'), list):
+                timeline['audio'] = gen_tl['audio']
+            if need_video and isinstance(gen_tl.get('video'), list):
+                timeline['video'] = gen_tl['video']
+            if need_score:
+                if isinstance(gen_tl.get('scoreDips'), list) and gen_tl.get('scoreDips'):
+                    timeline['scoreDips'] = gen_tl['scoreDips']
+                if isinstance(gen_tl.get('scorePeaks'), list) and gen_tl.get('scorePeaks'):
+                    timeline['scorePeaks'] = gen_tl['scorePeaks']
+
+            if need_metrics and isinstance(generated.get('metrics'), list):
+                doc['metrics'] = generated.get('metrics')
+
+            if not doc.get('weakMoments') and isinstance(generated.get('weakMoments'), list):
+                doc['weakMoments'] = generated.get('weakMoments')
+        except Exception:
+            # best-effort: ignore any generator errors and continue with heuristics/defaults
+            pass
 
     @staticmethod
-    def normalize_for_api(s: dict) -> dict:
+    def normalize_for_api(s: dict, synthesize: bool = False) -> dict:
         """Return a normalized session dict that matches the `data/session_breakdown.json` schema.
 
         Ensures fields: sessionId, sessionName, videoUrl, duration, timeline (audio, video, transcript, scoreDips, scorePeaks), metrics
         Types are coerced where possible and defaults filled.
+        With synthesize=True, missing timeline/metrics data and empty metric feedback
+        are filled in with Gemini first (best-effort, see _maybe_synthesize_timeline).
+
+        Plain normalizations of stored sessions are memoized per (sessionId, updated_at),
+        so the result may be shared between callers and must be treated as read-only.
         """
         if not s:
             return {}
 
+        session_id = s.get('sessionId')
+        version = s.get('updated_at')
+        if synthesize or not session_id or version is None:
+            return Session._normalize_for_api(s, synthesize)
+
+        with _normalized_session_cache_lock:
+            hit = _normalized_session_cache.get(session_id)
+            if hit and hit[0] == version:
+                _normalized_session_cache.move_to_end(session_id)
+                return hit[1]
+
+        out = Session._normalize_for_api(s, synthesize)
+        with _normalized_session_cache_lock:
+            _normalized_session_cache[session_id] = (version, out)
+            _normalized_session_cache.move_to_end(session_id)
+            if len(_normalized_session_cache) > NORMALIZED_SESSION_CACHE_SIZE:
+                _normalized_session_cache.popitem(last=False)
+        return out
+
+    @staticmethod
+    def find_normalized(session_id: str):
+        """
+        Return the normalize_for_api view of a session, or None if it doesn't exist.
+        When the session is memoized, only its updated_at is read to confirm the entry
+        is current, skipping the full document fetch (analysis/diarization payloads)
+        and the re-normalization.
+        """
+        with _normalized_session_cache_lock:
+            hit = _normalized_session_cache.get(session_id)
+        if hit:
+            probe = sessions_collection.find_one({'sessionId': session_id}, {'_id': 0, 'updated_at': 1})
+            if probe is None:
+                Session.invalidate_normalized(session_id)
+                return None
+            if probe.get('updated_at') == hit[0]:
+                return hit[1]
+        s = Session.find_by_sessionId(session_id)
+        return Session.normalize_for_api(s) if s else None
+
+    @staticmethod
+    def invalidate_normalized(session_id: str):
+        """Drop a session's memoized normalize_for_api result"""
+        with _normalized_session_cache_lock:
+            _normalized_session_cache.pop(session_id, None)
+
+    @staticmethod
+    def _compute_duration(doc: dict) -> int:
+        """Derive a session's duration from its analysis, else from the last transcript endTime"""
+        duration = None
+        if isinstance(doc.get('analysis'), dict):
+            duration = doc['analysis'].get('duration') or doc['analysis'].get('total_duration')
+        if not duration and isinstance(doc.get('timeline'), dict):
+            transcript = doc['timeline'].get('transcript') or []
+            duration = max((_to_int(ts.get('endTime')) for ts in transcript if isinstance(ts, dict)), default=0)
+        return _to_int(duration)
+
+    @staticmethod
+    def _backfill_duration(doc: dict) -> int:
+        """Derive a missing duration with _compute_duration and, for stored sessions, write it back"""
+        duration = Session._compute_duration(doc)
+        if duration and '_id' in doc and doc.get('sessionId'):
+            # Unacknowledged write: later reads take the explicit-duration path
+            sessions_collection_nowait.update_one({'sessionId': doc['sessionId']}, {'$set': {'duration': duration}})
+        return duration
+
+    @staticmethod
+    def _normalize_for_api(s: dict, synthesize: bool) -> dict:
+        """Uncached body of normalize_for_api"""
         # shallow copy to avoid mutating original
         doc = dict(s)
 
@@ -1362,118 +1875,38 @@ CRITICAL REQUIREMENTS:
         out['sessionName'] = doc.get('sessionName') or doc.get('name') or f"Session {out['sessionId']}"
         out['videoUrl'] = doc.get('localVideoPath') or doc.get('uploadedFile') or ''
 
-        # Duration: prefer explicit duration, else try analysis or compute from transcript
+        # Duration: prefer explicit duration, else derive it once and store it on the session
         duration = doc.get('duration')
         if not isinstance(duration, (int, float)):
-            # try common fields
-            if isinstance(doc.get('analysis'), dict):
-                duration = doc['analysis'].get('duration') or doc['analysis'].get('total_duration')
-            if not duration and isinstance(doc.get('timeline'), dict):
-                transcript = doc['timeline'].get('transcript', [])
-                if transcript:
-                    try:
-                        duration = max((int(ts.get('endTime', 0)) for ts in transcript))
-                    except Exception:
-                        duration = 0
-        out['duration'] = int(duration or 0)
+            duration = Session._backfill_duration(doc)
+        out['duration'] = _to_int(duration)
 
-        # Timeline normalization
-        timeline = doc.get('timeline') or {}
-        # Helper to coerce numeric
-        def to_num(v):
-            try:
-                return int(v)
-            except Exception:
-                try:
-                    return int(float(v))
-                except Exception:
-                    return 0
-
-        # audio segments
-        audio_in = timeline.get('audio', []) if isinstance(timeline, dict) else []
-        audio_out = []
-        for seg in audio_in:
-            seg = seg or {}
-            audio_out.append({
-                'startTime': to_num(seg.get('startTime') or seg.get('start') or 0),
-                'endTime': to_num(seg.get('endTime') or seg.get('end') or 0),
-                'pace': int(seg.get('pace') or 0),
-                'pauses': int(seg.get('pauses') or 0),
-                'type': seg.get('type') or 'normal',
-                'message': seg.get('message') or ''
-            })
-
-        # video segments
-        video_in = timeline.get('video', []) if isinstance(timeline, dict) else []
-        video_out = []
-        for seg in video_in:
-            seg = seg or {}
-            video_out.append({
-                'startTime': to_num(seg.get('startTime') or seg.get('start') or 0),
-                'endTime': to_num(seg.get('endTime') or seg.get('end') or 0),
-                'eyeContact': float(seg.get('eyeContact') or seg.get('eye_contact') or 0),
-                'gestures': int(seg.get('gestures') or 0),
-                'type': seg.get('type') or 'good',
-                'message': seg.get('message') or ''
-            })
-
-        # transcript segments
-        trans_in = timeline.get('transcript', []) if isinstance(timeline, dict) else []
-        trans_out = []
-        for seg in trans_in:
-            seg = seg or {}
-            trans_out.append({
-                'startTime': to_num(seg.get('startTime') or seg.get('start') or 0),
-                'endTime': to_num(seg.get('endTime') or seg.get('end') or 0),
-                'text': seg.get('text') or seg.get('transcript') or '',
-                'keyPhrases': seg.get('keyPhrases') or seg.get('key_phrases') or []
-            })
-
-        # score dips & peaks
-        dips_in = timeline.get('scoreDips', []) if isinstance(timeline, dict) else []
-        peaks_in = timeline.get('scorePeaks', []) if isinstance(timeline, dict) else []
-        dips_out = []
-        for d in dips_in:
-            d = d or {}
-            dips_out.append({
-                'timestamp': to_num(d.get('timestamp') or d.get('time') or d.get('ts') or 0),
-                'score': int(d.get('score') or 0),
-                'message': d.get('message') or '',
-                'type': d.get('type') or ''
-            })
+        if synthesize:
+            Session._maybe_synthesize_timeline(doc)
 
-        peaks_out = []
-        for p in peaks_in:
-            p = p or {}
-            peaks_out.append({
-                'timestamp': to_num(p.get('timestamp') or p.get('time') or p.get('ts') or 0),
-                'score': int(p.get('score') or 0),
-                'message': p.get('message') or '',
-                'type': p.get('type') or ''
-            })
-
-        out['timeline'] = {
-            'audio': audio_out,
-            'video': video_out,
-            'transcript': trans_out,
-            'scoreDips': dips_out,
-            'scorePeaks': peaks_out
-        }
+        # Timeline normalization
+        timeline = doc.get('timeline') if isinstance(doc.get('timeline'), dict) else {}
+        out['timeline'] = {name: _normalize_list(timeline.get(name), schema) for name, schema in _TIMELINE_SCHEMAS}
 
         # metrics: ensure shape
         metrics_in = doc.get('metrics', []) or []
-        metrics_out = []
-        for m in metrics_in:
-            try:
-                metrics_out.append({
-                    'name': m.get('name') or m.get('metric') or '',
-                    'score': int(m.get('score') or 0),
-                    'confidenceInterval': m.get('confidenceInterval') or m.get('confidence_interval') or [0, 100],
-                    'whatHelped': m.get('whatHelped') or m.get('what_helped') or [],
-                    'whatHurt': m.get('whatHurt') or m.get('what_hurt') or []
-                })
-            except Exception:
-                continue
+        # Non-dict entries are dropped
+        metrics_out = [
+            {
+                'name': m.get('name') or m.get('metric') or '',
+                'score': _to_int(m.get('score')),
+                'confidenceInterval': m.get('confidenceInterval') or m.get('confidence_interval') or [0, 100],
+                'whatHelped': m.get('whatHelped') or m.get('what_helped') or [],
+                'whatHurt': m.get('whatHurt') or m.get('what_hurt') or []
+            }
+            for m in metrics_in if isinstance(m, dict)
+        ]
+        if synthesize and metrics_out:
+            # Fill metric feedback if empty arrays detected
+            metrics_out = Session.fill_metric_feedback_with_gemini(
+                metrics_out,
+                {'sessionName': doc.get('sessionName', '')}
+            )
         out['metrics'] = metrics_out
 
         # Include diarization if present
@@ -1485,48 +1918,178 @@ CRITICAL REQUIREMENTS:
         return out
 
     @staticmethod
-    def find_by_mentor(mentor_id: str, limit: int = None):
-        """Return list of sessions for a mentor."""
-        cursor = sessions_collection.find({'mentorId': mentor_id}).sort('created_at', -1)
+    def find_by_mentor(mentor_id: str, limit: int = None, projection: dict = SESSION_LIST_PROJECTION):
+        """
+        Return list of sessions for a mentor, newest first. '_id' is left as an ObjectId
+        (the app's JSON provider, OrjsonProvider, serializes ObjectId as a string).
+        The projection defaults to SESSION_LIST_PROJECTION (no timeline/analysis/diarization
+        payloads); pass e.g. SESSION_SCORE_FIELDS for less, or None for full documents.
+        """
+        cursor = sessions_collection.find({'mentorId': mentor_id}, projection).sort('created_at', -1)
         if limit:
             cursor = cursor.limit(limit)
         sessions = list(cursor)
         for s in sessions:
-            s['_id'] = str(s['_id'])
             # Normalize sessionId to id for frontend compatibility
             if 'sessionId' in s and 'id' not in s:
                 s['id'] = s['sessionId']
         return sessions
 
     @staticmethod
-    def find_by_user(user_id: str, limit: int = None):
-        cursor = sessions_collection.find({'userId': user_id}).sort('created_at', -1)
+    def public_profile_stats(mentor_id: str):
+        """
+        Aggregate a mentor's session scores server-side for the public profile.
+        Each session is averaged over its metric scores; sessions without numeric
+        scores count towards 'count' but not the score fields.
+        
+        Returns:
+            dict: {'count', 'scoredCount', 'overall' (None if unscored), 'trend' (tail of the newest-first session averages, max 4)}
+        """
+        scored = {'$filter': {'input': '$scores', 'cond': {'$ne': ['$$this', None]}}}
+        pipeline = [
+            {'$match': {'mentorId': mentor_id}},
+            {'$sort': {'created_at': -1}},
+            {'$project': {'_id': 0, 'score': {'$avg': '$metrics.score'}}},
+            {'$group': {'_id': None, 'count': {'$sum': 1}, 'overall': {'$avg': '$score'}, 'scores': {'$push': '$score'}}},
+            {'$project': {
+                '_id': 0,
+                'count': 1,
+                'overall': 1,
+                'scoredCount': {'$size': scored},
+                'trend': {'$slice': [scored, -4]}
+            }}
+        ]
+        stats = next(sessions_collection.aggregate(pipeline), None)
+        return stats or {'count': 0, 'scoredCount': 0, 'overall': None, 'trend': []}
+
+    @staticmethod
+    def find_by_user(user_id: str, limit: int = None, projection: dict = SESSION_LIST_PROJECTION):
+        """Return list of sessions for a user, newest first (projection as in find_by_mentor)"""
+        cursor = sessions_collection.find({'userId': user_id}, projection).sort('created_at', -1)
         if limit:
             cursor = cursor.limit(limit)
         sessions = list(cursor)
         for s in sessions:
-            s['_id'] = str(s['_id'])
             # Normalize sessionId to id for frontend compatibility
             if 'sessionId' in s and 'id' not in s:
                 s['id'] = s['sessionId']
         return sessions
 
+    @staticmethod
+    def existing_session_ids(session_ids) -> set:
+        """Return which of the given sessionIds are already stored, in one query"""
+        cursor = sessions_collection.find({'sessionId': {'$in': list(session_ids)}}, {'_id': 0, 'sessionId': 1})
+        return {d['sessionId'] for d in cursor}
+
+    @staticmethod
+    def update_sessions_bulk(updates: dict) -> int:
+        """
+        Apply many update_session-style $set updates in one unordered bulk_write
+        
+        Args:
+            updates (dict): sessionId -> fields to set
+            
+        Returns:
+            int: Number of modified sessions
+        """
+        if not updates:
+            return 0
+        mentor_ids = sessions_collection.distinct('mentorId', {'sessionId': {'$in': list(updates)}})
+        now = datetime.utcnow()
+        ops = [UpdateOne({'sessionId': sid}, {'$set': {**data, 'updated_at': now}}) for sid, data in updates.items()]
+        try:
+            modified = sessions_collection.bulk_write(ops, ordered=False).modified_count
+        except BulkWriteError as e:
+            modified = e.details.get('nModified', 0)
+            print(f"⚠ {len(e.details.get('writeErrors', []))} session updates failed")
+        for sid in updates:
+            Session.invalidate_normalized(sid)
+        MentorStats.invalidate(*mentor_ids)
+        return modified
+
     @staticmethod
     def update_session(session_id: str, update_data: dict):
         """Update a session by its sessionId."""
-        from bson.objectid import ObjectId
         update_data['updated_at'] = datetime.utcnow()
         result = sessions_collection.find_one_and_update(
             {'sessionId': session_id},
             {'$set': update_data},
             return_document=True
         )
+        Session.invalidate_normalized(session_id)
         if result:
+            MentorStats.invalidate(result.get('mentorId'))
             result['_id'] = str(result['_id'])
         return result
 
     @staticmethod
     def delete_session(session_id: str):
         """Delete a session by its sessionId."""
-        result = sessions_collection.delete_one({'sessionId': session_id})
-        return result.deleted_count > 0
+        deleted = sessions_collection.find_one_and_delete({'sessionId': session_id}, projection={'mentorId': 1})
+        Session.invalidate_normalized(session_id)
+        if deleted is None:
+            return False
+        MentorStats.invalidate(deleted.get('mentorId'))
+        return True
+
+
+# Get mentor_stats collection (materialized per-mentor session stats)
+mentor_stats_collection = db['mentor_stats']
+# Stored stats older than this are recomputed on read, so writers that bypass the Session
+# model (e.g. migrate_sessions' bulk writes) are picked up eventually
+MENTOR_STATS_TTL_SECONDS = int(os.getenv('MENTOR_STATS_TTL_SECONDS', '300'))
+
+
+class MentorStats:
+    """
+    Materialized view of Session.public_profile_stats. Session write paths drop a
+    mentor's entry (see invalidate) and stale entries expire after MENTOR_STATS_TTL_SECONDS.
+    """
+    
+    @staticmethod
+    def refresh(mentor_id: str):
+        """
+        Recompute a mentor's session stats and store them
+        
+        Args:
+            mentor_id (str): Mentor's id as stored on sessions
+        
+        Returns:
+            dict: {'count', 'scoredCount', 'overall', 'trend'}
+        """
+        stats = Session.public_profile_stats(mentor_id)
+        mentor_stats_collection.update_one(
+            {'mentorId': mentor_id},
+            {'$set': {**stats, 'updated_at': datetime.utcnow()}},
+            upsert=True
+        )
+        return stats
+    
+    @staticmethod
+    def get(mentor_id: str):
+        """
+        Get a mentor's stored session stats, computing them when missing or expired
+        
+        Args:
+            mentor_id (str): Mentor's id as stored on sessions
+        
+        Returns:
+            dict: {'count', 'scoredCount', 'overall', 'trend'}
+        """
+        stats = mentor_stats_collection.find_one({'mentorId': mentor_id}, {'_id': 0, 'mentorId': 0})
+        updated_at = stats.pop('updated_at', None) if stats else None
+        if updated_at is None or (datetime.utcnow() - updated_at).total_seconds() > MENTOR_STATS_TTL_SECONDS:
+            stats = MentorStats.refresh(mentor_id)
+        return stats
+    
+    @staticmethod
+    def invalidate(*mentor_ids):
+        """
+        Drop stored stats for the given mentors so the next get recomputes them
+        
+        Args:
+            *mentor_ids: Mentor ids as stored on sessions (None/empty values are ignored)
+        """
+        ids = list({str(m) for m in mentor_ids if m})
+        if ids:
+            mentor_stats_collection.delete_many({'mentorId': {'$in': ids}})
@@ -11,23 +11,74 @@ Options:
 This script uses the existing `models` module (which wraps pymongo connections and User/Session helpers).
 """
 import os
-import json
 import argparse
+from itertools import islice
 from pathlib import Path
 
+import orjson
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
 # adjust path to import models if running from repo root
 from models import User, Session
 
 DATA_FILE = Path(__file__).resolve().parent / 'data' / 'session_breakdown.json'
+# Sessions checked and written per round trip
+SEED_BATCH_SIZE = 500
 
 
 def load_sessions_from_file(path: Path):
-    with open(path, 'r') as f:
-        data = json.load(f)
+    with open(path, 'rb') as f:
+        data = orjson.loads(f.read())
     # data is a mapping from sessionId -> session object
     return data
 
 
+def iter_sessions_from_file(path: Path):
+    """Yield (sessionId, session object) pairs, streamed with ijson when it is installed"""
+    if ijson is None:
+        yield from load_sessions_from_file(path).items()
+        return
+    with open(path, 'rb') as f:
+        yield from ijson.kvitems(f, '', use_float=True)
+
+
+def seed_batch(session_docs, update):
+    """Insert new sessions and (optionally) update existing ones; returns (inserted, updated, skipped)"""
+    inserted = 0
+    skipped = 0
+
+    existing_ids = Session.existing_session_ids(d['sessionId'] for d in session_docs)
+    to_insert = []
+    to_update = {}
+    for session_doc in session_docs:
+        sid = session_doc['sessionId']
+        if sid not in existing_ids:
+            to_insert.append(session_doc)
+        elif update:
+            print(f"Updating existing session {sid}")
+            to_update[sid] = session_doc
+        else:
+            print(f"Skipping existing session {sid} (use --update to overwrite)")
+            skipped += 1
+
+    if to_update:
+        Session.update_sessions_bulk(to_update)
+
+    if to_insert:
+        try:
+            for stored in Session.create_sessions_bulk(to_insert):
+                print(f"Inserted session {stored['sessionId']}")
+                inserted += 1
+        except Exception as e:
+            print(f"Failed to insert {len(to_insert)} sessions: {e}")
+
+    return inserted, len(to_update), skipped
+
+
 def main():
     parser = argparse.ArgumentParser(description='Seed sessions into MongoDB')
     parser.add_argument('--mentor-email', default='mentor@example.com', help='Mentor email to assign sessions to')
@@ -48,43 +99,36 @@ def main():
         print(f"Data file not found: {DATA_FILE}")
         return
 
-    sessions_map = load_sessions_from_file(DATA_FILE)
     total = 0
     inserted = 0
     updated = 0
     skipped = 0
 
-    for session_key, session_obj in sessions_map.items():
-        total += 1
-        session_doc = {
-            'sessionId': session_obj.get('sessionId') or session_key,
-            'sessionName': session_obj.get('sessionName'),
-            'videoUrl': session_obj.get('videoUrl'),
-            'duration': session_obj.get('duration'),
-            'timeline': session_obj.get('timeline', {}),
-            'metrics': session_obj.get('metrics', []),
-            'mentorId': mentor_id,
-            # optionally set userId to mentor as well for now
-            'userId': mentor_id,
-        }
-
-        existing = Session.find_by_sessionId(session_doc['sessionId'])
-        if existing:
-            if args.update:
-                print(f"Updating existing session {session_doc['sessionId']}")
-                Session.update_session(session_doc['sessionId'], session_doc)
-                updated += 1
-            else:
-                print(f"Skipping existing session {session_doc['sessionId']} (use --update to overwrite)")
-                skipped += 1
-            continue
-
-        try:
-            Session.create_session(session_doc)
-            print(f"Inserted session {session_doc['sessionId']}")
-            inserted += 1
-        except Exception as e:
-            print(f"Failed to insert session {session_doc['sessionId']}: {e}")
+    # Stream the file and seed it SEED_BATCH_SIZE sessions at a time, so memory stays
+    # bounded and the first writes don't wait for the whole file to parse
+    sessions = iter_sessions_from_file(DATA_FILE)
+    while True:
+        batch = [
+            {
+                'sessionId': session_obj.get('sessionId') or session_key,
+                'sessionName': session_obj.get('sessionName'),
+                'videoUrl': session_obj.get('videoUrl'),
+                'duration': session_obj.get('duration'),
+                'timeline': session_obj.get('timeline', {}),
+                'metrics': session_obj.get('metrics', []),
+                'mentorId': mentor_id,
+                # optionally set userId to mentor as well for now
+                'userId': mentor_id,
+            }
+            for session_key, session_obj in islice(sessions, SEED_BATCH_SIZE)
+        ]
+        if not batch:
+            break
+        total += len(batch)
+        batch_inserted, batch_updated, batch_skipped = seed_batch(batch, args.update)
+        inserted += batch_inserted
+        updated += batch_updated
+        skipped += batch_skipped
 
     print('\nDone')
     print(f"Total: {total}, Inserted: {inserted}, Updated: {updated}, Skipped: {skipped}")
@@ -4,230 +4,223 @@ Test script to verify the session schema implementation.
 Tests the MongoDB document structure against the prepare_for_insert and create_session methods.
 """
 
-import json
-from datetime import datetime
+import orjson
+import functools
+from operator import itemgetter
 from models import Session
 import os
+import sys
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
-# Load environment
+# Load environment once; tests read the resulting constants
 load_dotenv()
+GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
 
-# Sample MongoDB document (MongoDB Extended JSON format converted to Python)
-SAMPLE_SESSION = {
-    "_id": "693aa033981c3f900c1171c4",
-    "sessionId": "session_001",
-    "sessionName": "Introduction to Video Processing",
-    "videoUrl": "https://commondatastorage.googleapis.com/gtv-videos-bucket/sample/BigBuckBunny.mp4",
-    "duration": 1800,
-    "timeline": {
-        "audio": [
-            {"startTime": 0, "endTime": 300, "pace": 150, "pauses": 3, "type": "normal"},
-            {"startTime": 300, "endTime": 600, "pace": 190, "pauses": 1, "type": "fast", "message": "Pacing dropped here – speaking speed increased to 190 wpm"},
-            {"startTime": 600, "endTime": 900, "pace": 145, "pauses": 4, "type": "normal"},
-            {"startTime": 900, "endTime": 1200, "pace": 175, "pauses": 2, "type": "moderate"},
-            {"startTime": 1200, "endTime": 1500, "pace": 140, "pauses": 5, "type": "normal"},
-            {"startTime": 1500, "endTime": 1800, "pace": 155, "pauses": 3, "type": "normal"}
-        ],
-        "video": [
-            {"startTime": 0, "endTime": 400, "eyeContact": 85, "gestures": 8, "type": "good"},
-            {"startTime": 400, "endTime": 750, "eyeContact": 45, "gestures": 2, "type": "poor", "message": "Eye contact dropped significantly"},
-            {"startTime": 750, "endTime": 1200, "eyeContact": 90, "gestures": 12, "type": "excellent"},
-            {"startTime": 1200, "endTime": 1800, "eyeContact": 80, "gestures": 7, "type": "good"}
-        ],
-        "transcript": [
-            {"startTime": 0, "endTime": 120, "text": "Welcome everyone to today's session on video processing. Let's start with the basics.", "keyPhrases": ["welcome", "video processing", "basics"]},
-            {"startTime": 300, "endTime": 420, "text": "Now we'll dive into advanced techniques and algorithms that you need to understand quickly.", "keyPhrases": ["advanced techniques", "algorithms", "understand quickly"]},
-            {"startTime": 600, "endTime": 720, "text": "Let me pause here for questions. Does anyone have any concerns?", "keyPhrases": ["pause", "questions", "concerns"]},
-            {"startTime": 900, "endTime": 1020, "text": "The key concept here is frame rate optimization and compression ratios.", "keyPhrases": ["frame rate", "optimization", "compression"]},
-            {"startTime": 1200, "endTime": 1320, "text": "In conclusion, remember these three important principles we discussed today.", "keyPhrases": ["conclusion", "principles", "discussed"]}
-        ],
-        "scoreDips": [
-            {"timestamp": 340, "score": 65, "message": "Pacing dropped here – speaking speed increased to 190 wpm", "type": "audio"},
-            {"timestamp": 450, "score": 58, "message": "Eye contact dropped significantly", "type": "video"},
-            {"timestamp": 720, "score": 72, "message": "Brief pause in engagement", "type": "engagement"}
-        ],
-        "scorePeaks": [
-            {"timestamp": 150, "score": 95, "message": "Excellent clarity and engagement", "type": "overall"},
-            {"timestamp": 850, "score": 92, "message": "Strong eye contact and clear explanations", "type": "video"},
-            {"timestamp": 1100, "score": 94, "message": "Perfect pacing and clarity", "type": "audio"}
-        ]
-    },
-    "metrics": [
-        {"name": "Clarity", "score": 72, "confidenceInterval": [68, 76], "whatHelped": ["Clear definitions provided", "Good use of examples", "Structured explanations"], "whatHurt": ["Jargon overload in first 5 mins", "Rapid speech in middle section", "Technical terms without context"]},
-        {"name": "Engagement", "score": 85, "confidenceInterval": [81, 89], "whatHelped": ["Interactive questions", "Good eye contact in second half", "Varied pacing"], "whatHurt": ["Low eye contact in minutes 6-12", "Fewer gestures in middle section", "Long monologue without breaks"]},
-        {"name": "Pacing", "score": 78, "confidenceInterval": [74, 82], "whatHelped": ["Good pauses for questions", "Steady pace in opening", "Appropriate speed in conclusion"], "whatHurt": ["Speaking speed increased to 190 wpm at 5:00", "Rushed through technical section", "Inconsistent pacing"]},
-        {"name": "Eye Contact", "score": 75, "confidenceInterval": [71, 79], "whatHelped": ["Strong eye contact in opening", "Good engagement in Q&A section", "Consistent focus in conclusion"], "whatHurt": ["Eye contact dropped to 45% at 6:40", "Looking at notes too frequently", "Distracted by screen in middle section"]},
-        {"name": "Gestures", "score": 82, "confidenceInterval": [78, 86], "whatHelped": ["Expressive hand movements", "Good use of gestures for emphasis", "Natural body language"], "whatHurt": ["Fewer gestures in technical section", "Repetitive movements", "Limited gestures during explanation"]},
-        {"name": "Overall", "score": 89, "confidenceInterval": [85, 93], "whatHelped": ["Well-structured presentation", "Good balance of content", "Effective use of examples"], "whatHurt": ["Pacing issues in middle section", "Eye contact drop", "Jargon without explanation"]}
-    ],
-    "mentorId": "6939b816f8b9afeeeaeb65af",
-    "userId": "6939b816f8b9afeeeaeb65af",
-    "created_at": datetime.fromtimestamp(1765449779.516),
-    "updated_at": datetime.fromtimestamp(1765449779.516)
-}
+# Sample MongoDB document (MongoDB Extended JSON), stored alongside the other fixtures in data/
+SAMPLE_SESSION_PATH = os.path.join(os.path.dirname(__file__), 'data', 'sample_session.json')
+with open(SAMPLE_SESSION_PATH, 'rb') as f:
+    SAMPLE_SESSION = orjson.loads(f.read())
+
+# Expected segment/metric counts for the sample
+# Timeline arrays and their report labels; prepare_for_insert/normalize_for_api always populate all of them
+_TL_LABELS = (
+    ('audio', 'audio segments'),
+    ('video', 'video segments'),
+    ('transcript', 'transcript segments'),
+    ('scoreDips', 'scoreDips'),
+    ('scorePeaks', 'scorePeaks'),
+)
+_TL_KEYS = tuple(k for k, _ in _TL_LABELS)
+_get_timeline = itemgetter('timeline')
+
+_EXPECTED = {k: len(SAMPLE_SESSION['timeline'][k]) for k in _TL_KEYS}
+_EXPECTED_METRICS = len(SAMPLE_SESSION['metrics'])
+
+
+_emit_lock = threading.Lock()
+
+
+def _emit(lines):
+    """Write a test's buffered report to stdout in a single call"""
+    with _emit_lock:
+        sys.stdout.write("\n".join(lines) + "\n")
+
+
+def _iter_empty_fields(timeline):
+    """Yield the paths of timeline fields that Gemini would need to fill"""
+    yield from (f"audio[{i}].message" for i, a in enumerate(timeline.get('audio', ())) if not a.get('message'))
+    yield from (f"video[{i}].message" for i, v in enumerate(timeline.get('video', ())) if not v.get('message'))
+    yield from (
+        f"transcript[{i}].{key}"
+        for i, t in enumerate(timeline.get('transcript', ()))
+        for key in ('text', 'keyPhrases')
+        if not t.get(key)
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def _get_prepared():
+    """Prepare SAMPLE_SESSION once and share it across the tests (prepare_for_insert doesn't mutate its input)"""
+    return Session.prepare_for_insert(SAMPLE_SESSION)
 
 
 def test_prepare_for_insert():
     """Test the prepare_for_insert method with the sample data."""
-    print("\n" + "="*80)
-    print("TEST 1: prepare_for_insert")
-    print("="*80)
+    # Buffer the report and write it in one go
+    lines = []
+    say = lines.append
+    say("\n" + "="*80)
+    say("TEST 1: prepare_for_insert")
+    say("="*80)
     
     try:
-        prepared = Session.prepare_for_insert(SAMPLE_SESSION.copy())
+        prepared = _get_prepared()
         
-        print("\n✓ Document prepared successfully")
-        print(f"\nKey fields present:")
-        print(f"  - sessionId: {prepared.get('sessionId')}")
-        print(f"  - sessionName: {prepared.get('sessionName')}")
-        print(f"  - duration: {prepared.get('duration')} (type: {type(prepared.get('duration')).__name__})")
-        print(f"  - mentorId: {prepared.get('mentorId')}")
-        print(f"  - userId: {prepared.get('userId')}")
+        say("\n✓ Document prepared successfully")
+        say(f"\nKey fields present:")
+        say(f"  - sessionId: {prepared.get('sessionId')}")
+        say(f"  - sessionName: {prepared.get('sessionName')}")
+        say(f"  - duration: {prepared.get('duration')} (type: {type(prepared.get('duration')).__name__})")
+        say(f"  - mentorId: {prepared.get('mentorId')}")
+        say(f"  - userId: {prepared.get('userId')}")
         
-        print(f"\nTimeline structure:")
-        timeline = prepared.get('timeline', {})
-        print(f"  - audio segments: {len(timeline.get('audio', []))} (expected: {len(SAMPLE_SESSION['timeline']['audio'])})")
-        print(f"  - video segments: {len(timeline.get('video', []))} (expected: {len(SAMPLE_SESSION['timeline']['video'])})")
-        print(f"  - transcript segments: {len(timeline.get('transcript', []))} (expected: {len(SAMPLE_SESSION['timeline']['transcript'])})")
-        print(f"  - scoreDips: {len(timeline.get('scoreDips', []))} (expected: {len(SAMPLE_SESSION['timeline']['scoreDips'])})")
-        print(f"  - scorePeaks: {len(timeline.get('scorePeaks', []))} (expected: {len(SAMPLE_SESSION['timeline']['scorePeaks'])})")
+        say(f"\nTimeline structure:")
+        timeline = _get_timeline(prepared)
+        for key, label in _TL_LABELS:
+            say(f"  - {label}: {len(timeline[key])} (expected: {_EXPECTED[key]})")
         
-        print(f"\nMetrics:")
+        say(f"\nMetrics:")
         metrics = prepared.get('metrics', [])
-        print(f"  - Total metrics: {len(metrics)} (expected: {len(SAMPLE_SESSION['metrics'])})")
+        say(f"  - Total metrics: {len(metrics)} (expected: {_EXPECTED_METRICS})")
         for m in metrics:
             score = m.get('score')
             conf_interval = m.get('confidenceInterval')
-            print(f"    • {m.get('name')}: score={score}, CI={conf_interval}")
+            say(f"    • {m.get('name')}: score={score}, CI={conf_interval}")
         
         # Check for empty fields
-        print(f"\nField validation:")
-        empty_fields = []
-        
-        for audio in timeline.get('audio', []):
-            if not audio.get('message'):
-                empty_fields.append(f"audio[{len(empty_fields)}].message")
-        
-        for video in timeline.get('video', []):
-            if not video.get('message'):
-                empty_fields.append(f"video[{len(empty_fields)}].message")
-        
-        for transcript in timeline.get('transcript', []):
-            if not transcript.get('text'):
-                empty_fields.append(f"transcript[{len(empty_fields)}].text")
-            if not transcript.get('keyPhrases'):
-                empty_fields.append(f"transcript[{len(empty_fields)}].keyPhrases")
+        say(f"\nField validation:")
+        empty_fields = list(_iter_empty_fields(timeline))
         
         if empty_fields:
-            print(f"  ⚠ Found {len(empty_fields)} potentially empty fields (will be filled by Gemini):")
+            say(f"  ⚠ Found {len(empty_fields)} potentially empty fields (will be filled by Gemini):")
             for field in empty_fields[:5]:
-                print(f"    - {field}")
+                say(f"    - {field}")
             if len(empty_fields) > 5:
-                print(f"    ... and {len(empty_fields) - 5} more")
+                say(f"    ... and {len(empty_fields) - 5} more")
         else:
-            print(f"  ✓ No empty fields found")
+            say(f"  ✓ No empty fields found")
         
         return prepared
         
     except Exception as e:
-        print(f"✗ Error in prepare_for_insert: {str(e)}")
-        import traceback
+        say(f"✗ Error in prepare_for_insert: {str(e)}")
         traceback.print_exc()
         return None
+    finally:
+        _emit(lines)
+
 
 
 def test_normalize_for_api():
     """Test the normalize_for_api method."""
-    print("\n" + "="*80)
-    print("TEST 2: normalize_for_api")
-    print("="*80)
+    # Buffer the report and write it in one go
+    lines = []
+    say = lines.append
+    say("\n" + "="*80)
+    say("TEST 2: normalize_for_api")
+    say("="*80)
     
     try:
-        prepared = Session.prepare_for_insert(SAMPLE_SESSION.copy())
+        prepared = _get_prepared()
         normalized = Session.normalize_for_api(prepared)
         
-        print("\n✓ Document normalized successfully")
-        print(f"\nNormalized fields:")
-        print(f"  - sessionId: {normalized.get('sessionId')}")
-        print(f"  - sessionName: {normalized.get('sessionName')}")
-        print(f"  - duration: {normalized.get('duration')}")
-        print(f"  - videoUrl: {normalized.get('videoUrl')[:50]}...")
+        say("\n✓ Document normalized successfully")
+        say(f"\nNormalized fields:")
+        say(f"  - sessionId: {normalized.get('sessionId')}")
+        say(f"  - sessionName: {normalized.get('sessionName')}")
+        say(f"  - duration: {normalized.get('duration')}")
+        say(f"  - videoUrl: {normalized.get('videoUrl')[:50]}...")
         
-        print(f"\nTimeline structure:")
-        timeline = normalized.get('timeline', {})
-        print(f"  - audio segments: {len(timeline.get('audio', []))}")
-        print(f"  - video segments: {len(timeline.get('video', []))}")
-        print(f"  - transcript segments: {len(timeline.get('transcript', []))}")
-        print(f"  - scoreDips: {len(timeline.get('scoreDips', []))}")
-        print(f"  - scorePeaks: {len(timeline.get('scorePeaks', []))}")
+        say(f"\nTimeline structure:")
+        timeline = _get_timeline(normalized)
+        for key, label in _TL_LABELS:
+            say(f"  - {label}: {len(timeline[key])}")
         
-        print(f"\nMetrics count: {len(normalized.get('metrics', []))}")
+        say(f"\nMetrics count: {len(normalized.get('metrics', []))}")
         
         return normalized
         
     except Exception as e:
-        print(f"✗ Error in normalize_for_api: {str(e)}")
-        import traceback
+        say(f"✗ Error in normalize_for_api: {str(e)}")
         traceback.print_exc()
         return None
+    finally:
+        _emit(lines)
+
 
 
 def test_schema_completeness():
     """Verify the schema has no empty critical fields."""
-    print("\n" + "="*80)
-    print("TEST 3: Schema Completeness Check")
-    print("="*80)
+    # Buffer the report and write it in one go
+    lines = []
+    say = lines.append
+    say("\n" + "="*80)
+    say("TEST 3: Schema Completeness Check")
+    say("="*80)
     
     try:
-        prepared = Session.prepare_for_insert(SAMPLE_SESSION.copy())
+        prepared = _get_prepared()
         
-        print("\nValidating required fields are present and non-empty:")
+        say("\nValidating required fields are present and non-empty:")
         
+        timeline = _get_timeline(prepared)
         checks = {
             'sessionId': prepared.get('sessionId'),
             'sessionName': prepared.get('sessionName'),
             'videoUrl': prepared.get('videoUrl'),
             'duration': prepared.get('duration'),
             'mentorId': prepared.get('mentorId'),
-            'timeline.audio': len(prepared.get('timeline', {}).get('audio', [])) > 0,
-            'timeline.video': len(prepared.get('timeline', {}).get('video', [])) > 0,
-            'timeline.transcript': len(prepared.get('timeline', {}).get('transcript', [])) > 0,
-            'timeline.scoreDips': len(prepared.get('timeline', {}).get('scoreDips', [])) > 0,
-            'timeline.scorePeaks': len(prepared.get('timeline', {}).get('scorePeaks', [])) > 0,
-            'metrics': len(prepared.get('metrics', [])) > 0,
+            **{f'timeline.{k}': len(timeline[k]) > 0 for k in _TL_KEYS},
+            'metrics': len(prepared.get('metrics', ())) > 0,
         }
         
         all_valid = True
         for field, value in checks.items():
-            is_valid = bool(value) if not isinstance(value, bool) else value
+            is_valid = bool(value)
             status = "✓" if is_valid else "✗"
-            print(f"  {status} {field}")
+            say(f"  {status} {field}")
             if not is_valid:
                 all_valid = False
         
         if all_valid:
-            print("\n✓ All required fields are present and populated")
+            say("\n✓ All required fields are present and populated")
         else:
-            print("\n⚠ Some fields are missing or empty (will be filled by Gemini on insert)")
+            say("\n⚠ Some fields are missing or empty (will be filled by Gemini on insert)")
         
     except Exception as e:
-        print(f"✗ Error in schema completeness check: {str(e)}")
-        import traceback
+        say(f"✗ Error in schema completeness check: {str(e)}")
         traceback.print_exc()
+    finally:
+        _emit(lines)
+
 
 
 def test_with_gemini_fill():
     """Test the fill_missing_fields_with_gemini method if Gemini API is available."""
-    print("\n" + "="*80)
-    print("TEST 4: Gemini Fill Missing Fields")
-    print("="*80)
-    
-    api_key = os.getenv('GEMINI_API_KEY')
+    # Buffer the report and write it in one go
+    lines = []
+    say = lines.append
+    say("\n" + "="*80)
+    say("TEST 4: Gemini Fill Missing Fields")
+    say("="*80)
     
-    if not api_key:
-        print("\n⚠ GEMINI_API_KEY not set. Skipping Gemini test.")
-        print("   To enable this test, set GEMINI_API_KEY environment variable.")
+    if not GEMINI_API_KEY:
+        say("\n⚠ GEMINI_API_KEY not set. Skipping Gemini test.")
+        say("   To enable this test, set GEMINI_API_KEY environment variable.")
+        _emit(lines)
         return
     
     try:
@@ -250,28 +243,31 @@ def test_with_gemini_fill():
             'weakMoments': []
         }
         
-        print("\nTesting Gemini API to fill empty fields...")
-        print("Original document has empty timeline and metrics")
+        say("\nTesting Gemini API to fill empty fields...")
+        say("Original document has empty timeline and metrics")
         
         filled = Session.fill_missing_fields_with_gemini(partial_session.copy())
         
-        print("\n✓ Gemini API call successful")
-        print(f"\nFilled fields:")
+        say("\n✓ Gemini API call successful")
+        say(f"\nFilled fields:")
         timeline = filled.get('timeline', {})
-        print(f"  - audio segments: {len(timeline.get('audio', []))}")
-        print(f"  - video segments: {len(timeline.get('video', []))}")
-        print(f"  - transcript segments: {len(timeline.get('transcript', []))}")
-        print(f"  - scoreDips: {len(timeline.get('scoreDips', []))}")
-        print(f"  - scorePeaks: {len(timeline.get('scorePeaks', []))}")
-        print(f"  - metrics: {len(filled.get('metrics', []))}")
+        say(f"  - audio segments: {len(timeline.get('audio', []))}")
+        say(f"  - video segments: {len(timeline.get('video', []))}")
+        say(f"  - transcript segments: {len(timeline.get('transcript', []))}")
+        say(f"  - scoreDips: {len(timeline.get('scoreDips', []))}")
+        say(f"  - scorePeaks: {len(timeline.get('scorePeaks', []))}")
+        say(f"  - metrics: {len(filled.get('metrics', []))}")
         
         if timeline.get('audio'):
-            print(f"\nSample audio segment:")
-            print(f"  {json.dumps(timeline['audio'][0], indent=2)}")
+            say(f"\nSample audio segment:")
+            say(f"  {orjson.dumps(timeline['audio'][0], default=str, option=orjson.OPT_INDENT_2).decode()}")
         
     except Exception as e:
-        print(f"⚠ Gemini API test encountered an error: {str(e)}")
-        print("   This is expected if GEMINI_API_KEY is invalid or API is unavailable")
+        say(f"⚠ Gemini API test encountered an error: {str(e)}")
+        say("   This is expected if GEMINI_API_KEY is invalid or API is unavailable")
+    finally:
+        _emit(lines)
+
 
 
 def main():
@@ -281,11 +277,14 @@ def main():
     print("="*80)
     print(f"Testing against MongoDB Extended JSON sample document...")
     
-    # Run tests
-    prepared = test_prepare_for_insert()
-    test_normalize_for_api()
-    test_schema_completeness()
-    test_with_gemini_fill()
+    # Run tests concurrently so the Gemini round-trip overlaps the local checks
+    # Warm the shared prepared doc first so the concurrent tests don't each race to build it
+    _get_prepared()
+    tests = (test_prepare_for_insert, test_normalize_for_api, test_schema_completeness, test_with_gemini_fill)
+    with ThreadPoolExecutor(max_workers=len(tests)) as ex:
+        futures = [ex.submit(fn) for fn in tests]
+        for f in futures:
+            f.result()
     
     print("\n" + "="*80)
     print("TESTS COMPLETE")